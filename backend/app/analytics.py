@@ -0,0 +1,236 @@
+"""
+Practice insights computed over compact columnar arrays.
+
+load_practice() reads a user's practice as one row per (piece, day) --
+SUM(minutes) grouped in SQL, from the first day the period's rolling windows
+reach -- into three array('i') columns ordered by piece, then day. All-time
+totals per piece come from one more grouped query (load_pieces). Days are
+proleptic ordinals (date.toordinal()). That is 12 bytes a row instead of a
+tuple of Python objects, and every pass below runs inside C builtins
+(accumulate, map over operator functions, slicing, sum, bisect) instead of a
+Python loop per row:
+
+  * rolling 7/30-day averages: prefix sums of the zero-filled daily series;
+    a window's sum is the difference of two shifted slices of them
+  * weekday distribution: strided slices of the daily series
+  * consistency: share of days practiced times the regularity of the weekly
+    totals, 1 / (1 + coefficient of variation), as a 0-100 score
+  * per-piece trend: least-squares slope of the piece's zero-filled daily
+    minutes. Over a dense range of days sum(x) and sum(x^2) are closed-form,
+    so only the practiced days contribute terms (sum(y), sum(x*y)).
+  * time to goal: minutes left to `goal_minutes` at the piece's daily
+    average over the last 30 days
+
+The only per-row Python loop left is the scatter of (day, minutes) into the
+daily series. NumPy would vectorize that too, but it isn't a dependency, and
+ten years of practice are ~4k days.
+"""
+
+from __future__ import annotations
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from itertools import accumulate, compress
+from operator import mul, sub
+from statistics import fmean, pstdev
+from typing import Optional
+
+from sqlmodel import Session as DBSession, select, func
+
+from .models import Piece, PracticeSession
+
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+ROLLING_WINDOWS = (7, 30)
+RECENT_DAYS = 30   # the rate time-to-goal projections extrapolate
+
+
+class PracticeColumns:
+    """A user's minutes per (piece, day), as parallel arrays sorted by piece, then day."""
+    __slots__ = ("pieces", "days", "minutes")
+
+    def __init__(self, pieces: array, days: array, minutes: array):
+        self.pieces = pieces
+        self.days = days
+        self.minutes = minutes
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+
+def load_practice(db: DBSession, user_id: int, since: Optional[date] = None) -> PracticeColumns:
+    """Minutes per (piece, day) from `since` on (everything by default)."""
+    query = (
+        select(PracticeSession.piece_id, PracticeSession.practice_date, func.sum(PracticeSession.minutes))
+        .where(PracticeSession.user_id == user_id)
+        .group_by(PracticeSession.piece_id, PracticeSession.practice_date)
+        .order_by(PracticeSession.piece_id, PracticeSession.practice_date)
+    )
+    if since is not None:
+        query = query.where(PracticeSession.practice_date >= since)
+    rows = db.exec(query).all()
+    if not rows:
+        return PracticeColumns(array("i"), array("i"), array("i"))
+    pieces, dates, minutes = zip(*rows)
+    return PracticeColumns(array("i", pieces), array("i", map(date.toordinal, dates)), array("i", minutes))
+
+
+def load_pieces(db: DBSession, user_id: int) -> dict[int, tuple[str, int, date]]:
+    """piece_id -> (title, all-time minutes, last practice date) for every practiced piece."""
+    rows = db.exec(
+        select(Piece.id, Piece.title, func.sum(PracticeSession.minutes), func.max(PracticeSession.practice_date))
+        .join(PracticeSession, PracticeSession.piece_id == Piece.id)
+        .where(Piece.owner_id == user_id, PracticeSession.user_id == user_id)
+        .group_by(Piece.id, Piece.title)
+    ).all()
+    return {piece_id: (title, int(total), last) for piece_id, title, total, last in rows}
+
+
+def daily_series(cols: PracticeColumns, first: int, last: int) -> array:
+    """Zero-filled minutes per day for the ordinals first..last (inclusive)."""
+    daily = array("i", bytes(4 * (last - first + 1)))
+    for d, m in zip(cols.days, cols.minutes):
+        if first <= d <= last:
+            daily[d - first] += m
+    return daily
+
+
+def window_sums(prefix: array, window: int) -> map:
+    """Sums of every `window` consecutive days, given prefix[i] = sum(daily[:i])."""
+    return map(sub, prefix[window:], prefix[:-window])
+
+
+def weekday_distribution(daily: array, first_weekday: int) -> dict:
+    """Minutes and practiced days per weekday (Monday first)."""
+    minutes, active = [], []
+    for wd in range(7):
+        column = daily[(wd - first_weekday) % 7::7]
+        minutes.append(sum(column))
+        active.append(len(column) - column.count(0))
+    total = sum(minutes)
+    return {
+        "labels": list(WEEKDAYS),
+        "minutes": minutes,
+        "active_days": active,
+        "share": [round(m / total, 4) if total else 0.0 for m in minutes],
+    }
+
+
+def consistency(daily: array, prefix: array) -> dict:
+    n = len(daily)
+    active = n - daily.count(0)
+    # whole weeks, counted back from the last day
+    offset = n % 7
+    weekly = list(map(sub, prefix[offset + 7::7], prefix[offset::7]))
+    mean = fmean(weekly) if weekly else 0.0
+    cv = pstdev(weekly, mean) / mean if mean else None
+    regularity = 1 / (1 + cv) if cv is not None else 0.0
+    # practiced day indexes, bracketed by the days just outside the period
+    marks = [-1, *compress(range(n), daily), n]
+    return {
+        "active_days": active,
+        "active_ratio": round(active / n, 4),
+        "weekly_cv": round(cv, 4) if cv is not None else None,
+        "longest_break_days": max(map(sub, marks[1:], marks[:-1])) - 1,
+        "score": round(100 * (active / n) * regularity),
+    }
+
+
+def piece_insights(cols: PracticeColumns, pieces: dict[int, tuple[str, int, date]],
+                   first: int, last: int, goal_minutes: int) -> list[dict]:
+    """Per piece: period minutes, trend, all-time total and the time-to-goal projection."""
+    n = last - first + 1
+    sum_x = n * (n - 1) / 2
+    sum_xx = (n - 1) * n * (2 * n - 1) / 6
+    denom = n * sum_xx - sum_x * sum_x
+    days, minutes = cols.days, cols.minutes
+
+    out = []
+    for piece_id, (title, total, last_practiced) in pieces.items():
+        lo, hi = bisect_left(cols.pieces, piece_id), bisect_right(cols.pieces, piece_id)
+        a = bisect_left(days, first, lo, hi)
+        b = bisect_right(days, last, lo, hi)
+        period = sum(minutes[a:b])
+        # x = day - first, so sum(x*y) = sum(day*y) - first*sum(y)
+        sum_xy = sum(map(mul, days[a:b], minutes[a:b])) - first * period
+        slope = (n * sum_xy - sum_x * period) / denom if denom else 0.0   # minutes/day, per day
+        recent = sum(minutes[bisect_left(days, last - RECENT_DAYS + 1, lo, hi):b]) / RECENT_DAYS
+        out.append({
+            "piece_id": piece_id,
+            "title": title,
+            "minutes": period,
+            "active_days": b - a,
+            # change in minutes per week, per week
+            "trend_minutes_per_week": round(slope * 49, 2),
+            "total_minutes": total,
+            "last_practiced": last_practiced.isoformat(),
+            "recent_daily_average": round(recent, 2),
+            "goal": _projection(total, recent, goal_minutes, last),
+        })
+    out.sort(key=lambda p: (-p["minutes"], -p["total_minutes"], p["piece_id"]))
+    return out
+
+
+def _projection(total: int, rate: float, goal_minutes: int, last: int) -> dict:
+    remaining = max(goal_minutes - total, 0)
+    if remaining == 0:
+        days_left: Optional[int] = 0
+    elif rate > 0:
+        days_left = math.ceil(remaining / rate)
+    else:
+        days_left = None   # not practiced lately: no projection
+    projected = None
+    if days_left is not None and last + days_left <= date.max.toordinal():
+        projected = date.fromordinal(last + days_left).isoformat()
+    return {
+        "minutes": goal_minutes,
+        "remaining_minutes": remaining,
+        "days_to_goal": days_left,
+        "projected_date": projected,
+    }
+
+
+def period_start(today: date, days: int) -> date:
+    """First day insights() reads: the period plus the lead-in of the longest rolling window."""
+    return today - timedelta(days=days - 1 + max(ROLLING_WINDOWS) - 1)
+
+
+def insights(cols: PracticeColumns, pieces: dict[int, tuple[str, int, date]], today: date,
+             days: int, goal_minutes: int) -> dict:
+    """
+    Everything /api/stats/insights returns, for the `days` days ending `today`.
+    `cols` needs the rows from period_start(today, days) on; `pieces` is load_pieces().
+    """
+    last = today.toordinal()
+    first = last - days + 1
+    lead = max(ROLLING_WINDOWS) - 1
+    # the rolling windows at the start of the period reach back before it
+    extended = daily_series(cols, first - lead, last)
+    prefix = array("q", accumulate(extended, initial=0))
+    daily = extended[lead:]
+    period_prefix = array("q", accumulate(daily, initial=0))
+
+    rolling = {}
+    for w in ROLLING_WINDOWS:
+        sums = array("q", window_sums(prefix, w))[-days:]
+        rolling[f"avg_{w}"] = [round(s / w, 2) for s in sums]
+    total = period_prefix[-1]
+
+    return {
+        "start": date.fromordinal(first).isoformat(),
+        "end": today.isoformat(),
+        "days": days,
+        "total_minutes": total,
+        "averages": {
+            "last_7_days": rolling["avg_7"][-1],
+            "last_30_days": rolling["avg_30"][-1],
+            "period": round(total / days, 2),
+        },
+        "rolling": {
+            "dates": [(today - timedelta(days=i)).isoformat() for i in range(days - 1, -1, -1)],
+            **rolling,
+        },
+        "weekday": weekday_distribution(daily, date.fromordinal(first).weekday()),
+        "consistency": consistency(daily, period_prefix),
+        "pieces": piece_insights(cols, pieces, first, last, goal_minutes),
+    }
@@ -1,14 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException
 from starlette.requests import Request
 from fastapi.responses import RedirectResponse, JSONResponse
-from authlib.integrations.starlette_client import OAuth
 from jose import jwt
 from datetime import datetime, timedelta
 import os
+import sqlite3
 from dotenv import load_dotenv
-from .security import get_user_email, get_user_name
+from .security import get_user_email, get_user_name, invalidate_cached_user
 from .models import User, PracticeSession, Piece
-from .db import get_db
+from .db import AnySession, get_db, run_db, stick_to_primary
+from . import oidc
+from sqlalchemy import DateTime, bindparam, text
 from sqlmodel import select, Session as DBSession
 import json
 
@@ -16,7 +18,6 @@ import json
 
 load_dotenv()
 router = APIRouter()
-oauth = OAuth()
 
 # Setup OAuth
 GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
@@ -45,17 +46,35 @@ print("DEBUG BACKEND_ORIGIN =", BACKEND_ORIGIN)
 print("DEBUG FRONTEND_ORIGIN =", FRONTEND_ORIGIN)
 
 
-# Register Google OAuth (OpenID Connect)
-oauth.register(
-    name="google",
-    client_id=GOOGLE_CLIENT_ID,
-    client_secret=GOOGLE_CLIENT_SECRET,
-    server_metadata_url="https://accounts.google.com/.well-known/openid-configuration",
-    client_kwargs={"scope": "openid email profile"},
-)
-
-def create_session_jwt(sub: str, minutes: int = 240) -> str:
+# Google OAuth (OpenID Connect). Only /login and /auth/callback need it, so
+# authlib (and httpx with it) is imported and the client registered on first
+# use instead of at boot. The endpoints come from the cached discovery
+# document in app/oidc.py rather than authlib's own one-shot fetch.
+_oauth = None
+
+async def google_client():
+    global _oauth
+    if _oauth is None:
+        from authlib.integrations.starlette_client import OAuth
+        oauth = OAuth()
+        oauth.register(
+            name="google",
+            client_id=GOOGLE_CLIENT_ID,
+            client_secret=GOOGLE_CLIENT_SECRET,
+            # the token exchange goes through the same transport as discovery
+            # (None = the network; an in-process fake provider otherwise)
+            client_kwargs={"scope": "openid email profile", "transport": oidc.provider.transport},
+        )
+        _oauth = oauth
+    client = _oauth.google
+    # authlib reads authorization_endpoint / token_endpoint from here
+    client.server_metadata.update(await oidc.provider.metadata())
+    return client
+
+def create_session_jwt(sub: str, minutes: int = 240, uid: int | None = None) -> str:
     payload = {"sub": sub, "exp": datetime.utcnow() + timedelta(minutes=minutes)}
+    if uid is not None:
+        payload["uid"] = uid
     return jwt.encode(payload, SECRET_KEY, algorithm="HS256")
 
 @router.get("/login")
@@ -64,34 +83,56 @@ async def login(request: Request):
     redirect_uri = request.url_for("auth_callback")
     print("USING REDIRECT_URI:", redirect_uri)
     
-    return await oauth.google.authorize_redirect(request, redirect_uri)
+    client = await google_client()
+    return await client.authorize_redirect(request, redirect_uri)
 
 @router.get("/auth/callback")
-async def auth_callback(request: Request, db: DBSession = Depends(get_db)):
+async def auth_callback(request: Request, db: AnySession = Depends(get_db)):
     
-    token = await oauth.google.authorize_access_token(request)
+    error = request.query_params.get("error")
+    if error:
+        raise HTTPException(400, f"Google sign-in failed: {error}")
+    client = await google_client()
+    # The state / nonce / redirect_uri saved by authorize_redirect at /login
+    state = request.query_params.get("state")
+    saved = await client.framework.get_state_data(request.session, state)
+    await client.framework.clear_state_data(request.session, state)
+    if not saved:
+        raise HTTPException(400, "Login state is missing or expired; start again at /login")
+    try:
+        token = await client.fetch_access_token(
+            code=request.query_params.get("code"),
+            redirect_uri=saved.get("redirect_uri"),
+            code_verifier=saved.get("code_verifier"),
+        )
+    except Exception as exc:   # authlib OAuthError, httpx errors
+        raise HTTPException(400, "Could not exchange the authorization code") from exc
     next_path = "/"
     if "state" in token:
         try:
             next_path = json.loads(token["state"]).get("next", "/")
         except Exception:
             next_path = "/"
-    userinfo = token.get("userinfo")
-    if not userinfo and "id_token" in token:
-        userinfo = jwt.get_unverified_claims(token["id_token"])
-    if not userinfo:
+    if "id_token" not in token:
+        raise HTTPException(400, "Could not retrieve user info from Google")
+    # Verified locally against the cached JWKS; no userinfo round trip
+    try:
+        userinfo = await oidc.provider.verify_id_token(
+            token["id_token"], audience=GOOGLE_CLIENT_ID,
+            nonce=saved.get("nonce"), access_token=token.get("access_token"),
+        )
+    except oidc.OIDCError as exc:
+        raise HTTPException(401, f"Invalid ID token: {exc}")
+    if not userinfo.get("email"):
         raise HTTPException(400, "Could not retrieve user info from Google")
 
     email = userinfo["email"]
     name = userinfo.get("name")
     picture = userinfo.get("picture")
 
-    user = db.exec(select(User).where(User.email == email)).first()
-    if not user:
-        user = User(email=email, display_name=name, picture_url=picture)
-        db.add(user); db.commit(); db.refresh(user)
+    user_id = await run_db(db, _upsert_user, email, name, picture)
 
-    session_jwt = create_session_jwt(email)
+    session_jwt = create_session_jwt(email, uid=user_id)
     target = frontend_url(next_path)
     resp = RedirectResponse(url=target, status_code=303) 
     resp.set_cookie(
@@ -103,9 +144,54 @@ async def auth_callback(request: Request, db: DBSession = Depends(get_db)):
         max_age=60 * 60 * 4,
         path="/",
     )
-    
+    # the user row may have just been created; don't look it up on a lagging replica
+    stick_to_primary(resp)
     return resp
 
+# One statement for both the first login and every later one. data_version
+# (/api/me's ETag, see app/etag.py) only moves when the Google profile did;
+# it is incremented in SQL so a concurrent write's bump can't be lost. The
+# NULL-safe "changed" test is spelled out (IS DISTINCT FROM needs SQLite
+# 3.39); RETURNING needs SQLite 3.35, older ones take the ORM path below.
+_UPSERT_USER = text("""
+    INSERT INTO users (email, display_name, picture_url, created_at, data_version)
+    VALUES (:email, :name, :picture, :now, 0)
+    ON CONFLICT (email) DO UPDATE SET
+        display_name = excluded.display_name,
+        picture_url = excluded.picture_url,
+        data_version = users.data_version + CASE
+            WHEN users.display_name <> excluded.display_name
+              OR (users.display_name IS NULL) <> (excluded.display_name IS NULL)
+              OR users.picture_url <> excluded.picture_url
+              OR (users.picture_url IS NULL) <> (excluded.picture_url IS NULL)
+            THEN 1 ELSE 0 END
+    RETURNING id
+""").bindparams(bindparam("now", type_=DateTime))
+
+def _upsert_user(db: DBSession, email: str, name: str | None, picture: str | None) -> int:
+    dialect = db.get_bind().dialect
+    if dialect.name == "postgresql" or (dialect.name == "sqlite" and sqlite3.sqlite_version_info >= (3, 35)):
+        user_id = db.exec(_UPSERT_USER, params={
+            "email": email, "name": name, "picture": picture, "now": datetime.utcnow(),
+        }).scalar_one()
+        db.commit()
+        # cached identities must see a changed profile; logins are rare enough
+        # not to bother telling the cases apart
+        invalidate_cached_user(email=email)
+        return user_id
+
+    user = db.exec(select(User).where(User.email == email)).first()
+    if not user:
+        user = User(email=email, display_name=name, picture_url=picture)
+        db.add(user); db.commit(); db.refresh(user)
+    elif (user.display_name, user.picture_url) != (name, picture):
+        # keep the Google profile fresh; cached identities must see the change
+        user.display_name, user.picture_url = name, picture
+        user.data_version = User.data_version + 1
+        db.add(user); db.commit(); db.refresh(user)
+        invalidate_cached_user(email=email)
+    return user.id
+
 # @router.get("/api/me")
 # async def get_user_profile(request: Request, 
 #                            user_email: str = Depends(get_user_email), 
@@ -113,7 +199,8 @@ async def auth_callback(request: Request, db: DBSession = Depends(get_db)):
 #     return User(name=user_name, email=user_email)
 
 @router.get("/logout")
-async def logout():
+async def logout(request: Request):
+    invalidate_cached_user(token=request.cookies.get(COOKIE_NAME))
     resp = RedirectResponse(url=frontend_url("/"))
     resp.delete_cookie(
         key=os.getenv("COOKIE_NAME", "pt_session"),
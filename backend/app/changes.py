@@ -0,0 +1,79 @@
+"""
+Change tracking for /api/sync.
+
+`users.data_version` (app/etag.py) is the per-user change sequence. A write
+bumps it once, before touching any rows, and stamps every piece or session
+it creates or updates with the new value in `change_seq` (and `updated_at`).
+Deletes leave a Tombstone carrying that value instead of the row.
+
+The bump is an UPDATE of the user's row, so concurrent writes for the same
+user serialise on that row lock and commit in sequence order: a reader that
+has seen version V has also seen every change numbered <= V. A client that
+synced at V therefore only needs rows and tombstones with change_seq > V.
+
+Tombstones are kept for SYNC_TOMBSTONE_DAYS; prune older ones with
+
+    python -m app.changes --prune
+
+Sync tokens carry the time they were issued, and /api/sync turns away a
+token older than TOKEN_MAX_AGE (410: resync), so a client can never have
+missed a delete whose tombstone is gone.
+"""
+
+from __future__ import annotations
+import os
+from datetime import datetime, timedelta
+from typing import Iterable, Literal, Optional
+
+from sqlalchemy import Select, delete, insert, literal
+from sqlmodel import Session as DBSession, select
+
+from .models import Tombstone
+
+Entity = Literal["piece", "session"]
+
+SYNC_TOMBSTONE_DAYS = int(os.getenv("SYNC_TOMBSTONE_DAYS", "90"))
+TOMBSTONE_RETENTION = timedelta(days=SYNC_TOMBSTONE_DAYS)
+# A delete's tombstone can be stamped a moment before the version a token
+# was issued at became visible; the slack keeps such a token from
+# outliving that tombstone.
+TOKEN_MAX_AGE = TOMBSTONE_RETENTION - timedelta(hours=1)
+
+
+def record_deletes(db: DBSession, user_id: int, seq: int, entity: Entity, ids: Iterable[int]) -> None:
+    """Leave tombstones for deleted rows; call in the deleting transaction."""
+    rows = [{"user_id": user_id, "entity": entity, "entity_id": i, "change_seq": seq} for i in ids]
+    if rows:
+        db.exec(insert(Tombstone), params=rows)
+
+
+def record_deletes_from(db: DBSession, user_id: int, seq: int, entity: Entity, ids: Select) -> None:
+    """record_deletes for every id a one-column SELECT returns, as one INSERT .. SELECT."""
+    src = ids.subquery()
+    db.exec(insert(Tombstone).from_select(
+        ["user_id", "entity", "entity_id", "change_seq", "deleted_at"],
+        select(literal(user_id), literal(entity), *src.c, literal(seq), literal(datetime.utcnow())),
+    ))
+
+
+def prune_tombstones(db: DBSession, now: Optional[datetime] = None) -> int:
+    """Delete tombstones older than TOMBSTONE_RETENTION; returns how many went."""
+    cutoff = (now or datetime.utcnow()) - TOMBSTONE_RETENTION
+    return db.exec(delete(Tombstone).where(Tombstone.deleted_at < cutoff)).rowcount
+
+
+if __name__ == "__main__":
+    import argparse
+    from .db import engine, init_db
+
+    parser = argparse.ArgumentParser(description="Maintain /api/sync change tracking.")
+    parser.add_argument("--prune", action="store_true",
+                        help=f"delete tombstones older than {SYNC_TOMBSTONE_DAYS} days (SYNC_TOMBSTONE_DAYS)")
+    args = parser.parse_args()
+
+    init_db()
+    if args.prune:
+        with DBSession(engine) as db:
+            n = prune_tombstones(db)
+            db.commit()
+        print(f"pruned {n} tombstones")
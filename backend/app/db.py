@@ -1,21 +1,250 @@
 """
 Read the address from your .env file and establish a robust connection to the database
+
+Two modes, picked with DB_ASYNC:
+  * sync (default): a regular SQLAlchemy engine; route handlers push their DB
+    work onto the threadpool.
+  * async (DB_ASYNC=1): an asyncio engine (asyncpg / aiosqlite) next to the
+    sync one; handlers run their DB work on the event loop via
+    AsyncSession.run_sync, so no threadpool worker is held per request.
+
+Route code is written once, as plain sync functions taking a Session, and is
+dispatched with `await run_db(db, fn, ...)` in both modes. The sync engine is
+always created: migrations, CLIs and streaming responses use it directly.
+
+Pooling is configured with DB_POOL_SIZE / DB_MAX_OVERFLOW / DB_POOL_TIMEOUT /
+DB_POOL_RECYCLE. Pre-ping is off by default: instead of a `SELECT 1` on every
+checkout, connections are recycled before the server's idle timeout, and a
+connection that does die is caught as a disconnect error, which invalidates
+the pool (set DB_POOL_PRE_PING=1 if a proxy drops idle connections early).
+
+Read replica: with DB_READ_URL set, get_read_db sessions (stats, me, list
+endpoints, auth lookups) go to a second engine; get_db and everything that
+writes stays on the primary. Any successful write request sets a short-lived
+cookie (READ_STICKY_SECONDS) that pins that client's reads to the primary, so
+users see their own writes while the replica catches up.
+
+Cold start: with DB_INIT_ON_STARTUP=0 the app doesn't touch the schema at
+boot; run `python -m app.migrations` as a deploy step instead.
+DB_WARMUP_CONNECTIONS opens that many pool connections in the background
+right after startup, so the first requests don't pay for the connect.
 """
 
+import asyncio
 import os
-from sqlmodel import SQLModel, create_engine, Session
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Optional, TypeVar, Union
+
 from dotenv import load_dotenv
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.responses import Response
+
+from .metrics import TimedAsyncQueuePool, TimedQueuePool, instrument_engine
 
 load_dotenv()
 DB_URL = os.getenv("DB_URL", "sqlite:///./piano.db")
-engine = create_engine(DB_URL, echo=False, pool_pre_ping=True)
+DB_ASYNC = os.getenv("DB_ASYNC", "").lower() in ("1", "true", "yes")
+DB_READ_URL = os.getenv("DB_READ_URL") or None
+READ_STICKY_SECONDS = int(os.getenv("READ_STICKY_SECONDS", "10"))   # keep above typical replica lag
+STICKY_COOKIE = "pt_primary"
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))   # seconds; keep below the server's idle timeout
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "").lower() in ("1", "true", "yes")
+DB_INIT_ON_STARTUP = os.getenv("DB_INIT_ON_STARTUP", "1").lower() in ("1", "true", "yes")
+DB_WARMUP_CONNECTIONS = int(os.getenv("DB_WARMUP_CONNECTIONS", "0"))
+
+def _pool_args(url: str, pool_class) -> dict:
+    # In-memory SQLite needs its single-connection pool; everything else gets
+    # a QueuePool that reports checkout wait to /metrics.
+    u = make_url(url)
+    if u.get_backend_name() == "sqlite" and u.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": pool_class,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+def _create(url: str, name: str) -> Engine:
+    eng = create_engine(url, echo=False, **_pool_args(url, TimedQueuePool))
+    eng.pool._metrics_name = name
+    instrument_engine(eng)
+    return eng
+
+engine = _create(DB_URL, "primary")
+read_engine = _create(DB_READ_URL, "replica") if DB_READ_URL else engine
+
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def async_url(url: str) -> str:
+    """Map a sync DB_URL onto its asyncio driver (postgresql -> asyncpg, sqlite -> aiosqlite)."""
+    scheme, sep, rest = url.partition("://")
+    return _ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+def _create_async(url: str, name: str):
+    eng = create_async_engine(async_url(url), echo=False, **_pool_args(url, TimedAsyncQueuePool))
+    eng.sync_engine.pool._metrics_name = name
+    instrument_engine(eng.sync_engine)
+    return eng
+
+async_engine = _create_async(DB_URL, "async") if DB_ASYNC else None
+async_read_engine = (
+    _create_async(DB_READ_URL, "async_replica") if DB_ASYNC and DB_READ_URL else async_engine
+)
+
+AnySession = Union[Session, AsyncSession]
+T = TypeVar("T")
+
+def init_db(eng: Optional[Engine] = None):
+    """Create missing tables, then apply pending migrations (app/migrations.py),
+    on `eng` (default: the primary engine)."""
+    from .models import User, Piece, PracticeSession, UserDailyTotal, PracticeRun, UserStreak, Tombstone
+    from .migrations import migrate
+
+    eng = eng if eng is not None else engine
+    SQLModel.metadata.create_all(eng)
+    return migrate(eng)
+
+def _open_connections(eng: Engine, n: int) -> None:
+    # hold them all at once so the pool really ends up with n connections
+    conns = [eng.connect() for _ in range(n)]
+    for conn in conns:
+        conn.close()
+
+async def _open_async_connections(eng, n: int) -> None:
+    conns = await asyncio.gather(*(eng.connect() for _ in range(n)))
+    await asyncio.gather(*(conn.close() for conn in conns))
+
+async def warm_pool(n: int = DB_WARMUP_CONNECTIONS) -> None:
+    """Pre-open up to `n` connections (capped at DB_POOL_SIZE) on each engine requests will use."""
+    n = min(n, DB_POOL_SIZE)
+    if n <= 0:
+        return
+    if async_engine is not None:
+        for eng in {async_engine, async_read_engine}:
+            await _open_async_connections(eng, n)
+    else:
+        for eng in {engine, read_engine}:
+            await run_in_threadpool(_open_connections, eng, n)
+
+# Sessions are cheap objects: a connection is only checked out when the
+# session first runs a statement, so a request rejected before touching the DB
+# (missing or invalid token, say) never hits the pool.
+@asynccontextmanager
+async def _session(replica: bool = False, **options):
+    if async_engine is not None:
+        async with AsyncSession(async_read_engine if replica else async_engine, **options) as db:
+            yield db
+        return
+
+    db = Session(read_engine if replica else engine, **options)
+    try:
+        yield db
+    finally:
+        # closing only does I/O (rollback + pool return) if a connection was
+        # taken; skip the threadpool hop otherwise
+        if db.in_transaction():
+            await run_in_threadpool(db.close)
+        else:
+            db.close()
+
+@asynccontextmanager
+async def _request_primary(request: Request):
+    # One primary session per request, whichever dependency asks first; the
+    # one that opened it closes it (dependencies exit in reverse order).
+    db = getattr(request.state, "primary_db", None)
+    if db is not None:
+        yield db
+        return
+    async with _session() as db:
+        request.state.primary_db = db
+        yield db
+
+# Opens a transaction-safe session for the lifetime of the request, then
+# closes it.
+async def get_db(request: Request):
+    async with _request_primary(request) as db:
+        yield db
+
+async def get_read_db(request: Request):
+    """Session for read-only handlers: no autoflush before queries and no
+    expiry (and so no reload) of loaded objects. Never commit through it.
+    Uses the replica when one is configured and the client isn't pinned to
+    the primary by a recent write.
+
+    On a write request (POST, DELETE...) it is get_db's session instead, so
+    the auth lookup and the write share one pooled connection."""
+    if request.method not in _SAFE_METHODS:
+        async with _request_primary(request) as db:
+            yield db
+        return
+    async with _session(replica=_use_replica(request), autoflush=False, expire_on_commit=False) as db:
+        yield db
+
+def read_engine_for(request: Request) -> Engine:
+    """Sync engine for reads that open their own Session (streaming responses)."""
+    return read_engine if _use_replica(request) else engine
+
+# ---------- read-your-writes ----------
+
+def _use_replica(request: Request) -> bool:
+    if read_engine is engine:
+        return False
+    pinned_until = request.cookies.get(STICKY_COOKIE, "")
+    return not (pinned_until.isdigit() and int(pinned_until) > time.time())
+
+def stick_to_primary(response: Response) -> None:
+    """Pin this client's reads to the primary for READ_STICKY_SECONDS."""
+    if read_engine is engine:
+        return
+    response.set_cookie(
+        STICKY_COOKIE, str(int(time.time()) + READ_STICKY_SECONDS),
+        max_age=READ_STICKY_SECONDS, httponly=True, secure=True, path="/",
+    )
+
+_SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+class StickyPrimaryMiddleware:
+    """Sets the sticky-primary cookie on every successful non-GET response."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or read_engine is engine or scope["method"] in _SAFE_METHODS:
+            return await self.app(scope, receive, send)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                pinned = Response()
+                stick_to_primary(pinned)
+                headers = MutableHeaders(scope=message)
+                for name, value in pinned.raw_headers:
+                    if name == b"set-cookie":
+                        headers.append("set-cookie", value.decode("latin-1"))
+            await send(message)
 
-def init_db() :
-    from .models import User, Piece, PracticeSession
-    SQLModel.metadata.create_all(engine)
+        await self.app(scope, receive, send_wrapper)
 
-# with Session(engine) opens a transaction-safe connection for the lifetime 
-# of the request, then closes it.
-def get_db():
-    with Session(engine) as db:
-        yield db
\ No newline at end of file
+async def run_db(db: AnySession, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run `fn(session, *args, **kwargs)` without blocking the event loop."""
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
@@ -0,0 +1,64 @@
+"""
+Per-user data versions and conditional GETs.
+
+`users.data_version` is bumped (in the same transaction) by every write that
+can change what a user reads back. Read endpoints declare
+`dependencies=[Depends(conditional_get)]`, which turns that version into a
+weak ETag and answers a matching If-None-Match with 304 before the handler --
+and its aggregate queries -- runs.
+
+The ETag also carries today's date, because the stats endpoints depend on it.
+"""
+
+from __future__ import annotations
+from datetime import date
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy import update
+from sqlmodel import Session as DBSession, select
+
+from .db import AnySession, get_read_db, run_db
+from .models import User
+from .security import get_current_user
+
+
+def bump_data_version(db: DBSession, user_id: int) -> int:
+    """
+    Mark the user's data as changed and return the new version. Writes call it
+    before touching any rows: the version is also the change_seq they stamp
+    (app/changes.py), and the row lock it takes orders the user's writes.
+    """
+    return db.exec(
+        update(User).where(User.id == user_id)
+        .values(data_version=User.data_version + 1)
+        .returning(User.data_version)
+    ).scalar_one()
+
+
+def _data_version(db: DBSession, user_id: int) -> int:
+    return db.exec(select(User.data_version).where(User.id == user_id)).one_or_none() or 0
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    # weak comparison (RFC 9110 13.1.2): ignore the W/ prefix on both sides
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == bare for tag in if_none_match.split(","))
+
+
+async def conditional_get(
+    request: Request,
+    response: Response,
+    user: User = Depends(get_current_user),
+    db: AnySession = Depends(get_read_db),
+) -> None:
+    version = await run_db(db, _data_version, user.id)
+    request.state.data_version = version   # stats_cache keys on it
+    etag = f'W/"{user.id}-{version}-{date.today().isoformat()}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, etag):
+        raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
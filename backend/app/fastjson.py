@@ -0,0 +1,64 @@
+"""
+Direct JSON encoding for the read endpoints that return many rows.
+
+When a route returns dicts or models, FastAPI validates them against
+response_model, runs them through jsonable_encoder and then json.dumps the
+result. That is three passes, and several objects, per row. The list, stats
+and export endpoints skip all of it: they select plain column tuples, turn
+them into dicts with `row_dicts()` and return `json_response(...)`, which
+encodes everything in one call. Pydantic stays on the input side; the
+response_model on those routes only documents the schema in OpenAPI.
+
+Encoding uses orjson when it is installed (it handles date/datetime natively
+and is several times faster); otherwise the stdlib encoder with compact
+separators.
+"""
+
+from __future__ import annotations
+import json
+from datetime import date
+from typing import Any, Iterable, Optional, Sequence
+
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:   # optional dependency
+    orjson = None
+
+
+def _default(value: Any) -> str:
+    if isinstance(value, date):   # datetime included
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode `content` (dicts, lists, str/int/float/bool/None, dates) as UTF-8 JSON."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, separators=(",", ":"), ensure_ascii=False, default=_default).encode()
+
+
+def row_dicts(columns: Sequence[str], result: Iterable[Sequence[Any]]) -> list[dict]:
+    """Column tuples from a select() as dicts keyed by `columns`."""
+    return [dict(zip(columns, r)) for r in result]
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def json_response(content: Any, response: Optional[Response] = None) -> FastJSONResponse:
+    """
+    `content` as a FastJSONResponse. Pass the route's injected `response` to
+    keep headers that dependencies set on it (ETag from conditional_get,
+    X-Next-Cursor): FastAPI drops them when a route returns its own Response.
+    """
+    out = FastJSONResponse(content)
+    if response is not None:
+        out.headers.raw.extend(response.headers.raw)
+    return out
@@ -1,28 +1,24 @@
+import asyncio
+import hmac
 import os
-from fastapi import FastAPI, APIRouter, Request, HTTPException, Depends
-from fastapi.responses import RedirectResponse, HTMLResponse
-from authlib.integrations.starlette_client import OAuth
-from jose import jwt, JWTError
-from datetime import datetime, timedelta
-from dotenv import load_dotenv
-from .auth import router
-from starlette.middleware.sessions import SessionMiddleware
-from .db import init_db
-from .routes import pieces, sessions, me, stats
+from fastapi import FastAPI, Request, HTTPException, Depends
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from .db import init_db
+from starlette.middleware.sessions import SessionMiddleware
+from dotenv import load_dotenv
+from .db import (
+    DB_INIT_ON_STARTUP, DB_WARMUP_CONNECTIONS, init_db, warm_pool,
+    engine, async_engine, read_engine, async_read_engine, StickyPrimaryMiddleware,
+)
+from .metrics import MetricsMiddleware, render as render_metrics
+from .security import user_cache
+from .oidc import provider as oidc_provider
+from .stats_cache import stats_cache
 from .auth import router as auth_router          # /login, /auth/callback, /logout
-from .routes import pieces, sessions, me, stats  # your real /api/* routers
+from .routes import pieces, sessions, me, stats, export, batch, sync, search  # your real /api/* routers
 
 load_dotenv()
 
-
-GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
-# print("Google client id is : ", GOOGLE_CLIENT_ID)
-GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
-SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret")
-
-
 SECRET_KEY = os.getenv("SECRET_KEY")
 if not SECRET_KEY:
     raise RuntimeError("SECRET_KEY is not set")
@@ -44,16 +40,60 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Pin a client's reads to the primary right after it writes (no-op without DB_READ_URL)
+app.add_middleware(StickyPrimaryMiddleware)
+
+# Per-route latency / SQL statement metrics (outermost, so it sees everything)
+app.add_middleware(MetricsMiddleware)
+
 # 2) Include routers (avoid duplicate /api/me definitions)
 app.include_router(auth_router)
 app.include_router(pieces.router,   prefix="/api")
 app.include_router(sessions.router, prefix="/api")
 app.include_router(me.router,       prefix="/api")
 app.include_router(stats.router,    prefix="/api")
+app.include_router(export.router,   prefix="/api")
+app.include_router(batch.router,    prefix="/api")
+app.include_router(sync.router,     prefix="/api")
+app.include_router(search.router,   prefix="/api")
+
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+@app.get("/metrics", include_in_schema=False)
+def metrics(request: Request):
+    """Prometheus scrape endpoint, closed by default: it only exists when
+    METRICS_TOKEN is set, and then requires `Authorization: Bearer <token>`."""
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(request.headers.get("authorization", ""), f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    engines = {"primary": engine}
+    if read_engine is not engine:
+        engines["replica"] = read_engine
+    if async_engine is not None:
+        engines["async"] = async_engine.sync_engine
+    if async_read_engine is not async_engine:
+        engines["async_replica"] = async_read_engine.sync_engine
+    return PlainTextResponse(render_metrics(engines, [user_cache, stats_cache, oidc_provider]), media_type="text/plain; version=0.0.4")
 
 @app.on_event("startup")
-def on_startup():
-    init_db()
+async def on_startup():
+    # Schema creation + migrations cost several introspection queries; with
+    # DB_INIT_ON_STARTUP=0 they are left to `python -m app.migrations` at deploy
+    if DB_INIT_ON_STARTUP:
+        init_db()
+    # connect in the background; the first request doesn't wait for it
+    app.state.warmup = asyncio.create_task(warm_pool(DB_WARMUP_CONNECTIONS))
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    app.state.warmup.cancel()
+    # aiosqlite/asyncpg connections own worker threads / sockets; close them
+    # so the process can exit cleanly
+    if async_engine is not None:
+        await async_engine.dispose()
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
 
 # Optional: tiny root/index for manual testing
 def get_user_name(request: Request):
@@ -0,0 +1,272 @@
+"""
+Request metrics and opt-in profiling, exported in Prometheus text format.
+
+* MetricsMiddleware times every request per (method, route template, status)
+  and, through a per-request context variable, counts the SQL statements and
+  DB time spent on its behalf.
+* instrument_engine() hooks SQLAlchemy cursor events on an engine; TimedPool
+  subclasses record how long a checkout waited for a pooled connection.
+* render() produces the /metrics payload.
+
+Profiling: with PROFILING_ENABLED=1, a request sent with `X-Profile: 1` runs
+under cProfile (or `X-Profile: pyinstrument` if that package is installed)
+and the report replaces the response body. cProfile only sees the event-loop
+thread, so in sync DB mode the threadpool part of a request shows up as a
+single await.
+"""
+
+from __future__ import annotations
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "").lower() in ("1", "true", "yes")
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values."""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...], buckets: tuple[float, ...]):
+        self.name, self.help, self.labels, self.buckets = name, help, labels, buckets
+        self._series: dict[tuple, list] = {}   # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        with self._lock:
+            s = self._series.get(label_values)
+            if s is None:
+                s = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            i = bisect_left(self.buckets, value)
+            if i < len(self.buckets):
+                s[i] += 1
+            s[-2] += value
+            s[-1] += 1
+
+    def render(self) -> list[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+        for label_values, s in sorted(series.items()):
+            base = ",".join(f'{k}="{v}"' for k, v in zip(self.labels, label_values))
+            sep = "," if base else ""
+            running = 0
+            for bound, n in zip(self.buckets, s):
+                running += n
+                out.append(f'{self.name}_bucket{{{base}{sep}le="{bound}"}} {running}')
+            out.append(f'{self.name}_bucket{{{base}{sep}le="+Inf"}} {s[-1]}')
+            out.append(f"{self.name}_sum{{{base}}} {s[-2]}")
+            out.append(f"{self.name}_count{{{base}}} {s[-1]}")
+        return out
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name, self.help, self.value = name, help, 0
+        self._lock = threading.Lock()
+
+    def inc(self, n: float = 1) -> None:
+        with self._lock:
+            self.value += n
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter", f"{self.name} {self.value}"]
+
+
+request_latency = Histogram(
+    "http_request_duration_seconds", "Time to response start, per route.",
+    ("method", "route", "status"), LATENCY_BUCKETS,
+)
+request_statements = Histogram(
+    "db_statements_per_request", "SQL statements executed per request.", ("route",), COUNT_BUCKETS,
+)
+request_db_time = Histogram(
+    "db_time_per_request_seconds", "Time spent in SQL per request.", ("route",), LATENCY_BUCKETS,
+)
+pool_wait = Histogram(
+    "db_pool_checkout_wait_seconds", "Time waiting for a pooled connection.", ("engine",), LATENCY_BUCKETS,
+)
+statements_total = Counter("db_statements_total", "SQL statements executed.")
+checkouts_total = Counter("db_pool_checkouts_total", "Connections checked out of the pool.")
+
+
+# ---------- per-request SQL accounting ----------
+
+class RequestStats:
+    __slots__ = ("statements", "db_seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Count statements, DB time and pool checkouts; pass `async_engine.sync_engine` for async engines."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        statements_total.inc()
+        stats = _current.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.db_seconds += elapsed
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        checkouts_total.inc()
+
+
+class _TimedPoolMixin:
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_wait.observe(time.perf_counter() - start, getattr(self, "_metrics_name", "primary"))
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+# ---------- middleware ----------
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware (no BaseHTTPMiddleware task/body buffering overhead)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope.get("headers") or [])
+        profile = PROFILING_ENABLED and headers.get(b"x-profile")
+        if profile:
+            return await self._profiled(scope, receive, send, profile.decode())
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        started = False
+
+        def record(status: int) -> None:
+            route = _route_label(scope)
+            request_latency.observe(time.perf_counter() - start, scope["method"], route, str(status))
+            request_statements.observe(stats.statements, route)
+            request_db_time.observe(stats.db_seconds, route)
+
+        async def send_wrapper(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+                record(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            if not started:
+                record(500)
+
+    async def _profiled(self, scope, receive, send, mode: str):
+        """Run the request under a profiler and answer with the report instead."""
+        async def swallow(message):
+            pass
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            if mode == "pyinstrument":
+                from pyinstrument import Profiler   # optional dependency
+                profiler = Profiler(async_mode="enabled")
+                profiler.start()
+                try:
+                    await self.app(scope, receive, swallow)
+                finally:
+                    profiler.stop()
+                report = profiler.output_text(unicode=True)
+            else:
+                profiler = cProfile.Profile()
+                profiler.enable()
+                try:
+                    await self.app(scope, receive, swallow)
+                finally:
+                    profiler.disable()
+                buf = io.StringIO()
+                pstats.Stats(profiler, stream=buf).sort_stats("cumulative").print_stats(40)
+                report = buf.getvalue()
+        finally:
+            _current.reset(token)
+
+        header = (
+            f"{scope['method']} {scope['path']}  total={time.perf_counter() - start:.4f}s  "
+            f"sql_statements={stats.statements}  sql_time={stats.db_seconds:.4f}s\n\n"
+        )
+        body = (header + report).encode()
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"text/plain; charset=utf-8"),
+                                (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
+
+
+# ---------- exposition ----------
+
+def _gauge(name: str, help: str, samples: dict[str, float]) -> list[str]:
+    out = [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+    out += [f"{name}{labels} {value}" for labels, value in samples.items()]
+    return out
+
+def render(engines: dict[str, Engine], caches: list) -> str:
+    lines: list[str] = []
+    for metric in (request_latency, request_statements, request_db_time, pool_wait, statements_total,
+                   checkouts_total):
+        lines += metric.render()
+
+    pool_samples = {}
+    for name, eng in engines.items():
+        pool = eng.pool
+        if hasattr(pool, "checkedout"):
+            pool_samples[f'{{engine="{name}",state="checked_out"}}'] = pool.checkedout()
+            pool_samples[f'{{engine="{name}",state="idle"}}'] = pool.checkedin()
+    lines += _gauge("db_pool_connections", "Pooled connections by state.", pool_samples)
+
+    cache_samples = {}
+    for cache in caches:
+        st = cache.stats()
+        for key in ("hits", "misses", "size", "hit_rate"):
+            cache_samples[f'{{cache="{st["name"]}",kind="{key}"}}'] = st[key]
+    lines += _gauge("cache_stats", "Cache hit/miss totals, hit rate and current size.", cache_samples)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,153 @@
+"""
+Tiny versioned migration runner.
+
+`SQLModel.metadata.create_all` only creates missing tables, so anything that
+has to reach an existing database (new indexes, columns, backfills) is added
+here as a numbered step. Applied versions are recorded in `schema_migrations`
+and every step runs in its own transaction. Steps must be idempotent on a
+fresh database, where create_all has already built the current schema.
+
+    python -m app.migrations           # apply pending steps
+    python -m app.migrations --status  # list applied / pending steps
+"""
+
+from __future__ import annotations
+from datetime import datetime
+from typing import Callable, NamedTuple
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlmodel import Session as DBSession
+
+from .search import create_search_index, fold_accents_pg
+
+_meta = MetaData()
+schema_migrations = Table(
+    "schema_migrations", _meta,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    apply: Callable[[Connection], None]
+
+
+def _create_indexes(*indexes: tuple[str, str, tuple[str, ...]]) -> Callable[[Connection], None]:
+    """
+    Step that creates the given (name, table, columns) indexes if missing.
+
+    The definitions are copied here rather than read off the models: a step
+    must build exactly the schema of its own version, and an index the
+    models declare today may cover a column a later step adds.
+    """
+    def step(conn: Connection) -> None:
+        for name, table, columns in indexes:
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"))
+    return step
+
+
+def _add_column(table: str, column: str, ddl: str) -> Callable[[Connection], None]:
+    """Step that runs ALTER TABLE .. ADD COLUMN unless the column already exists."""
+    def step(conn: Connection) -> None:
+        if column not in {c["name"] for c in inspect(conn).get_columns(table)}:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    return step
+
+
+def _steps(*steps: Callable[[Connection], None]) -> Callable[[Connection], None]:
+    """Run several steps as one migration."""
+    def step(conn: Connection) -> None:
+        for s in steps:
+            s(conn)
+    return step
+
+
+def _backfill_updated_at(conn: Connection) -> None:
+    for table in ("pieces", "practice_sessions"):
+        conn.execute(text(f"UPDATE {table} SET updated_at = created_at WHERE updated_at IS NULL"))
+
+
+def _backfill_aggregates(conn: Connection) -> None:
+    from .rollups import rebuild_daily_totals
+    from .streaks import rebuild_streaks
+
+    with DBSession(bind=conn) as db:
+        rebuild_daily_totals(db)
+        rebuild_streaks(db)
+        db.flush()
+
+
+MIGRATIONS: list[Migration] = [
+    Migration(1, "backfill daily rollup and streaks", _backfill_aggregates),
+    Migration(2, "hot-path indexes on practice_sessions and pieces", _create_indexes(
+        ("ix_pieces_owner_created", "pieces", ("owner_id", "created_at")),
+        ("ix_practice_sessions_user_date_minutes", "practice_sessions", ("user_id", "practice_date", "minutes")),
+        ("ix_practice_sessions_user_piece_date", "practice_sessions", ("user_id", "piece_id", "practice_date")),
+        ("ix_practice_sessions_piece", "practice_sessions", ("piece_id",)),
+    )),
+    Migration(3, "keyset index for session listing", _create_indexes(
+        ("ix_practice_sessions_user_date_id", "practice_sessions", ("user_id", "practice_date", "id")),
+    )),
+    Migration(4, "users.data_version for ETags",
+              _add_column("users", "data_version", "INTEGER NOT NULL DEFAULT 0")),
+    Migration(5, "change tracking for /api/sync", _steps(
+        _add_column("pieces", "updated_at", "TIMESTAMP"),
+        _add_column("pieces", "change_seq", "INTEGER NOT NULL DEFAULT 0"),
+        _add_column("practice_sessions", "updated_at", "TIMESTAMP"),
+        _add_column("practice_sessions", "change_seq", "INTEGER NOT NULL DEFAULT 0"),
+        _backfill_updated_at,
+        _create_indexes(
+            ("ix_pieces_owner_seq", "pieces", ("owner_id", "change_seq")),
+            ("ix_practice_sessions_user_seq", "practice_sessions", ("user_id", "change_seq")),
+        ),
+    )),
+    Migration(6, "full-text search index (FTS5 / GIN tsvector)", create_search_index),
+    Migration(7, "accent-insensitive Postgres search index (unaccent)", fold_accents_pg),
+]
+
+
+def applied_versions(conn: Connection) -> set[int]:
+    return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def migrate(engine: Engine) -> list[Migration]:
+    """Apply pending migrations in order; returns the ones that ran."""
+    _meta.create_all(engine)
+    with engine.connect() as conn:
+        done = applied_versions(conn)
+
+    ran = []
+    for m in sorted(MIGRATIONS, key=lambda m: m.version):
+        if m.version in done:
+            continue
+        with engine.begin() as conn:
+            m.apply(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=m.version, name=m.name, applied_at=datetime.utcnow(),
+            ))
+        ran.append(m)
+    return ran
+
+
+if __name__ == "__main__":
+    import argparse
+    from .db import engine, init_db
+
+    parser = argparse.ArgumentParser(description="Apply database migrations.")
+    parser.add_argument("--status", action="store_true", help="only show migration status")
+    args = parser.parse_args()
+
+    if args.status:
+        _meta.create_all(engine)
+        with engine.connect() as conn:
+            done = applied_versions(conn)
+        for m in MIGRATIONS:
+            print(f"{m.version:>4}  {'applied' if m.version in done else 'pending':8} {m.name}")
+    else:
+        for m in init_db():
+            print(f"applied {m.version}: {m.name}")
+        print("database is up to date")
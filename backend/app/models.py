@@ -1,6 +1,7 @@
 from __future__ import annotations
 from datetime import datetime, date
 from typing import Optional
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field
 
 class User(SQLModel, table=True):
@@ -10,9 +11,18 @@ class User(SQLModel, table=True):
     display_name: Optional[str] = None
     picture_url: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    # bumped on every write to the user's data; feeds the ETags (app/etag.py)
+    # and doubles as the user's change sequence for /api/sync (app/changes.py)
+    data_version: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
 
 class Piece(SQLModel, table=True):
     __tablename__ = "pieces"
+    __table_args__ = (
+        # list_pieces: WHERE owner_id = ? ORDER BY created_at DESC
+        Index("ix_pieces_owner_created", "owner_id", "created_at"),
+        # /api/sync: WHERE owner_id = ? AND change_seq > ?
+        Index("ix_pieces_owner_seq", "owner_id", "change_seq"),
+    )
     id: int | None = Field(default=None, primary_key=True)
     owner_id: int = Field(foreign_key="users.id")   # FK to users
     title: str
@@ -20,9 +30,23 @@ class Piece(SQLModel, table=True):
     difficulty: Optional[str] = None
     notes: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    change_seq: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
 
 class PracticeSession(SQLModel, table=True):
     __tablename__ = "practice_sessions"
+    __table_args__ = (
+        # per-user date-range scans; covers SUM(minutes) without touching the table
+        Index("ix_practice_sessions_user_date_minutes", "user_id", "practice_date", "minutes"),
+        # list_sessions keyset order: (practice_date DESC, id DESC)
+        Index("ix_practice_sessions_user_date_id", "user_id", "practice_date", "id"),
+        # per-piece filters and the top-piece join in stats
+        Index("ix_practice_sessions_user_piece_date", "user_id", "piece_id", "practice_date"),
+        # FK side of pieces -> practice_sessions (piece deletes)
+        Index("ix_practice_sessions_piece", "piece_id"),
+        # /api/sync: WHERE user_id = ? AND change_seq > ?
+        Index("ix_practice_sessions_user_seq", "user_id", "change_seq"),
+    )
     id: int | None = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="users.id")
     piece_id: int = Field(foreign_key="pieces.id")
@@ -30,4 +54,51 @@ class PracticeSession(SQLModel, table=True):
     minutes: int
     focus: Optional[str] = None
     notes: Optional[str] = None
-    created_at: datetime = Field(default_factory=datetime.utcnow)
\ No newline at end of file
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    change_seq: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+
+class UserDailyTotal(SQLModel, table=True):
+    """Per-user, per-day rollup of practice_sessions (see app/rollups.py)."""
+    __tablename__ = "user_daily_totals"
+    user_id: int = Field(foreign_key="users.id", primary_key=True)
+    practice_date: date = Field(primary_key=True)
+    minutes: int = 0
+    session_count: int = 0
+
+
+class PracticeRun(SQLModel, table=True):
+    """A maximal run of consecutive practice days for one user (see app/streaks.py)."""
+    __tablename__ = "practice_runs"
+    __table_args__ = (
+        Index("ix_practice_runs_user_start", "user_id", "start_date"),
+        Index("ix_practice_runs_user_end", "user_id", "end_date"),
+    )
+    id: int | None = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="users.id")
+    start_date: date
+    end_date: date
+    length_days: int = 1
+
+
+class UserStreak(SQLModel, table=True):
+    """Per-user streak summary: the latest run and the longest run length."""
+    __tablename__ = "user_streaks"
+    user_id: int = Field(foreign_key="users.id", primary_key=True)
+    current_start: Optional[date] = None
+    current_end: Optional[date] = None   # == last practice date
+    longest_days: int = 0
+
+
+class Tombstone(SQLModel, table=True):
+    """A deleted piece or session, kept so /api/sync can tell clients about it."""
+    __tablename__ = "tombstones"
+    __table_args__ = (
+        Index("ix_tombstones_user_seq", "user_id", "change_seq"),
+    )
+    id: int | None = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="users.id")
+    entity: str                      # "piece" | "session"
+    entity_id: int
+    change_seq: int
+    deleted_at: datetime = Field(default_factory=datetime.utcnow)
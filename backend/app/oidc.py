@@ -0,0 +1,231 @@
+"""
+OpenID Connect discovery and ID-token verification, cached per process.
+
+The provider's discovery document and its JWKS are fetched once and kept for
+their TTL (the response's Cache-Control max-age, capped by OIDC_METADATA_TTL /
+OIDC_JWKS_TTL). Once an entry is past OIDC_REFRESH_AHEAD of its TTL it is
+still served, and a background task fetches a fresh copy, so a login never
+waits on discovery after the first one in a process. If a refresh fails the
+old copy is served until a later refresh succeeds.
+
+ID tokens are verified locally against the cached keys (signature, iss, aud,
+exp/iat, nonce, at_hash). A token signed with a key id we don't know forces
+one JWKS refetch, because the provider may have rotated its keys. There is at
+most one such refetch per OIDC_JWKS_MIN_REFETCH seconds, so forged key ids
+can't turn into a request per login.
+
+OIDC_ISSUER points the app at another provider, e.g. a local fake one for
+development. `transport` accepts any httpx transport, including
+httpx.ASGITransport(app=...), so the provider can also run in-process.
+"""
+
+from __future__ import annotations
+import asyncio
+import os
+import re
+import time
+from typing import Any, Optional
+
+from jose import jwt, JWTError
+
+OIDC_ISSUER = os.getenv("OIDC_ISSUER", "https://accounts.google.com")
+OIDC_METADATA_TTL = float(os.getenv("OIDC_METADATA_TTL", "86400"))
+OIDC_JWKS_TTL = float(os.getenv("OIDC_JWKS_TTL", "3600"))
+OIDC_REFRESH_AHEAD = float(os.getenv("OIDC_REFRESH_AHEAD", "0.8"))
+OIDC_JWKS_MIN_REFETCH = float(os.getenv("OIDC_JWKS_MIN_REFETCH", "60"))
+OIDC_HTTP_TIMEOUT = float(os.getenv("OIDC_HTTP_TIMEOUT", "5"))
+
+# clock skew tolerated on exp / iat / nbf
+LEEWAY_SECONDS = 120
+
+# ID-token signatures we accept, whatever the provider advertises: asymmetric
+# only, so neither "none" nor an HS256 token keyed with the public key passes
+ALLOWED_ALGORITHMS = ("RS256",)
+
+# Google issues ID tokens with either form of its issuer
+_ISSUER_ALIASES = {"https://accounts.google.com": ["accounts.google.com"]}
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+class OIDCError(Exception):
+    """The provider couldn't be reached, or an ID token failed verification."""
+
+
+class _Entry:
+    __slots__ = ("value", "fetched_at", "ttl")
+
+    def __init__(self, value: dict, ttl: float):
+        self.value = value
+        self.fetched_at = time.monotonic()
+        self.ttl = ttl
+
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+
+class OIDCProvider:
+    def __init__(
+        self,
+        issuer: str,
+        metadata_ttl: float = OIDC_METADATA_TTL,
+        jwks_ttl: float = OIDC_JWKS_TTL,
+        refresh_ahead: float = OIDC_REFRESH_AHEAD,
+        min_refetch: float = OIDC_JWKS_MIN_REFETCH,
+        transport: Any = None,
+        name: str = "oidc",
+    ):
+        self.issuer = issuer.rstrip("/")
+        self.metadata_url = self.issuer + "/.well-known/openid-configuration"
+        self.ttls = {"metadata": metadata_ttl, "jwks": jwks_ttl}
+        self.refresh_ahead = refresh_ahead
+        self.min_refetch = min_refetch
+        self.transport = transport
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.fetches = 0
+        self._entries: dict[str, _Entry] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._refreshing: dict[str, asyncio.Task] = {}
+        self._forced_at = float("-inf")
+
+    # -- cached documents ---------------------------------------------------
+
+    async def metadata(self) -> dict:
+        """The discovery document (authorization/token endpoints, jwks_uri, issuer...)."""
+        return await self._cached("metadata")
+
+    async def jwks(self, force: bool = False) -> dict:
+        """The provider's signing keys as a JWK set."""
+        if force:
+            entry = self._entries.get("jwks")
+            if entry is not None and time.monotonic() - self._forced_at < self.min_refetch:
+                return entry.value
+            self._forced_at = time.monotonic()
+            return await self._refresh("jwks", min_age=0)
+        return await self._cached("jwks")
+
+    async def _cached(self, kind: str) -> dict:
+        entry = self._entries.get(kind)
+        if entry is None or entry.age() >= entry.ttl:
+            self.misses += 1
+            return await self._refresh(kind)
+        self.hits += 1
+        if entry.age() >= entry.ttl * self.refresh_ahead and kind not in self._refreshing:
+            task = asyncio.get_running_loop().create_task(
+                self._background_refresh(kind, entry.ttl * self.refresh_ahead))
+            self._refreshing[kind] = task
+        return entry.value
+
+    async def _background_refresh(self, kind: str, min_age: float) -> None:
+        try:
+            await self._refresh(kind, min_age)
+        except OIDCError:
+            pass   # keep serving the old copy; the next hit retries
+        finally:
+            self._refreshing.pop(kind, None)
+
+    async def _refresh(self, kind: str, min_age: Optional[float] = None) -> dict:
+        """Fetch `kind` unless the cached copy is younger than `min_age` (default: its TTL)."""
+        # one fetch per document at a time; concurrent callers wait for it and
+        # then find the fresh copy
+        lock = self._locks.setdefault(kind, asyncio.Lock())
+        async with lock:
+            entry = self._entries.get(kind)
+            if entry is not None and entry.age() < (entry.ttl if min_age is None else min_age):
+                return entry.value
+            try:
+                if kind == "metadata":
+                    url = self.metadata_url
+                else:
+                    url = (await self.metadata())["jwks_uri"]
+                value, max_age = await self._fetch(url)
+            except (OIDCError, KeyError) as exc:
+                if entry is not None:
+                    return entry.value   # stale beats failing the login
+                raise OIDCError(f"could not load OIDC {kind} for {self.issuer}") from exc
+            ttl = self.ttls[kind] if max_age is None else min(max_age, self.ttls[kind])
+            self._entries[kind] = _Entry(value, ttl)
+            return value
+
+    async def _fetch(self, url: str) -> tuple[dict, Optional[float]]:
+        import httpx   # only the login path needs it (see app/auth.py)
+        self.fetches += 1
+        try:
+            async with httpx.AsyncClient(transport=self.transport, timeout=OIDC_HTTP_TIMEOUT) as client:
+                resp = await client.get(url)
+                resp.raise_for_status()
+                value = resp.json()
+        except (httpx.HTTPError, ValueError) as exc:
+            raise OIDCError(f"GET {url} failed: {exc}") from exc
+        m = _MAX_AGE.search(resp.headers.get("cache-control", ""))
+        return value, (float(m.group(1)) if m else None)
+
+    # -- ID tokens ----------------------------------------------------------
+
+    async def verify_id_token(
+        self,
+        id_token: str,
+        audience: str,
+        nonce: Optional[str] = None,
+        access_token: Optional[str] = None,
+    ) -> dict:
+        """
+        Verify `id_token` against the cached keys and return its claims.
+
+        Checks the signature (ALLOWED_ALGORITHMS that the provider also
+        advertises), issuer, audience, expiry and, when given, the nonce saved
+        at /login and the access token's at_hash. Raises OIDCError.
+        """
+        try:
+            header = jwt.get_unverified_header(id_token)
+        except JWTError as exc:
+            raise OIDCError(f"malformed ID token: {exc}") from exc
+        meta = await self.metadata()
+        advertised = meta.get("id_token_signing_alg_values_supported") or ["RS256"]
+        algorithms = [alg for alg in ALLOWED_ALGORITHMS if alg in advertised]
+        if header.get("alg") not in algorithms:
+            raise OIDCError(f"ID token algorithm {header.get('alg')!r} is not allowed")
+        key = _find_key(await self.jwks(), header.get("kid"))
+        if key is None:
+            key = _find_key(await self.jwks(force=True), header.get("kid"))
+        if key is None:
+            raise OIDCError("ID token signed with an unknown key")
+
+        issuer = meta.get("issuer", self.issuer)
+        try:
+            claims = jwt.decode(
+                id_token,
+                key,
+                algorithms=algorithms,
+                audience=audience,
+                issuer=[issuer, *_ISSUER_ALIASES.get(issuer, [])],
+                access_token=access_token,
+                options={"leeway": LEEWAY_SECONDS},
+            )
+        except JWTError as exc:
+            raise OIDCError(f"invalid ID token: {exc}") from exc
+        if nonce is not None and claims.get("nonce") != nonce:
+            raise OIDCError("ID token nonce does not match the login request")
+        return claims
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "name": self.name,
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
+
+
+def _find_key(jwk_set: dict, kid: Optional[str]) -> Optional[dict]:
+    keys = jwk_set.get("keys", [])
+    if kid is None and len(keys) == 1:
+        return keys[0]
+    return next((k for k in keys if k.get("kid") == kid), None)
+
+
+provider = OIDCProvider(OIDC_ISSUER)
@@ -0,0 +1,252 @@
+"""
+Per-user daily rollup of practice sessions.
+
+`user_daily_totals` keeps one row per (user, practice_date) with the summed
+minutes and the number of sessions, so the stats and /api/me endpoints cost
+O(days in window) instead of O(sessions). Days appearing or disappearing are
+forwarded to app/streaks.py. Every code path that inserts or deletes
+practice_sessions rows must call record_session / discard_session (or their
+bulk / set-based variants) in the same transaction, before it commits.
+
+Rebuild the rollup and the streak tables from scratch (e.g. after a manual
+data fix):
+
+    python -m app.rollups            # every user
+    python -m app.rollups --user 42  # one user
+"""
+
+from __future__ import annotations
+from collections import defaultdict
+from datetime import date
+from typing import Iterable, Optional
+
+from sqlalchemy import Date, and_, bindparam, delete, insert, text, update
+from sqlmodel import Session as DBSession, select, func
+
+from . import streaks
+from .models import PracticeSession, UserDailyTotal
+
+# Above this many new practice days in one write, rebuilding the user's
+# streaks is cheaper than merging runs one day at a time.
+STREAK_REBUILD_THRESHOLD = 32
+
+
+# INSERT .. ON CONFLICT .. RETURNING reads the same on Postgres and SQLite.
+# Kept as text(): SQLAlchemy cannot cache-key on_conflict_do_update(), so the
+# construct would be recompiled for every row, which dominates bulk writes.
+_UPSERT_SQL = """
+    INSERT INTO user_daily_totals (user_id, practice_date, minutes, session_count)
+    VALUES (:user_id, :practice_date, :minutes, :session_count)
+    ON CONFLICT (user_id, practice_date) DO UPDATE SET
+        minutes = user_daily_totals.minutes + excluded.minutes,
+        session_count = user_daily_totals.session_count + excluded.session_count
+"""
+_UPSERT = text(_UPSERT_SQL).bindparams(bindparam("practice_date", type_=Date))
+_UPSERT_RETURNING = text(_UPSERT_SQL + " RETURNING session_count").bindparams(
+    bindparam("practice_date", type_=Date)
+)
+
+
+def _has_upsert(db: DBSession) -> bool:
+    return db.get_bind().dialect.name in ("postgresql", "sqlite")
+
+
+def apply_delta(db: DBSession, user_id: int, practice_date: date, minutes: int, sessions: int) -> int:
+    """
+    Add (or subtract, for negative values) minutes/sessions to one rollup day.
+
+    Returns +1 if the day went from no sessions to some, -1 if it lost its
+    last session, 0 otherwise -- callers use this to maintain streaks.
+    """
+    if sessions > 0:
+        if _has_upsert(db):
+            count = db.exec(_UPSERT_RETURNING, params={
+                "user_id": user_id, "practice_date": practice_date,
+                "minutes": minutes, "session_count": sessions,
+            }).scalar_one()
+            return 1 if count == sessions else 0
+
+        row = db.get(UserDailyTotal, (user_id, practice_date))
+        if row is None:
+            db.add(UserDailyTotal(user_id=user_id, practice_date=practice_date,
+                                  minutes=minutes, session_count=sessions))
+            db.flush()
+            return 1
+        row.minutes += minutes
+        row.session_count += sessions
+        db.flush()
+        return 0
+
+    day = (UserDailyTotal.user_id == user_id) & (UserDailyTotal.practice_date == practice_date)
+    db.exec(
+        update(UserDailyTotal).where(day).values(
+            minutes=UserDailyTotal.minutes + minutes,
+            session_count=UserDailyTotal.session_count + sessions,
+        )
+    )
+    emptied = db.exec(delete(UserDailyTotal).where(day, UserDailyTotal.session_count <= 0))
+    return -1 if emptied.rowcount else 0
+
+
+def record_session(db: DBSession, row: PracticeSession) -> None:
+    """Account for a newly inserted practice session."""
+    if apply_delta(db, row.user_id, row.practice_date, row.minutes, 1) > 0:
+        streaks.add_day(db, row.user_id, row.practice_date)
+
+
+def record_sessions(db: DBSession, user_id: int, rows: Iterable[tuple[date, int]]) -> None:
+    """
+    Bulk variant of record_session for one user's (practice_date, minutes) pairs.
+
+    Upserts every distinct day in one batch. When many new days appear at once
+    (e.g. an import of old logs) the user's streaks are rebuilt in one pass
+    instead of merging runs day by day.
+    """
+    per_day: dict[date, list[int]] = defaultdict(lambda: [0, 0])
+    for practice_date, minutes in rows:
+        acc = per_day[practice_date]
+        acc[0] += minutes
+        acc[1] += 1
+
+    if not per_day:
+        return
+    if _has_upsert(db):
+        # Which days are new decides the streak update; one range query
+        # answers that, then every day is upserted in a single executemany.
+        existing = set(db.exec(
+            select(UserDailyTotal.practice_date).where(
+                UserDailyTotal.user_id == user_id,
+                UserDailyTotal.practice_date >= min(per_day),
+                UserDailyTotal.practice_date <= max(per_day),
+            )
+        ).all())
+        db.exec(_UPSERT, params=[
+            {"user_id": user_id, "practice_date": d, "minutes": m, "session_count": n}
+            for d, (m, n) in per_day.items()
+        ])
+        new_days = sorted(d for d in per_day if d not in existing)
+    else:
+        new_days = [d for d, (m, n) in sorted(per_day.items()) if apply_delta(db, user_id, d, m, n) > 0]
+
+    if len(new_days) > STREAK_REBUILD_THRESHOLD:
+        streaks.rebuild_streaks(db, user_id)
+    else:
+        for d in new_days:
+            streaks.add_day(db, user_id, d)
+
+
+def discard_session(db: DBSession, row: PracticeSession) -> None:
+    """Account for a practice session that is being deleted."""
+    if apply_delta(db, row.user_id, row.practice_date, -row.minutes, -1) < 0:
+        streaks.remove_day(db, row.user_id, row.practice_date)
+
+
+def discard_sessions(db: DBSession, user_id: int, rows: Iterable[tuple[date, int]]) -> None:
+    """
+    Bulk variant of discard_session for one user's deleted (practice_date,
+    minutes) pairs: one executemany decrement, then the days left without
+    sessions are removed and their streak runs split (or rebuilt).
+    """
+    per_day: dict[date, list[int]] = defaultdict(lambda: [0, 0])
+    for practice_date, minutes in rows:
+        acc = per_day[practice_date]
+        acc[0] += minutes
+        acc[1] += 1
+
+    if not per_day:
+        return
+    t = UserDailyTotal.__table__
+    db.exec(
+        update(t)
+        .where(t.c.user_id == bindparam("uid"), t.c.practice_date == bindparam("day"))
+        .values(minutes=t.c.minutes - bindparam("m"), session_count=t.c.session_count - bindparam("n")),
+        params=[{"uid": user_id, "day": d, "m": m, "n": n} for d, (m, n) in per_day.items()],
+    )
+    emptied_q = (
+        (UserDailyTotal.user_id == user_id)
+        & (UserDailyTotal.practice_date >= min(per_day))
+        & (UserDailyTotal.practice_date <= max(per_day))
+        & (UserDailyTotal.session_count <= 0)
+    )
+    emptied = sorted(db.exec(select(UserDailyTotal.practice_date).where(emptied_q)).all())
+    if emptied:
+        db.exec(delete(UserDailyTotal).where(emptied_q))
+        _remove_days(db, user_id, emptied)
+
+
+def discard_matching(db: DBSession, user_id: int, *criteria) -> None:
+    """
+    Set-based variant of discard_sessions: account for deleting every session
+    of `user_id` matching `criteria` (conditions on PracticeSession), in a
+    fixed number of statements however many sessions match. Call it before
+    the sessions are deleted -- it reads them.
+    """
+    matching = and_(PracticeSession.user_id == user_id, *criteria)
+    t = UserDailyTotal.__table__
+    same_day = and_(matching, PracticeSession.practice_date == t.c.practice_date)
+    db.exec(
+        update(t)
+        .where(t.c.user_id == user_id,
+               t.c.practice_date.in_(select(PracticeSession.practice_date).where(matching)))
+        .values(
+            minutes=t.c.minutes - select(func.coalesce(func.sum(PracticeSession.minutes), 0))
+                                  .where(same_day).scalar_subquery(),
+            session_count=t.c.session_count - select(func.count(PracticeSession.id))
+                                              .where(same_day).scalar_subquery(),
+        )
+    )
+    # only the days just decremented can be at zero
+    emptied = sorted(db.exec(
+        delete(UserDailyTotal)
+        .where(UserDailyTotal.user_id == user_id, UserDailyTotal.session_count <= 0)
+        .returning(UserDailyTotal.practice_date)
+    ).scalars().all())
+    _remove_days(db, user_id, emptied)
+
+
+def _remove_days(db: DBSession, user_id: int, emptied: list[date]) -> None:
+    if len(emptied) > STREAK_REBUILD_THRESHOLD:
+        streaks.rebuild_streaks(db, user_id)
+    else:
+        for d in emptied:
+            streaks.remove_day(db, user_id, d)
+
+
+def rebuild_daily_totals(db: DBSession, user_id: Optional[int] = None) -> None:
+    """Recompute the rollup from practice_sessions (all users, or just one)."""
+    clear = delete(UserDailyTotal)
+    source = (
+        select(
+            PracticeSession.user_id,
+            PracticeSession.practice_date,
+            func.sum(PracticeSession.minutes),
+            func.count(),
+        )
+        .group_by(PracticeSession.user_id, PracticeSession.practice_date)
+    )
+    if user_id is not None:
+        clear = clear.where(UserDailyTotal.user_id == user_id)
+        source = source.where(PracticeSession.user_id == user_id)
+
+    db.exec(clear)
+    db.exec(
+        insert(UserDailyTotal).from_select(
+            ["user_id", "practice_date", "minutes", "session_count"], source
+        )
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+    from .db import engine, init_db
+
+    parser = argparse.ArgumentParser(description="Rebuild the daily rollup and streak tables.")
+    parser.add_argument("--user", type=int, default=None, help="only rebuild this user id")
+    args = parser.parse_args()
+
+    init_db()
+    with DBSession(engine) as db:
+        rebuild_daily_totals(db, args.user)
+        streaks.rebuild_streaks(db, args.user)
+        db.commit()
+    print("user_daily_totals and streaks rebuilt")
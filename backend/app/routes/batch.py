@@ -0,0 +1,201 @@
+# app/routes/batch.py
+from __future__ import annotations
+from typing import Annotated, Literal, Optional, Union
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
+from sqlalchemy import delete, insert, or_
+from sqlmodel import Session as DBSession, select, col
+
+from app.changes import record_deletes
+from app.db import AnySession, get_db, run_db
+from app.etag import bump_data_version
+from app.models import Piece, PracticeSession, User
+from app.rollups import discard_sessions, record_sessions
+from app.routes.pieces import PieceIn
+from app.routes.sessions import SessionIn
+from app.security import get_current_user
+from app.stats_cache import stats_cache
+
+router = APIRouter(prefix="/batch", tags=["batch"])
+
+MAX_BATCH_OPS = 1000
+
+# An int is a server id; a string is the temp_id of an object created earlier
+# in the same batch.
+Ref = Union[int, str]
+
+# ---------- Schemas ----------
+class BatchSessionIn(SessionIn):
+    piece_id: Ref
+
+class CreatePieceOp(BaseModel):
+    op: Literal["create_piece"]
+    temp_id: Optional[str] = None
+    data: PieceIn
+
+class CreateSessionOp(BaseModel):
+    op: Literal["create_session"]
+    temp_id: Optional[str] = None
+    data: BatchSessionIn
+
+class DeleteOp(BaseModel):
+    op: Literal["delete_piece", "delete_session"]
+    id: Ref
+
+BatchOp = Annotated[Union[CreatePieceOp, CreateSessionOp, DeleteOp], Field(discriminator="op")]
+
+class BatchIn(BaseModel):
+    operations: list[BatchOp] = Field(..., max_length=MAX_BATCH_OPS)
+
+class BatchOpResult(BaseModel):
+    index: int
+    op: str
+    ok: bool
+    id: Optional[int] = None
+    temp_id: Optional[str] = None
+    error: Optional[str] = None
+
+class BatchResult(BaseModel):
+    applied: bool
+    ids: dict[str, int]        # temp_id -> server id
+    results: list[BatchOpResult]
+
+# ---------- Routes ----------
+
+@router.post("", response_model=BatchResult)
+async def batch(
+    body: BatchIn,
+    db: AnySession = Depends(get_db),
+    user: User = Depends(get_current_user),
+    atomic: bool = Query(default=True, description="Apply nothing if any operation fails"),
+):
+    """
+    Apply a list of create/delete operations on pieces and sessions, in
+    order, in one transaction.
+
+    Creates may carry a `temp_id`; later operations can use that string
+    wherever an id is expected (e.g. a session's `piece_id`). Deleting a
+    piece also deletes its sessions. Failed operations are reported by index;
+    with atomic=false the others are still applied.
+    """
+    if not body.operations:
+        raise HTTPException(status_code=400, detail="No operations")
+    result = await run_db(db, _apply_batch, user, body.operations, atomic)
+    if result.applied:
+        await stats_cache.invalidate(user.id)
+    return result
+
+def _apply_batch(db: DBSession, user: User, ops: list, atomic: bool) -> BatchResult:
+    # Ownership of every referenced server id, in two queries
+    piece_refs = {op.data.piece_id for op in ops if isinstance(op, CreateSessionOp)}
+    piece_refs |= {op.id for op in ops if isinstance(op, DeleteOp) and op.op == "delete_piece"}
+    piece_refs = {r for r in piece_refs if isinstance(r, int)}
+    session_refs = {op.id for op in ops if isinstance(op, DeleteOp) and op.op == "delete_session"
+                    and isinstance(op.id, int)}
+    owned_pieces = set(db.exec(
+        select(Piece.id).where(Piece.owner_id == user.id, col(Piece.id).in_(piece_refs))
+    ).all()) if piece_refs else set()
+    owned_sessions = set(db.exec(
+        select(PracticeSession.id).where(PracticeSession.user_id == user.id,
+                                         col(PracticeSession.id).in_(session_refs))
+    ).all()) if session_refs else set()
+
+    # Walk the operations in order against that snapshot. New rows only get
+    # ids from the INSERTs, so until then they are referred to as
+    # (kind, position in new_pieces / new_sessions).
+    results = [BatchOpResult(index=i, op=op.op, ok=True, temp_id=getattr(op, "temp_id", None))
+               for i, op in enumerate(ops)]
+    targets: dict[int, object] = {}                # result index -> int id or (kind, position)
+    temp: dict[str, tuple[str, int]] = {}
+    new_pieces: list[dict] = []
+    new_sessions: list[dict] = []
+    gone_pieces: set = set()
+    gone_sessions: set = set()
+
+    def resolve(ref: Ref, kind: str, owned: set):
+        if isinstance(ref, int):
+            return ref if ref in owned else None
+        hit = temp.get(ref)
+        return hit if hit and hit[0] == kind else None
+
+    for i, op in enumerate(ops):
+        error = None
+        if isinstance(op, (CreatePieceOp, CreateSessionOp)) and op.temp_id in temp:
+            error = f"Duplicate temp_id {op.temp_id!r}"
+
+        elif isinstance(op, CreatePieceOp):
+            targets[i] = ("piece", len(new_pieces))
+            new_pieces.append({"owner_id": user.id, **op.data.model_dump()})
+
+        elif isinstance(op, CreateSessionOp):
+            piece = resolve(op.data.piece_id, "piece", owned_pieces)
+            if piece is None or piece in gone_pieces:
+                error = "Piece not found or not owned by user"
+            else:
+                targets[i] = ("session", len(new_sessions))
+                new_sessions.append({"user_id": user.id, **op.data.model_dump(), "piece_id": piece})
+
+        else:
+            kind = "piece" if op.op == "delete_piece" else "session"
+            target = resolve(op.id, kind, owned_pieces if kind == "piece" else owned_sessions)
+            gone = gone_pieces if kind == "piece" else gone_sessions
+            if target is None or target in gone:
+                error = f"{kind.capitalize()} not found or not owned by user"
+            else:
+                targets[i] = target
+                gone.add(target)
+
+        if error:
+            results[i].ok, results[i].error = False, error
+        elif getattr(op, "temp_id", None) is not None:
+            temp[op.temp_id] = targets[i]
+
+    if (atomic and any(not r.ok for r in results)) or not targets:
+        return BatchResult(applied=False, ids={}, results=results)
+
+    seq = bump_data_version(db, user.id)
+    for row in new_pieces + new_sessions:
+        row["change_seq"] = seq
+
+    # INSERT .. RETURNING, ids in parameter order
+    new_ids = {"piece": [], "session": []}
+    if new_pieces:
+        new_ids["piece"] = db.exec(
+            insert(Piece).returning(Piece.id, sort_by_parameter_order=True), params=new_pieces
+        ).scalars().all()
+    for row in new_sessions:
+        if isinstance(row["piece_id"], tuple):
+            row["piece_id"] = new_ids["piece"][row["piece_id"][1]]
+    if new_sessions:
+        new_ids["session"] = db.exec(
+            insert(PracticeSession).returning(PracticeSession.id, sort_by_parameter_order=True),
+            params=new_sessions,
+        ).scalars().all()
+        record_sessions(db, user.id, ((r["practice_date"], r["minutes"]) for r in new_sessions))
+
+    real_id = lambda t: new_ids[t[0]][t[1]] if isinstance(t, tuple) else t
+    del_pieces = [real_id(t) for t in gone_pieces]
+    del_sessions = [real_id(t) for t in gone_sessions]
+    if del_pieces or del_sessions:
+        # a deleted piece takes its sessions with it
+        removed = db.exec(
+            delete(PracticeSession)
+            .where(PracticeSession.user_id == user.id,
+                   or_(col(PracticeSession.id).in_(del_sessions), col(PracticeSession.piece_id).in_(del_pieces)))
+            .returning(PracticeSession.id, PracticeSession.practice_date, PracticeSession.minutes)
+            .execution_options(synchronize_session=False)
+        ).all()
+        discard_sessions(db, user.id, ((d, m) for _, d, m in removed))
+        record_deletes(db, user.id, seq, "session", (sid for sid, _, _ in removed))
+        if del_pieces:
+            db.exec(delete(Piece).where(Piece.owner_id == user.id, col(Piece.id).in_(del_pieces))
+                    .execution_options(synchronize_session=False))
+            record_deletes(db, user.id, seq, "piece", del_pieces)
+
+    for i, t in targets.items():
+        results[i].id = real_id(t)
+    ids = {temp_id: real_id(t) for temp_id, t in temp.items()}
+
+    db.commit()
+    return BatchResult(applied=True, ids=ids, results=results)
@@ -0,0 +1,93 @@
+# app/routes/export.py
+from __future__ import annotations
+import csv
+import io
+import zlib
+from typing import Iterator, Literal
+
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.engine import Engine
+from sqlmodel import Session as DBSession, select, col
+
+from app.db import read_engine_for
+from app.fastjson import dumps, row_dicts
+from app.models import PracticeSession, Piece, User
+from app.security import get_current_user
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+EXPORT_BATCH = 1000
+COLUMNS = ["id", "practice_date", "minutes", "piece_id", "piece_title", "piece_composer", "focus", "notes"]
+
+def _rows(bind: Engine, user_id: int) -> Iterator[list]:
+    # Own session: the request-scoped one is closed before streaming starts.
+    # yield_per gives a server-side cursor (stream_results) on Postgres.
+    q = (
+        select(
+            PracticeSession.id, PracticeSession.practice_date, PracticeSession.minutes,
+            PracticeSession.piece_id, Piece.title, Piece.composer,
+            PracticeSession.focus, PracticeSession.notes,
+        )
+        .join(Piece, Piece.id == PracticeSession.piece_id)
+        .where(PracticeSession.user_id == user_id)
+        .order_by(col(PracticeSession.practice_date).asc(), col(PracticeSession.id).asc())
+        .execution_options(yield_per=EXPORT_BATCH)
+    )
+    with DBSession(bind) as db:
+        for batch in db.exec(q).partitions():
+            yield batch
+
+def _csv_chunks(bind: Engine, user_id: int) -> Iterator[str]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(COLUMNS)
+    yield buf.getvalue()
+    for batch in _rows(bind, user_id):
+        buf.seek(0); buf.truncate()
+        writer.writerows(batch)
+        yield buf.getvalue()
+
+def _ndjson_chunks(bind: Engine, user_id: int) -> Iterator[bytes]:
+    for batch in _rows(bind, user_id):
+        yield b"".join(dumps(d) + b"\n" for d in row_dicts(COLUMNS, batch))
+
+def _gzip(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    z = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)   # gzip container
+    for chunk in chunks:
+        out = z.compress(chunk)
+        if out:
+            yield out
+    yield z.flush()
+
+@router.get("")
+async def export_sessions(
+    request: Request,
+    user: User = Depends(get_current_user),
+    format: Literal["csv", "ndjson"] = Query(default="csv"),
+    gzip: bool = Query(default=False, description="Compress on the fly (.gz download)"),
+):
+    """
+    Full practice history joined with piece title/composer, oldest first.
+
+    Rows are streamed in batches from a server-side cursor, so memory stays
+    flat and the first bytes go out before the query has finished.
+    """
+    bind = read_engine_for(request)
+    if format == "csv":
+        body = (chunk.encode() for chunk in _csv_chunks(bind, user.id))
+    else:
+        body = _ndjson_chunks(bind, user.id)
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"practice-sessions.{format}"
+
+    if gzip:
+        body = _gzip(body)
+        media_type = "application/gzip"
+        filename += ".gz"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,14 +1,18 @@
 # User profile endpoint
 from __future__ import annotations
-from datetime import date, timedelta
-from fastapi import APIRouter, Depends
+from datetime import date
+from fastapi import APIRouter, Depends, Request, Response
 from pydantic import BaseModel
 from sqlmodel import select, func
 from sqlmodel import Session as DBSession
 
-from ..db import get_db
-from ..models import User, Piece, PracticeSession
+from ..db import AnySession, get_read_db, run_db
+from ..etag import conditional_get
+from ..fastjson import json_response
+from ..models import User, Piece, UserDailyTotal, UserStreak
 from ..security import get_current_user
+from ..stats_cache import stats_cache
+from ..streaks import current_streak
 
 router = APIRouter(prefix="/me", tags=["me"])
 
@@ -26,70 +30,51 @@ class MeOverview(BaseModel):
     current_streak_days: int
     longest_streak_days: int
 
-@router.get("", response_model=MeOverview)
-def me(
-    db: DBSession = Depends(get_db),
+@router.get("", response_model=MeOverview, dependencies=[Depends(conditional_get)])
+async def me(
+    request: Request,
+    response: Response,
+    db: AnySession = Depends(get_read_db),
     user: User = Depends(get_current_user),
 ):
-    # Aggregate counts + minutes
-    pieces_count = db.exec(
-        select(func.count()).select_from(Piece).where(Piece.owner_id == user.id)
+    return json_response(await stats_cache.get_or_compute(
+        user.id, request.state.data_version, "me", lambda: run_db(db, _me, user),
+    ), response)
+
+def _me(db: DBSession, user: User) -> dict:
+    # Everything in one round trip: piece count, rollup totals and the streak
+    # summary are scalar subqueries of a single SELECT.
+    mine = UserDailyTotal.user_id == user.id
+    streak_row = UserStreak.user_id == user.id
+    row = db.exec(
+        select(
+            select(func.count()).select_from(Piece).where(Piece.owner_id == user.id).scalar_subquery(),
+            select(func.coalesce(func.sum(UserDailyTotal.session_count), 0)).where(mine).scalar_subquery(),
+            select(func.coalesce(func.sum(UserDailyTotal.minutes), 0)).where(mine).scalar_subquery(),
+            select(UserStreak.current_start).where(streak_row).scalar_subquery(),
+            select(UserStreak.current_end).where(streak_row).scalar_subquery(),
+            select(UserStreak.longest_days).where(streak_row).scalar_subquery(),
+        )
     ).one()
-
-    sessions_count = db.exec(
-        select(func.count()).select_from(PracticeSession).where(PracticeSession.user_id == user.id)
-    ).one()
-
-    minutes_total = db.exec(
-        select(func.coalesce(func.sum(PracticeSession.minutes), 0))
-        .where(PracticeSession.user_id == user.id)
-    ).one()
-
-    # Distinct practice days (for streaks)
-    days = db.exec(
-        select(PracticeSession.practice_date)
-        .where(PracticeSession.user_id == user.id)
-        .group_by(PracticeSession.practice_date)
-        .order_by(PracticeSession.practice_date.asc())
-    ).all()
-
-    # Basic metadata
-    last_date = days[-1] if days else None
-
-    # Streaks
-    day_set = set(days)
-    today = date.today()
-
-    # current streak (count back from today)
-    cur_streak = 0
-    d = today
-    while d in day_set:
-        cur_streak += 1
-        d -= timedelta(days=1)
-
-    # longest streak (scan all dates)
-    longest = 0
-    if days:
-        run = 1
-        for i in range(1, len(days)):
-            if days[i] == days[i-1] + timedelta(days=1):
-                run += 1
-            else:
-                longest = max(longest, run)
-                run = 1
-        longest = max(longest, run)
-
-    return MeOverview(
-        email=user.email,
-        display_name=user.display_name,
-        picture_url=user.picture_url,
-        joined_on=(user.created_at.date() if getattr(user, "created_at", None) else None),
-
-        total_pieces=int(pieces_count or 0),
-        total_sessions=int(sessions_count or 0),
-        total_minutes=int(minutes_total or 0),
-
-        last_practice_date=last_date,
-        current_streak_days=cur_streak,
-        longest_streak_days=longest,
-    )
\ No newline at end of file
+    pieces_count, sessions_count, minutes_total, cur_start, cur_end, longest = row
+
+    # Streaks are maintained incrementally (app/streaks.py)
+    streak = UserStreak(user_id=user.id, current_start=cur_start, current_end=cur_end,
+                        longest_days=longest or 0)
+    last_date = cur_end
+    cur_streak = current_streak(db, streak, date.today())
+
+    return {
+        "email": user.email,
+        "display_name": user.display_name,
+        "picture_url": user.picture_url,
+        "joined_on": (user.created_at.date() if getattr(user, "created_at", None) else None),
+
+        "total_pieces": int(pieces_count or 0),
+        "total_sessions": int(sessions_count or 0),
+        "total_minutes": int(minutes_total or 0),
+
+        "last_practice_date": last_date,
+        "current_streak_days": cur_streak,
+        "longest_streak_days": int(longest or 0),
+    }
\ No newline at end of file
@@ -1,11 +1,18 @@
 # in main.py (or routes/pieces.py)
-from fastapi import Depends, HTTPException, APIRouter
-from sqlmodel import select, Session as DBSession
+from datetime import date, timedelta
+from fastapi import Depends, HTTPException, APIRouter, Query, Response
+from sqlalchemy import case, delete
+from sqlmodel import select, func, col, Session as DBSession
 from pydantic import BaseModel, Field
-from typing import Optional, List
-from ..db import get_db
-from ..models import Piece, User
+from typing import Literal, Optional, List
+from ..changes import record_deletes, record_deletes_from
+from ..db import AnySession, get_db, get_read_db, run_db
+from ..etag import bump_data_version, conditional_get
+from ..fastjson import json_response, row_dicts
+from ..models import Piece, PracticeSession, User
+from ..rollups import discard_matching
 from ..security import get_current_user # the helper that reads your JWT cookie
+from ..stats_cache import stats_cache
 
 router = APIRouter(prefix="/pieces", tags=['pieces'])
 
@@ -19,35 +26,151 @@ class PieceOut(PieceIn):
     id: int
 
 @router.post("", response_model=PieceOut)
-def create_piece(
+async def create_piece(
     body: PieceIn,
     user: User = Depends(get_current_user),
-    db: DBSession = Depends(get_db),
+    db: AnySession = Depends(get_db),
 ):
-    piece = Piece(owner_id=user.id, **body.model_dump())
+    piece = await run_db(db, _create_piece, body, user)
+    await stats_cache.invalidate(user.id)
+    return piece
+
+def _create_piece(db: DBSession, body: PieceIn, user: User) -> PieceOut:
+    seq = bump_data_version(db, user.id)
+    piece = Piece(owner_id=user.id, change_seq=seq, **body.model_dump())
     db.add(piece)
     db.commit()
     db.refresh(piece)
     return PieceOut(id=piece.id, **body.model_dump())
 
 
-@router.get("", response_model=List[PieceOut])
-def list_pieces(
+PIECE_COLUMNS = ("id", "title", "composer", "difficulty", "notes")
+
+@router.get("", response_model=List[PieceOut], dependencies=[Depends(conditional_get)])
+async def list_pieces(
+    response: Response,
+    user: User = Depends(get_current_user),
+    db: AnySession = Depends(get_read_db),
+):
+    return json_response(await run_db(db, _list_pieces, user), response)
+
+def _list_pieces(db: DBSession, user: User) -> List[dict]:
+    return row_dicts(PIECE_COLUMNS, db.exec(
+        select(Piece.id, Piece.title, Piece.composer, Piece.difficulty, Piece.notes)
+        .where(Piece.owner_id == user.id)
+        .order_by(Piece.created_at.desc())
+    ))
+
+class PieceSummary(PieceOut):
+    total_minutes: int
+    session_count: int
+    first_practiced: Optional[date] = None
+    last_practiced: Optional[date] = None
+    minutes_last_7_days: int
+    minutes_last_30_days: int
+
+SUMMARY_SORTS = Literal["created", "title", "total_minutes", "last_practiced"]
+
+@router.get("/summary", response_model=List[PieceSummary], dependencies=[Depends(conditional_get)])
+async def pieces_summary(
+    response: Response,
+    user: User = Depends(get_current_user),
+    db: AnySession = Depends(get_read_db),
+    sort: SUMMARY_SORTS = "created",
+    limit: int = Query(default=100, ge=1, le=500),
+    offset: int = Query(default=0, ge=0),
+):
+    """Every piece with its practice totals, from one grouped LEFT JOIN."""
+    return json_response(await run_db(db, _pieces_summary, user, sort, limit, offset), response)
+
+def _pieces_summary(db: DBSession, user: User, sort: str, limit: int, offset: int) -> List[dict]:
+    today = date.today()
+    minutes = PracticeSession.minutes
+    practiced = PracticeSession.practice_date
+
+    def minutes_since(start: date):
+        return func.coalesce(func.sum(case((practiced >= start, minutes), else_=0)), 0)
+
+    total = func.coalesce(func.sum(minutes), 0)
+    last = func.max(practiced)
+    order = {
+        "created": [Piece.created_at.desc()],
+        "title": [func.lower(Piece.title).asc()],
+        "total_minutes": [total.desc()],
+        # never-practiced pieces last
+        "last_practiced": [last.is_(None), last.desc()],
+    }[sort]
+
+    result = db.exec(
+        select(
+            Piece.id, Piece.title, Piece.composer, Piece.difficulty, Piece.notes,
+            total,
+            func.count(PracticeSession.id),
+            func.min(practiced),
+            last,
+            minutes_since(today - timedelta(days=6)),
+            minutes_since(today - timedelta(days=29)),
+        )
+        .select_from(Piece)
+        .outerjoin(PracticeSession, PracticeSession.piece_id == Piece.id)
+        .where(Piece.owner_id == user.id)
+        .group_by(Piece.id, Piece.title, Piece.composer, Piece.difficulty, Piece.notes, Piece.created_at)
+        .order_by(*order, Piece.id.desc())
+        .limit(limit)
+        .offset(offset)
+    ).all()
+
+    return [
+        {
+            "id": pid, "title": title, "composer": composer, "difficulty": difficulty, "notes": notes,
+            "total_minutes": int(tot), "session_count": int(n), "first_practiced": first, "last_practiced": lst,
+            "minutes_last_7_days": int(m7), "minutes_last_30_days": int(m30),
+        }
+        for pid, title, composer, difficulty, notes, tot, n, first, lst, m7, m30 in result
+    ]
+
+MAX_DELETE_IDS = 1000
+
+@router.delete("")
+async def delete_pieces(
+    ids: List[int] = Query(..., max_length=MAX_DELETE_IDS, description="Piece ids (repeat: ?ids=1&ids=2)"),
     user: User = Depends(get_current_user),
-    db: DBSession = Depends(get_db),
+    db: AnySession = Depends(get_db),
 ):
-    rows = db.exec(select(Piece).where(Piece.owner_id == user.id).order_by(Piece.created_at.desc())).all()
-    return [PieceOut(id=p.id, title=p.title, composer=p.composer, difficulty=p.difficulty, notes=p.notes) for p in rows]
+    """Delete several pieces and all of their sessions; ids the user doesn't own are reported, not deleted."""
+    deleted = await run_db(db, _delete_pieces, user.id, ids)
+    if deleted:
+        await stats_cache.invalidate(user.id)
+    return {"deleted": deleted, "not_found": sorted(set(ids) - set(deleted))}
 
 @router.delete("/{piece_id}")
-def delete_piece(
+async def delete_piece(
     piece_id: int,
-    db: DBSession = Depends(get_db)
-) :
-    piece = db.query(Piece).filter(piece_id == Piece.id).first()
-    if not piece : 
+    user: User = Depends(get_current_user),
+    db: AnySession = Depends(get_db),
+):
+    if not await run_db(db, _delete_pieces, user.id, [piece_id]):
         raise HTTPException(status_code=404, detail="Not Found")
-    db.delete(piece)
-    db.commit()
+    await stats_cache.invalidate(user.id)
 
-    return 
+def _delete_pieces(db: DBSession, user_id: int, piece_ids: List[int]) -> List[int]:
+    """
+    Delete the user's pieces among `piece_ids` with all their sessions, keeping
+    the rollup, streaks and sync tombstones in step. Every step is a set-based
+    statement, so the number of round trips doesn't grow with the number of
+    sessions. Returns the ids actually deleted.
+    """
+    owned = db.exec(select(Piece.id).where(Piece.owner_id == user_id, col(Piece.id).in_(piece_ids))).all()
+    if not owned:
+        return []
+
+    seq = bump_data_version(db, user_id)
+    of_pieces = (PracticeSession.user_id == user_id) & col(PracticeSession.piece_id).in_(owned)
+    discard_matching(db, user_id, of_pieces)
+    record_deletes_from(db, user_id, seq, "session", select(PracticeSession.id).where(of_pieces))
+    db.exec(delete(PracticeSession).where(of_pieces).execution_options(synchronize_session=False))
+    db.exec(delete(Piece).where(Piece.owner_id == user_id, col(Piece.id).in_(owned))
+            .execution_options(synchronize_session=False))
+    record_deletes(db, user_id, seq, "piece", owned)
+    db.commit()
+    return sorted(owned)
@@ -0,0 +1,43 @@
+# app/routes/search.py
+from __future__ import annotations
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlmodel import Session as DBSession
+
+from app.db import AnySession, get_read_db, run_db
+from app.etag import conditional_get
+from app.models import User
+from app.search import search_pieces, search_sessions, search_terms
+from app.security import get_current_user
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+@router.get("", dependencies=[Depends(conditional_get)])
+async def search(
+    db: AnySession = Depends(get_read_db),
+    user: User = Depends(get_current_user),
+    q: str = Query(..., min_length=1, max_length=200, description="Words to find; each matches as a prefix"),
+    type: Literal["all", "pieces", "sessions"] = "all",
+    piece_id: Optional[int] = Query(default=None, description="Only sessions of this piece"),
+    limit: int = Query(default=20, ge=1, le=100),
+    offset: int = Query(default=0, ge=0, le=1000),
+):
+    """
+    Ranked matches in piece title/composer/notes and session focus/notes.
+
+    Each group is paged with the same limit/offset; best matches first.
+    """
+    terms = search_terms(q)
+    if not terms:
+        return {"pieces": [], "sessions": []}
+    return await run_db(db, _search, user, terms, type, piece_id, limit, offset)
+
+def _search(db: DBSession, user: User, terms: list[str], type: str, piece_id: Optional[int],
+            limit: int, offset: int) -> dict:
+    return {
+        "pieces": search_pieces(db, user.id, terms, limit, offset)
+        if type != "sessions" and piece_id is None else [],
+        "sessions": search_sessions(db, user.id, terms, limit, offset, piece_id)
+        if type != "pieces" else [],
+    }
@@ -1,18 +1,34 @@
 # app/routes/sessions.py
 from __future__ import annotations
+import base64
+import csv
+import io
+import json
 from datetime import date, datetime
-from typing import List, Optional
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from pydantic import BaseModel, Field, field_validator
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, ValidationError, field_validator
+from sqlalchemy import and_, insert, or_
+from starlette.concurrency import run_in_threadpool
 from sqlmodel import Session as DBSession, select, col
 
-from app.db import get_db
+from app.db import AnySession, get_db, get_read_db, read_engine_for, run_db
+from app.etag import bump_data_version, conditional_get
+from app.fastjson import dumps, json_response, row_dicts
 from app.models import PracticeSession, Piece, User
+from app.rollups import record_session, record_sessions
 from app.security import get_current_user
+from app.stats_cache import stats_cache
 
 router = APIRouter(prefix="/sessions", tags=["sessions"])
 
+MAX_PAGE_SIZE = 500
+STREAM_BATCH = 500
+MAX_BULK_ROWS = 100_000
+BULK_BATCH = 1000
+
 # ---------- Schemas ----------
 class SessionIn(BaseModel):
     piece_id: int
@@ -36,11 +52,16 @@ class SessionOut(SessionIn):
 # ---------- Routes ----------
 
 @router.post("", response_model=SessionOut)
-def create_session(
+async def create_session(
     body: SessionIn,
-    db: DBSession = Depends(get_db),
+    db: AnySession = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
+    session = await run_db(db, _create_session, body, user)
+    await stats_cache.invalidate(user.id)
+    return session
+
+def _create_session(db: DBSession, body: SessionIn, user: User) -> SessionOut:
     # Ownership check: piece must belong to this user
     piece = db.exec(
         select(Piece).where(
@@ -51,6 +72,7 @@ def create_session(
     if not piece:
         raise HTTPException(status_code=404, detail="Piece not found or not owned by user")
 
+    seq = bump_data_version(db, user.id)
     row = PracticeSession(
         user_id=user.id,
         piece_id=body.piece_id,
@@ -58,8 +80,10 @@ def create_session(
         minutes=body.minutes,
         focus=body.focus,
         notes=body.notes,
+        change_seq=seq,
     )
     db.add(row)
+    record_session(db, row)
     db.commit()
     db.refresh(row)
     return SessionOut(
@@ -72,19 +96,152 @@ def create_session(
     )
 
 
-@router.get("", response_model=List[SessionOut])
-def list_sessions(
-    db: DBSession = Depends(get_db),
+# ---------- Bulk import ----------
+
+class BulkRowError(BaseModel):
+    row: int            # 0-based position in the upload (CSV: data rows, header excluded)
+    error: str
+
+class BulkImportResult(BaseModel):
+    inserted: int
+    errors: List[BulkRowError]
+
+def _parse_upload(raw: bytes, content_type: str) -> list:
+    """Decode a JSON array, NDJSON or CSV body into a list of dicts (or raw values)."""
+    text = raw.decode("utf-8-sig")
+    if "csv" in content_type:
+        reader = csv.DictReader(io.StringIO(text))
+        # empty CSV cells mean "not given", not ""
+        return [{k: (v if v != "" else None) for k, v in r.items()} for r in reader]
+    if "ndjson" in content_type or "jsonl" in content_type:
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    data = json.loads(text)
+    if not isinstance(data, list):
+        raise ValueError("expected a JSON array")
+    return data
+
+def _validate_rows(items: list) -> tuple[list[tuple[int, SessionIn]], list[BulkRowError]]:
+    valid, errors = [], []
+    for i, item in enumerate(items):
+        try:
+            valid.append((i, SessionIn.model_validate(item)))
+        except ValidationError as e:
+            errors.append(BulkRowError(row=i, error="; ".join(
+                f"{'.'.join(map(str, err['loc'])) or 'row'}: {err['msg']}" for err in e.errors()
+            )))
+    return valid, errors
+
+@router.post("/bulk", response_model=BulkImportResult)
+async def bulk_import(
+    request: Request,
+    db: AnySession = Depends(get_db),
+    user: User = Depends(get_current_user),
+    atomic: bool = Query(default=False, description="Insert nothing if any row is invalid"),
+):
+    """
+    Import many sessions at once from a JSON array, NDJSON or CSV body
+    (picked by Content-Type; CSV needs a header row with SessionIn field names).
+
+    Valid rows are inserted in one transaction with batched multi-row INSERTs;
+    invalid rows are reported by position and skipped (or, with atomic=true,
+    nothing is inserted).
+    """
+    raw = await request.body()
+    try:
+        items = await run_in_threadpool(_parse_upload, raw, request.headers.get("content-type", ""))
+    except (ValueError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Could not parse upload: {e}")
+    if len(items) > MAX_BULK_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_ROWS} rows per upload")
+
+    valid, errors = await run_in_threadpool(_validate_rows, items)
+    result = await run_db(db, _bulk_insert, user, valid, errors, atomic)
+    if result.inserted:
+        await stats_cache.invalidate(user.id)
+    return result
+
+def _bulk_insert(db: DBSession, user: User, valid: list[tuple[int, SessionIn]],
+                 errors: list[BulkRowError], atomic: bool) -> BulkImportResult:
+    # One ownership query for every referenced piece
+    piece_ids = {body.piece_id for _, body in valid}
+    owned = set(db.exec(
+        select(Piece.id).where(Piece.owner_id == user.id, col(Piece.id).in_(piece_ids))
+    ).all()) if piece_ids else set()
+
+    rows = []
+    for i, body in valid:
+        if body.piece_id not in owned:
+            errors.append(BulkRowError(row=i, error="Piece not found or not owned by user"))
+            continue
+        rows.append({"user_id": user.id, **body.model_dump()})
+    errors.sort(key=lambda e: e.row)
+
+    if not rows or (atomic and errors):
+        return BulkImportResult(inserted=0, errors=errors)
+
+    seq = bump_data_version(db, user.id)
+    for r in rows:
+        r["change_seq"] = seq
+    for start in range(0, len(rows), BULK_BATCH):
+        db.exec(insert(PracticeSession), params=rows[start:start + BULK_BATCH])
+    record_sessions(db, user.id, ((r["practice_date"], r["minutes"]) for r in rows))
+    db.commit()
+    return BulkImportResult(inserted=len(rows), errors=errors)
+
+
+def encode_cursor(practice_date: date, session_id: int) -> str:
+    raw = f"{practice_date.isoformat()}:{session_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple[date, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        d, sid = raw.split(":")
+        return date.fromisoformat(d), int(sid)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+SESSION_COLUMNS = ("id", "piece_id", "practice_date", "minutes", "focus", "notes")
+
+def _stream_ndjson(bind, q):
+    # The request-scoped session is closed before the body is sent, so the
+    # stream owns its session; yield_per keeps a server-side cursor open
+    # (stream_results on Postgres) and buffers at most one batch of rows.
+    with DBSession(bind) as db:
+        for batch in db.exec(q.execution_options(yield_per=STREAM_BATCH)).partitions():
+            yield b"".join(dumps(d) + b"\n" for d in row_dicts(SESSION_COLUMNS, batch))
+
+
+@router.get("", response_model=List[SessionOut], dependencies=[Depends(conditional_get)])
+async def list_sessions(
+    request: Request,
+    response: Response,
+    db: AnySession = Depends(get_read_db),
     user: User = Depends(get_current_user),
     piece_id: Optional[int] = Query(default=None, description="Filter by piece"),
     date_from: Optional[date] = Query(default=None, description="Inclusive start (YYYY-MM-DD)"),
     date_to: Optional[date] = Query(default=None, description="Inclusive end (YYYY-MM-DD)"),
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE, description="Page size (keyset pagination)"),
+    cursor: Optional[str] = Query(default=None, description="X-Next-Cursor value from the previous page"),
+    format: Literal["json", "ndjson"] = Query(default="json", description="ndjson streams one session per line"),
 ):
-    q = select(PracticeSession).where(PracticeSession.user_id == user.id)
+    """
+    Sessions newest first, ordered by (practice_date DESC, id DESC).
+
+    With `limit`, returns one page and, if more rows exist, an
+    `X-Next-Cursor` response header to pass back as `cursor`. The body stays
+    a plain JSON array. `format=ndjson` streams the (optionally paginated)
+    result row by row instead of building it in memory, with the same
+    headers.
+    """
+    q = select(
+        PracticeSession.id, PracticeSession.piece_id, PracticeSession.practice_date,
+        PracticeSession.minutes, PracticeSession.focus, PracticeSession.notes,
+    ).where(PracticeSession.user_id == user.id)
 
     if piece_id is not None:
         # Ensure the piece belongs to the user
-        owned = db.exec(select(Piece.id).where(Piece.id == piece_id, Piece.owner_id == user.id)).first()
+        owned = await run_db(db, _owned_piece_id, piece_id, user)
         if not owned:
             raise HTTPException(status_code=404, detail="Piece not found or not owned by user")
         q = q.where(PracticeSession.piece_id == piece_id)
@@ -94,17 +251,51 @@ def list_sessions(
     if date_to is not None:
         q = q.where(PracticeSession.practice_date <= date_to)
 
+    if cursor is not None:
+        after_date, after_id = decode_cursor(cursor)
+        q = q.where(or_(
+            PracticeSession.practice_date < after_date,
+            and_(PracticeSession.practice_date == after_date, PracticeSession.id < after_id),
+        ))
+
     q = q.order_by(col(PracticeSession.practice_date).desc(), col(PracticeSession.id).desc())
-    rows = db.exec(q).all()
-
-    return [
-        SessionOut(
-            id=r.id,
-            piece_id=r.piece_id,
-            practice_date=r.practice_date,
-            minutes=r.minutes,
-            focus=r.focus,
-            notes=r.notes,
-        )
-        for r in rows
-    ]
\ No newline at end of file
+
+    if format == "ndjson":
+        if limit is not None:
+            next_cursor = await run_db(db, _next_cursor, q, limit)
+            if next_cursor:
+                response.headers["X-Next-Cursor"] = next_cursor
+            q = q.limit(limit)
+        out = StreamingResponse(_stream_ndjson(read_engine_for(request), q), media_type="application/x-ndjson")
+        # a returned Response replaces the injected one: keep its ETag / X-Next-Cursor
+        out.headers.raw.extend(response.headers.raw)
+        return out
+
+    rows, next_cursor = await run_db(db, _fetch_page, q, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return json_response(rows, response)
+
+def _owned_piece_id(db: DBSession, piece_id: int, user: User) -> Optional[int]:
+    return db.exec(select(Piece.id).where(Piece.id == piece_id, Piece.owner_id == user.id)).first()
+
+def _next_cursor(db: DBSession, q, limit: int) -> Optional[str]:
+    # The headers go out before the streamed rows, so look ahead separately:
+    # the page's last key and whether any row follows it (two index entries).
+    keys = db.exec(
+        q.with_only_columns(PracticeSession.practice_date, PracticeSession.id).offset(limit - 1).limit(2)
+    ).all()
+    return encode_cursor(*keys[0]) if len(keys) == 2 else None
+
+def _fetch_page(db: DBSession, q, limit: Optional[int]) -> tuple[List[dict], Optional[str]]:
+    next_cursor = None
+    if limit is not None:
+        # one extra row tells us whether there is a next page
+        rows = db.exec(q.limit(limit + 1)).all()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].practice_date, rows[-1].id)
+    else:
+        rows = db.exec(q).all()
+
+    return row_dicts(SESSION_COLUMNS, rows), next_cursor
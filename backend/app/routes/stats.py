@@ -1,29 +1,48 @@
 # app/routes/stats.py
 from __future__ import annotations
-from datetime import date, timedelta
-from fastapi import APIRouter, Depends
+from datetime import date, datetime, timedelta
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import literal_column
 from sqlmodel import select, func
 from sqlmodel import Session as DBSession
 
-from app.db import get_db
-from app.models import PracticeSession, Piece, User
+from app import analytics
+from app.db import AnySession, get_read_db, run_db
+from app.etag import conditional_get
+from app.fastjson import json_response
+from app.models import PracticeSession, Piece, User, UserDailyTotal, UserStreak
 from app.security import get_current_user
+from app.stats_cache import stats_cache
+from app.streaks import current_streak
 
 router = APIRouter(prefix="/stats", tags=["stats"])
 
-@router.get("/overview")
-def overview(
-    db: DBSession = Depends(get_db),
+MAX_SERIES_DAYS = 366 * 20
+MAX_SERIES_BUCKETS = 1000
+Bucket = Literal["day", "week", "month", "year"]
+
+@router.get("/overview", dependencies=[Depends(conditional_get)])
+async def overview(
+    request: Request,
+    response: Response,
+    db: AnySession = Depends(get_read_db),
     user: User = Depends(get_current_user),
 ):
+    return json_response(await stats_cache.get_or_compute(
+        user.id, request.state.data_version, "overview",
+        lambda: run_db(db, _overview, user),
+    ), response)
+
+def _overview(db: DBSession, user: User) -> dict:
     today = date.today()
     start7 = today - timedelta(days=6)
 
-    # total minutes last 7 days
+    # total minutes last 7 days (from the daily rollup)
     total_7 = db.exec(
-        select(func.coalesce(func.sum(PracticeSession.minutes), 0))
-        .where(PracticeSession.user_id == user.id,
-               PracticeSession.practice_date >= start7)
+        select(func.coalesce(func.sum(UserDailyTotal.minutes), 0))
+        .where(UserDailyTotal.user_id == user.id,
+               UserDailyTotal.practice_date >= start7)
     ).one()
 
     # top piece by minutes (last 7 days)
@@ -37,19 +56,7 @@ def overview(
     ).first()
 
     # streak: consecutive days ending today with any practice
-    days = db.exec(
-        select(PracticeSession.practice_date)
-        .where(PracticeSession.user_id == user.id,
-               PracticeSession.practice_date <= today)
-        .group_by(PracticeSession.practice_date)
-        .order_by(PracticeSession.practice_date.desc())
-    ).all()
-    dayset = set(days)
-    streak = 0
-    d = today
-    while d in dayset:
-        streak += 1
-        d -= timedelta(days=1)
+    streak = current_streak(db, db.get(UserStreak, user.id), today)
 
     return {
         "total_minutes_last_7_days": int(total_7 or 0),
@@ -58,19 +65,171 @@ def overview(
     }
 
 # Optional: minutes per day (for charts)
-@router.get("/by-day")
-def by_day(
-    db: DBSession = Depends(get_db),
+@router.get("/by-day", dependencies=[Depends(conditional_get)])
+async def by_day(
+    request: Request,
+    response: Response,
+    db: AnySession = Depends(get_read_db),
     user: User = Depends(get_current_user),
-    days: int = 14,
+    days: int = Query(default=14, ge=1, le=MAX_SERIES_DAYS),
 ):
+    """Sparse minutes per practiced day; see /series for dense, bucketed output."""
+    return json_response(await stats_cache.get_or_compute(
+        user.id, request.state.data_version, f"by-day:{days}",
+        lambda: run_db(db, _by_day, user, days),
+    ), response)
+
+def _by_day(db: DBSession, user: User, days: int) -> list[dict]:
     start = date.today() - timedelta(days=days - 1)
     rows = db.exec(
-        select(PracticeSession.practice_date,
-               func.sum(PracticeSession.minutes))
+        select(UserDailyTotal.practice_date, UserDailyTotal.minutes)
+        .where(UserDailyTotal.user_id == user.id,
+               UserDailyTotal.practice_date >= start)
+        .order_by(UserDailyTotal.practice_date.asc())
+    ).all()
+    return [{"date": str(d), "minutes": int(m)} for d, m in rows]
+
+# ---------- Insights ----------
+
+@router.get("/insights", dependencies=[Depends(conditional_get)])
+async def insights(
+    request: Request,
+    response: Response,
+    db: AnySession = Depends(get_read_db),
+    user: User = Depends(get_current_user),
+    days: int = Query(default=90, ge=7, le=MAX_SERIES_DAYS, description="Length of the period ending today"),
+    goal_minutes: int = Query(default=6000, ge=1, le=10**7, description="Per-piece total to project towards"),
+):
+    """
+    Rolling 7/30-day averages, weekday distribution, a consistency score and
+    per-piece trends with time-to-goal projections over the last `days` days
+    (see app/analytics.py). `rolling` is columnar like /series.
+    """
+    return json_response(await stats_cache.get_or_compute(
+        user.id, request.state.data_version, f"insights:{days}:{goal_minutes}",
+        lambda: run_db(db, _insights, user, days, goal_minutes),
+    ), response)
+
+def _insights(db: DBSession, user: User, days: int, goal_minutes: int) -> dict:
+    today = date.today()
+    cols = analytics.load_practice(db, user.id, since=analytics.period_start(today, days))
+    pieces = analytics.load_pieces(db, user.id)
+    return analytics.insights(cols, pieces, today, days, goal_minutes)
+
+# ---------- Dense, bucketed time series ----------
+
+def bucket_start(d: date, bucket: Bucket) -> date:
+    """First day of the bucket containing `d` (weeks start on Monday, like date_trunc)."""
+    if bucket == "week":
+        return d - timedelta(days=d.weekday())
+    if bucket == "month":
+        return d.replace(day=1)
+    if bucket == "year":
+        return d.replace(month=1, day=1)
+    return d
+
+def next_bucket(d: date, bucket: Bucket) -> date:
+    if bucket == "week":
+        return d + timedelta(days=7)
+    if bucket == "month":
+        return date(d.year + d.month // 12, d.month % 12 + 1, 1)
+    if bucket == "year":
+        return date(d.year + 1, 1, 1)
+    return d + timedelta(days=1)
+
+DEFAULT_SPAN = {"day": 30, "week": 7 * 26, "month": 365, "year": 365 * 5}
+
+@router.get("/series", dependencies=[Depends(conditional_get)])
+async def series(
+    request: Request,
+    response: Response,
+    db: AnySession = Depends(get_read_db),
+    user: User = Depends(get_current_user),
+    bucket: Bucket = "day",
+    start: Optional[date] = Query(default=None, description="Inclusive (defaults by bucket size)"),
+    end: Optional[date] = Query(default=None, description="Inclusive (defaults to today)"),
+    by_piece: bool = Query(default=False, description="Add a per-piece breakdown"),
+):
+    """
+    Minutes and session counts per bucket between start and end, zero-filled.
+
+    Output is columnar: `buckets[i]` is the first day of bucket i and
+    `minutes[i]` / `sessions[i]` (and each piece's `minutes[i]`) line up with it.
+    """
+    end = end or date.today()
+    start = start or end - timedelta(days=DEFAULT_SPAN[bucket] - 1)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    if (end - start).days >= MAX_SERIES_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {MAX_SERIES_DAYS} days")
+
+    buckets = []
+    b = bucket_start(start, bucket)
+    while b <= end:
+        buckets.append(b)
+        if len(buckets) > MAX_SERIES_BUCKETS:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_SERIES_BUCKETS} buckets; use a coarser bucket")
+        b = next_bucket(b, bucket)
+
+    return json_response(await stats_cache.get_or_compute(
+        user.id, request.state.data_version, f"series:{bucket}:{start}:{end}:{int(by_piece)}",
+        lambda: run_db(db, _series, user, bucket, start, end, buckets, by_piece),
+    ), response)
+
+def _series(db: DBSession, user: User, bucket: Bucket, start: date, end: date,
+            buckets: list[date], by_piece: bool) -> dict:
+    index = {b: i for i, b in enumerate(buckets)}
+    minutes = [0] * len(buckets)
+    sessions = [0] * len(buckets)
+
+    # Totals come from the daily rollup: at most one row per day in range
+    for d, m, n in db.exec(
+        select(UserDailyTotal.practice_date, UserDailyTotal.minutes, UserDailyTotal.session_count)
+        .where(UserDailyTotal.user_id == user.id,
+               UserDailyTotal.practice_date >= start,
+               UserDailyTotal.practice_date <= end)
+    ):
+        i = index[bucket_start(d, bucket)]
+        minutes[i] += m
+        sessions[i] += n
+
+    result = {
+        "bucket": bucket,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "buckets": [b.isoformat() for b in buckets],
+        "minutes": minutes,
+        "sessions": sessions,
+    }
+    if by_piece:
+        result["pieces"] = _series_by_piece(db, user, bucket, start, end, index)
+    return result
+
+def _series_by_piece(db: DBSession, user: User, bucket: Bucket, start: date, end: date,
+                     index: dict[date, int]) -> list[dict]:
+    # Postgres buckets in SQL with date_trunc; elsewhere (SQLite) group per
+    # day and fold the days into buckets here.
+    if db.get_bind().dialect.name == "postgresql" and bucket != "day":
+        # inline the unit: a bound parameter would make SELECT and GROUP BY
+        # different expressions to Postgres (bucket is a validated Literal)
+        period = func.date_trunc(literal_column(f"'{bucket}'"), PracticeSession.practice_date)
+    else:
+        period = PracticeSession.practice_date
+
+    rows = db.exec(
+        select(PracticeSession.piece_id, Piece.title, period, func.sum(PracticeSession.minutes))
+        .join(Piece, Piece.id == PracticeSession.piece_id)
         .where(PracticeSession.user_id == user.id,
-               PracticeSession.practice_date >= start)
-        .group_by(PracticeSession.practice_date)
-        .order_by(PracticeSession.practice_date.asc())
+               PracticeSession.practice_date >= start,
+               PracticeSession.practice_date <= end)
+        .group_by(PracticeSession.piece_id, Piece.title, period)
     ).all()
-    return [{"date": str(d), "minutes": int(m)} for d, m in rows]
\ No newline at end of file
+
+    pieces: dict[int, dict] = {}
+    for piece_id, title, p, m in rows:
+        if isinstance(p, datetime):
+            p = p.date()
+        entry = pieces.setdefault(piece_id, {"piece_id": piece_id, "title": title,
+                                             "minutes": [0] * len(index)})
+        entry["minutes"][index[bucket_start(p, bucket)]] += int(m)
+    return sorted(pieces.values(), key=lambda e: -sum(e["minutes"]))
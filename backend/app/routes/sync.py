@@ -0,0 +1,100 @@
+# app/routes/sync.py
+from __future__ import annotations
+import base64
+import time
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import Session as DBSession, select
+
+from app.changes import TOKEN_MAX_AGE
+from app.db import AnySession, get_read_db, run_db
+from app.fastjson import json_response
+from app.models import Piece, PracticeSession, Tombstone, User
+from app.security import get_current_user
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+
+def encode_token(user_id: int, seq: int, issued: Optional[int] = None) -> str:
+    issued = int(time.time()) if issued is None else issued
+    return base64.urlsafe_b64encode(f"{user_id}:{seq}:{issued}".encode()).decode().rstrip("=")
+
+def decode_token(token: str) -> tuple[int, int, int]:
+    """(user id, change sequence, issued at); tokens from before issue times count as expired."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        uid, seq, *issued = raw.split(":")
+        return int(uid), int(seq), int(issued[0]) if issued else 0
+    except (ValueError, UnicodeDecodeError, IndexError):
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+
+
+@router.get("")
+async def sync(
+    db: AnySession = Depends(get_read_db),
+    user: User = Depends(get_current_user),
+    since: Optional[str] = Query(default=None, description="Token from the previous sync; omit for a full snapshot"),
+):
+    """
+    Pieces and sessions changed since `since`, plus the ids deleted since then
+    and a new token to pass next time.
+
+    Without `since` the response is a complete snapshot (`full: true`) that
+    replaces whatever the client had. Clients should apply `deleted` before
+    the upserts. A 410 means the token can't be used (another account, a
+    reset database, or older than the tombstones are kept); sync again
+    without it.
+    """
+    since_seq = None
+    if since is not None:
+        token_uid, since_seq, issued = decode_token(since)
+        if token_uid != user.id:
+            raise HTTPException(status_code=410, detail="Sync token belongs to another user; resync")
+        if time.time() - issued > TOKEN_MAX_AGE.total_seconds():
+            raise HTTPException(status_code=410, detail="Sync token has expired; resync")
+    return json_response(await run_db(db, _sync, user, since_seq))
+
+def _sync(db: DBSession, user: User, since: Optional[int]) -> dict:
+    # Read the version first: every change numbered <= it is already
+    # committed (app/changes.py), so it is safe to hand out as the token.
+    version = db.exec(select(User.data_version).where(User.id == user.id)).one()
+    if since is not None and since > version:
+        raise HTTPException(status_code=410, detail="Sync token is ahead of the server; resync")
+
+    pieces_q = select(
+        Piece.id, Piece.title, Piece.composer, Piece.difficulty, Piece.notes,
+        Piece.created_at, Piece.updated_at,
+    ).where(Piece.owner_id == user.id)
+    sessions_q = select(
+        PracticeSession.id, PracticeSession.piece_id, PracticeSession.practice_date,
+        PracticeSession.minutes, PracticeSession.focus, PracticeSession.notes, PracticeSession.updated_at,
+    ).where(PracticeSession.user_id == user.id)
+    deleted = {"pieces": [], "sessions": []}
+
+    if since is not None:
+        pieces_q = pieces_q.where(Piece.change_seq > since)
+        sessions_q = sessions_q.where(PracticeSession.change_seq > since)
+        for entity, entity_id in db.exec(
+            select(Tombstone.entity, Tombstone.entity_id)
+            .where(Tombstone.user_id == user.id, Tombstone.change_seq > since)
+        ):
+            deleted[entity + "s"].append(entity_id)
+
+    pieces = [
+        {"id": pid, "title": title, "composer": composer, "difficulty": difficulty, "notes": notes,
+         "created_at": created, "updated_at": updated}
+        for pid, title, composer, difficulty, notes, created, updated in db.exec(pieces_q)
+    ]
+    sessions = [
+        {"id": sid, "piece_id": piece_id, "practice_date": d.isoformat(), "minutes": minutes,
+         "focus": focus, "notes": notes, "updated_at": updated}
+        for sid, piece_id, d, minutes, focus, notes, updated in db.exec(sessions_q)
+    ]
+    return {
+        "token": encode_token(user.id, version),
+        "full": since is None,
+        "pieces": pieces,
+        "sessions": sessions,
+        "deleted": deleted,
+    }
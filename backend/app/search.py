@@ -0,0 +1,234 @@
+"""
+Full-text search over pieces (title, composer, notes) and practice sessions
+(focus, notes).
+
+  * SQLite: FTS5 tables `pieces_fts` / `sessions_fts` with external content
+    (the rows themselves stay in pieces / practice_sessions), kept current by
+    triggers and ranked with bm25(). The owner id is an indexed column too,
+    so a user's matches are an index intersection rather than a post-filter.
+  * Postgres: GIN expression indexes over weighted `to_tsvector('simple', ..)`,
+    ranked with ts_rank(). The query repeats the exact indexed expression, or
+    the planner can't use the index. Text and query both go through
+    f_unaccent(), an IMMUTABLE wrapper around the unaccent extension (plain
+    unaccent() is only STABLE, which an index expression can't use), so
+    "dvorak" finds "Dvořák" as it does with FTS5's remove_diacritics.
+
+Every search term is a prefix match ("chop noct" finds "Chopin - Nocturne
+Op. 9"), which is what a typeahead box wants. Terms are reduced to word
+characters before being put into the MATCH / tsquery syntax.
+
+The index is created (and back-filled) by migration 6, and migration 7
+rebuilds the Postgres one over unaccented text; rebuild it with
+
+    python -m app.search --rebuild
+"""
+
+from __future__ import annotations
+import re
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlmodel import Session as DBSession
+
+MAX_TERMS = 8
+
+_PIECE_WEIGHTS = (0.0, 10.0, 5.0, 1.0)     # owner_id, title, composer, notes
+_SESSION_WEIGHTS = (0.0, 4.0, 1.0)         # user_id, focus, notes
+
+_PG_PIECE_VECTOR = (
+    "(setweight(to_tsvector('simple', f_unaccent(coalesce(title, ''))), 'A') || "
+    "setweight(to_tsvector('simple', f_unaccent(coalesce(composer, ''))), 'B') || "
+    "setweight(to_tsvector('simple', f_unaccent(coalesce(notes, ''))), 'C'))"
+)
+_PG_SESSION_VECTOR = (
+    "(setweight(to_tsvector('simple', f_unaccent(coalesce(focus, ''))), 'A') || "
+    "setweight(to_tsvector('simple', f_unaccent(coalesce(notes, ''))), 'B'))"
+)
+_PG_QUERY = "to_tsquery('simple', f_unaccent(:q))"
+
+_SQLITE_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS pieces_fts USING fts5(
+        owner_id, title, composer, notes,
+        content='pieces', content_rowid='id',
+        prefix='2 3', tokenize='unicode61 remove_diacritics 2')""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS sessions_fts USING fts5(
+        user_id, focus, notes,
+        content='practice_sessions', content_rowid='id',
+        prefix='2 3', tokenize='unicode61 remove_diacritics 2')""",
+    """CREATE TRIGGER IF NOT EXISTS pieces_fts_ai AFTER INSERT ON pieces BEGIN
+        INSERT INTO pieces_fts(rowid, owner_id, title, composer, notes)
+        VALUES (new.id, new.owner_id, new.title, new.composer, new.notes);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS pieces_fts_ad AFTER DELETE ON pieces BEGIN
+        INSERT INTO pieces_fts(pieces_fts, rowid, owner_id, title, composer, notes)
+        VALUES ('delete', old.id, old.owner_id, old.title, old.composer, old.notes);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS pieces_fts_au AFTER UPDATE OF owner_id, title, composer, notes ON pieces BEGIN
+        INSERT INTO pieces_fts(pieces_fts, rowid, owner_id, title, composer, notes)
+        VALUES ('delete', old.id, old.owner_id, old.title, old.composer, old.notes);
+        INSERT INTO pieces_fts(rowid, owner_id, title, composer, notes)
+        VALUES (new.id, new.owner_id, new.title, new.composer, new.notes);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS sessions_fts_ai AFTER INSERT ON practice_sessions BEGIN
+        INSERT INTO sessions_fts(rowid, user_id, focus, notes)
+        VALUES (new.id, new.user_id, new.focus, new.notes);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS sessions_fts_ad AFTER DELETE ON practice_sessions BEGIN
+        INSERT INTO sessions_fts(sessions_fts, rowid, user_id, focus, notes)
+        VALUES ('delete', old.id, old.user_id, old.focus, old.notes);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS sessions_fts_au AFTER UPDATE OF user_id, focus, notes ON practice_sessions BEGIN
+        INSERT INTO sessions_fts(sessions_fts, rowid, user_id, focus, notes)
+        VALUES ('delete', old.id, old.user_id, old.focus, old.notes);
+        INSERT INTO sessions_fts(rowid, user_id, focus, notes)
+        VALUES (new.id, new.user_id, new.focus, new.notes);
+    END""",
+]
+
+_PG_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    # the dictionary is named explicitly so the result can't depend on search_path
+    """CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$""",
+    f"CREATE INDEX IF NOT EXISTS ix_pieces_search ON pieces USING gin ({_PG_PIECE_VECTOR})",
+    f"CREATE INDEX IF NOT EXISTS ix_practice_sessions_search ON practice_sessions USING gin ({_PG_SESSION_VECTOR})",
+]
+
+
+def create_search_index(conn: Connection) -> None:
+    """Create the index structures for this dialect and fill them from existing rows."""
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        for ddl in _SQLITE_DDL:
+            conn.execute(text(ddl))
+        rebuild_search_index(conn)
+    elif dialect == "postgresql":
+        for ddl in _PG_DDL:
+            conn.execute(text(ddl))
+
+
+def fold_accents_pg(conn: Connection) -> None:
+    """Rebuild the Postgres indexes over unaccented text (no-op elsewhere)."""
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("DROP INDEX IF EXISTS ix_pieces_search"))
+        conn.execute(text("DROP INDEX IF EXISTS ix_practice_sessions_search"))
+        create_search_index(conn)
+
+
+def rebuild_search_index(conn: Connection) -> None:
+    """Re-read every row into the FTS tables (SQLite; Postgres indexes can't drift)."""
+    if conn.dialect.name == "sqlite":
+        conn.execute(text("INSERT INTO pieces_fts(pieces_fts) VALUES ('rebuild')"))
+        conn.execute(text("INSERT INTO sessions_fts(sessions_fts) VALUES ('rebuild')"))
+
+
+def search_terms(q: str) -> list[str]:
+    """Lower-cased word tokens of a user query (at most MAX_TERMS)."""
+    return re.findall(r"\w+", q.lower())[:MAX_TERMS]
+
+
+def _fts5_query(owner_column: str, owner_id: int, columns: str, terms: list[str]) -> str:
+    match = " AND ".join(f'"{t}"*' for t in terms)
+    return f'{owner_column}:"{owner_id}" AND {{{columns}}}: ({match})'
+
+
+def _tsquery(terms: list[str]) -> str:
+    return " & ".join(f"{t}:*" for t in terms)
+
+
+_PG_PIECES_SQL = f"""
+    SELECT p.id, p.title, p.composer, p.difficulty, p.notes,
+           ts_rank({_PG_PIECE_VECTOR}, q) AS score
+    FROM pieces p, {_PG_QUERY} q
+    WHERE p.owner_id = :uid AND {_PG_PIECE_VECTOR} @@ q
+    ORDER BY score DESC, p.id DESC
+    LIMIT :limit OFFSET :offset
+"""
+
+
+def _pg_sessions_sql(piece_filter: str) -> str:
+    # The match runs over practice_sessions alone: the vector's bare column
+    # names (notes!) must resolve to that table, and must stay textually
+    # identical to the ix_practice_sessions_search expression. pieces is
+    # joined outside for the title.
+    return f"""
+        SELECT m.id, m.piece_id, p.title, m.practice_date, m.minutes, m.focus, m.notes, m.score
+        FROM (
+            SELECT s.id, s.piece_id, s.practice_date, s.minutes, s.focus, s.notes,
+                   ts_rank({_PG_SESSION_VECTOR}, q) AS score
+            FROM practice_sessions s, {_PG_QUERY} q
+            WHERE s.user_id = :uid AND {_PG_SESSION_VECTOR} @@ q {piece_filter}
+        ) m
+        JOIN pieces p ON p.id = m.piece_id
+        ORDER BY m.score DESC, m.practice_date DESC, m.id DESC
+        LIMIT :limit OFFSET :offset
+    """
+
+
+def search_pieces(db: DBSession, user_id: int, terms: list[str], limit: int, offset: int) -> list[dict]:
+    if db.get_bind().dialect.name == "postgresql":
+        sql = _PG_PIECES_SQL
+        params = {"q": _tsquery(terms), "uid": user_id, "limit": limit, "offset": offset}
+    else:
+        weights = ", ".join(map(str, _PIECE_WEIGHTS))
+        sql = f"""
+            SELECT p.id, p.title, p.composer, p.difficulty, p.notes,
+                   -bm25(pieces_fts, {weights}) AS score
+            FROM pieces_fts JOIN pieces p ON p.id = pieces_fts.rowid
+            WHERE pieces_fts MATCH :q
+            ORDER BY bm25(pieces_fts, {weights}), p.id DESC
+            LIMIT :limit OFFSET :offset
+        """
+        params = {"q": _fts5_query("owner_id", user_id, "title composer notes", terms),
+                  "limit": limit, "offset": offset}
+    return [
+        {"id": pid, "title": title, "composer": composer, "difficulty": difficulty, "notes": notes,
+         "score": round(score, 6)}
+        for pid, title, composer, difficulty, notes, score in db.exec(text(sql), params=params)
+    ]
+
+
+def search_sessions(db: DBSession, user_id: int, terms: list[str], limit: int, offset: int,
+                    piece_id: Optional[int] = None) -> list[dict]:
+    piece_filter = "AND s.piece_id = :piece_id" if piece_id is not None else ""
+    if db.get_bind().dialect.name == "postgresql":
+        sql = _pg_sessions_sql(piece_filter)
+        params = {"q": _tsquery(terms), "uid": user_id, "limit": limit, "offset": offset}
+    else:
+        weights = ", ".join(map(str, _SESSION_WEIGHTS))
+        sql = f"""
+            SELECT s.id, s.piece_id, p.title, s.practice_date, s.minutes, s.focus, s.notes,
+                   -bm25(sessions_fts, {weights}) AS score
+            FROM sessions_fts
+            JOIN practice_sessions s ON s.id = sessions_fts.rowid
+            JOIN pieces p ON p.id = s.piece_id
+            WHERE sessions_fts MATCH :q {piece_filter}
+            ORDER BY bm25(sessions_fts, {weights}), s.practice_date DESC, s.id DESC
+            LIMIT :limit OFFSET :offset
+        """
+        params = {"q": _fts5_query("user_id", user_id, "focus notes", terms),
+                  "limit": limit, "offset": offset}
+    if piece_id is not None:
+        params["piece_id"] = piece_id
+    return [
+        {"id": sid, "piece_id": pid, "piece_title": title, "practice_date": str(d), "minutes": minutes,
+         "focus": focus, "notes": notes, "score": round(score, 6)}
+        for sid, pid, title, d, minutes, focus, notes, score in db.exec(text(sql), params=params)
+    ]
+
+
+if __name__ == "__main__":
+    import argparse
+    from .db import engine, init_db
+
+    parser = argparse.ArgumentParser(description="Manage the full-text search index.")
+    parser.add_argument("--rebuild", action="store_true", help="re-index every piece and session")
+    args = parser.parse_args()
+
+    init_db()
+    if args.rebuild:
+        with engine.begin() as conn:
+            rebuild_search_index(conn)
+        print("search index rebuilt")
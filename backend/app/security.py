@@ -1,10 +1,12 @@
 from fastapi import Request, HTTPException, status, Depends
 from jose import jwt, JWTError
 from sqlmodel import select
-from app.db import get_db
+from app.db import AnySession, get_read_db, run_db
+from app.cache import TTLCache
 from app.models import User
 from sqlmodel import Session as DBSession
 import os
+import time
 
 # Load environment secret
 SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret")
@@ -36,24 +38,66 @@ def get_user_name(request: Request) -> str:
     return request.cookies.get("user_name", "Guest")
 
 # -------------------------------
-# 3. Real get_current_user — returns full User object
+# 3. Verified-token cache
 # -------------------------------
-def get_current_user(
+# token -> snapshot of the User row. A hit skips both the JWT decode (the entry
+# never outlives the token's exp) and the users-table lookup. Entries are
+# dropped on logout and whenever auth_callback changes the profile.
+user_cache = TTLCache(
+    maxsize=int(os.getenv("AUTH_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("AUTH_CACHE_TTL", "60")),
+    name="auth_user",
+)
+
+def invalidate_cached_user(token: str | None = None, email: str | None = None) -> None:
+    """Forget one token, or every cached token belonging to `email`."""
+    if token:
+        user_cache.pop(token)
+    if email:
+        user_cache.pop_where(lambda _token, snap: snap["email"] == email)
+
+# -------------------------------
+# 4. Real get_current_user — returns full User object
+# -------------------------------
+async def get_current_user(
     request: Request,
-    db: DBSession = Depends(get_db)
+    db: AnySession = Depends(get_read_db)
 ) -> User:
-    """Returns the User object corresponding to the current JWT-authenticated user."""
+    """
+    Returns the User for the current JWT cookie.
+
+    Always a detached User built from a snapshot of the row; handlers only
+    read its attributes.
+    """
     token = request.cookies.get(COOKIE_NAME)
     if not token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing auth cookie")
+
+    snap = user_cache.get(token)
+    if snap is not None:
+        return User(**snap)
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
         email = payload.get("sub")
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
-    user = db.exec(select(User).where(User.email == email)).first()
+    user = await run_db(db, _load_user, payload.get("uid"), email)
     if not user:
         # if you want, you could auto-create here; but better to require login flow to create
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    return user
\ No newline at end of file
+
+    # Detached, like cache hits: on a write request the session is get_db's,
+    # and the handler's commit would otherwise expire (and reload) the row.
+    snap = user.model_dump()
+    exp = payload.get("exp")
+    user_cache.set(token, snap, ttl=(exp - time.time()) if exp else None)
+    return User(**snap)
+
+def _load_user(db: DBSession, uid: int | None, email: str | None) -> User | None:
+    # Newer tokens carry the user id, which is a primary-key lookup
+    user = db.get(User, uid) if uid is not None else None
+    if user is None or user.email != email:
+        user = db.exec(select(User).where(User.email == email)).first()
+    return user
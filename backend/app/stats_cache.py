@@ -0,0 +1,133 @@
+"""
+Per-user cache of computed stats responses.
+
+Overview, by-day, series and /api/me only change when the user writes or the
+date rolls over, so their results are cached per (user, date, endpoint +
+params) until midnight. Every entry also records the user's data_version
+(read anyway by conditional_get), and a version mismatch counts as a miss.
+That keeps per-process caches correct when another worker handled the write.
+The write paths in routes/sessions.py and routes/pieces.py additionally drop
+the user's entries right after committing.
+
+Backends (STATS_CACHE_BACKEND):
+  * memory (default): a TTLCache per process.
+  * redis: one hash per user at REDIS_URL, shared by all workers; needs the
+    `redis` package.
+  * off: compute every time.
+
+"Midnight" is the server's, the same clock the stats use for "today".
+"""
+
+from __future__ import annotations
+import json
+import os
+from datetime import date, datetime, time as dtime, timedelta
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi.encoders import jsonable_encoder
+
+from .cache import TTLCache
+
+STATS_CACHE_BACKEND = os.getenv("STATS_CACHE_BACKEND", "memory").lower()
+STATS_CACHE_SIZE = int(os.getenv("STATS_CACHE_SIZE", "4096"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+
+def seconds_until_midnight(now: Optional[datetime] = None) -> float:
+    now = now or datetime.now()
+    midnight = datetime.combine(now.date() + timedelta(days=1), dtime.min)
+    return (midnight - now).total_seconds()
+
+
+class MemoryBackend:
+    def __init__(self, maxsize: int):
+        self._cache = TTLCache(maxsize, ttl=24 * 3600, name="stats")
+
+    async def get(self, user_id: int, field: str) -> Any:
+        return self._cache.get((user_id, field))
+
+    async def set(self, user_id: int, field: str, entry: Any) -> None:
+        self._cache.set((user_id, field), entry, ttl=seconds_until_midnight())
+
+    async def invalidate(self, user_id: int) -> None:
+        self._cache.pop_where(lambda key, _entry: key[0] == user_id)
+
+    def size(self) -> int:
+        return self._cache.stats()["size"]
+
+
+class RedisBackend:
+    """One hash per user (`pt:stats:<id>`), expiring at the next midnight."""
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis   # optional dependency
+        self._redis = redis.from_url(url)
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"pt:stats:{user_id}"
+
+    async def get(self, user_id: int, field: str) -> Any:
+        raw = await self._redis.hget(self._key(user_id), field)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, user_id: int, field: str, entry: Any) -> None:
+        key = self._key(user_id)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, field, json.dumps(entry))
+            pipe.expire(key, max(1, int(seconds_until_midnight())))
+            await pipe.execute()
+
+    async def invalidate(self, user_id: int) -> None:
+        await self._redis.delete(self._key(user_id))
+
+    def size(self) -> int:
+        return 0   # lives in Redis; not tracked per process
+
+
+class StatsCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self.name = "stats"
+        self.hits = 0
+        self.misses = 0
+
+    async def get_or_compute(self, user_id: int, version: int, name: str,
+                             compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Cached JSON-ready result of `compute()` for today's date and `version`."""
+        if self.backend is None:
+            return await compute()
+        field = f"{date.today().isoformat()}|{name}"
+        entry = await self.backend.get(user_id, field)
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        value = jsonable_encoder(await compute())
+        await self.backend.set(user_id, field, [version, value])
+        return value
+
+    async def invalidate(self, user_id: int) -> None:
+        if self.backend is not None:
+            await self.backend.invalidate(user_id)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "name": self.name,
+            "size": self.backend.size() if self.backend is not None else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
+
+
+def _backend():
+    if STATS_CACHE_BACKEND == "off":
+        return None
+    if STATS_CACHE_BACKEND == "redis":
+        return RedisBackend(REDIS_URL)
+    return MemoryBackend(STATS_CACHE_SIZE)
+
+
+stats_cache = StatsCache(_backend())
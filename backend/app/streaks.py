@@ -0,0 +1,153 @@
+"""
+Incrementally maintained practice streaks.
+
+Each user's practice days are stored as maximal runs of consecutive dates in
+`practice_runs`, and `user_streaks` keeps the summary the API needs: the
+latest run (its end is the last practice date) and the longest run length.
+
+add_day / remove_day are called by app/rollups.py whenever a day gains its
+first session or loses its last one, so they only touch the neighbouring runs
+(a back-dated day between two runs merges them; removing a day splits its
+run). rebuild_streaks recomputes everything from user_daily_totals.
+"""
+
+from __future__ import annotations
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, insert
+from sqlmodel import Session as DBSession, select, func
+
+from .models import PracticeRun, UserDailyTotal, UserStreak
+
+ONE_DAY = timedelta(days=1)
+
+
+def _run_at(db: DBSession, user_id: int, **match) -> Optional[PracticeRun]:
+    q = select(PracticeRun).where(PracticeRun.user_id == user_id)
+    for column, value in match.items():
+        q = q.where(getattr(PracticeRun, column) == value)
+    return db.exec(q).first()
+
+
+def _run_containing(db: DBSession, user_id: int, d: date) -> Optional[PracticeRun]:
+    return db.exec(
+        select(PracticeRun)
+        .where(PracticeRun.user_id == user_id,
+               PracticeRun.end_date >= d,
+               PracticeRun.start_date <= d)
+        .order_by(PracticeRun.end_date.asc())
+    ).first()
+
+
+def _refresh_summary(db: DBSession, user_id: int) -> None:
+    """Re-derive the summary row from the runs (two index lookups)."""
+    latest = db.exec(
+        select(PracticeRun)
+        .where(PracticeRun.user_id == user_id)
+        .order_by(PracticeRun.end_date.desc())
+    ).first()
+    longest = db.exec(
+        select(func.coalesce(func.max(PracticeRun.length_days), 0))
+        .where(PracticeRun.user_id == user_id)
+    ).one()
+
+    state = db.get(UserStreak, user_id) or UserStreak(user_id=user_id)
+    state.current_start = latest.start_date if latest else None
+    state.current_end = latest.end_date if latest else None
+    state.longest_days = int(longest or 0)
+    db.add(state)
+
+
+def add_day(db: DBSession, user_id: int, d: date) -> None:
+    """Record that `d` became a practice day."""
+    left = _run_at(db, user_id, end_date=d - ONE_DAY)
+    right = _run_at(db, user_id, start_date=d + ONE_DAY)
+
+    if left and right:
+        # back-dated day bridging two runs
+        left.end_date = right.end_date
+        db.delete(right)
+        run = left
+    elif left:
+        left.end_date = d
+        run = left
+    elif right:
+        right.start_date = d
+        run = right
+    else:
+        run = PracticeRun(user_id=user_id, start_date=d, end_date=d)
+    run.length_days = (run.end_date - run.start_date).days + 1
+    db.add(run)
+    db.flush()
+
+    state = db.get(UserStreak, user_id)
+    if state is None:
+        _refresh_summary(db, user_id)
+        return
+    state.longest_days = max(state.longest_days, run.length_days)
+    if state.current_end is None or run.end_date >= state.current_end:
+        state.current_start, state.current_end = run.start_date, run.end_date
+    db.add(state)
+
+
+def remove_day(db: DBSession, user_id: int, d: date) -> None:
+    """Record that `d` no longer has any practice."""
+    run = _run_containing(db, user_id, d)
+    if run is None:
+        return
+
+    if run.start_date < d:
+        db.add(PracticeRun(user_id=user_id, start_date=run.start_date, end_date=d - ONE_DAY,
+                           length_days=(d - run.start_date).days))
+    if d < run.end_date:
+        db.add(PracticeRun(user_id=user_id, start_date=d + ONE_DAY, end_date=run.end_date,
+                           length_days=(run.end_date - d).days))
+    db.delete(run)
+    db.flush()
+    _refresh_summary(db, user_id)
+
+
+def current_streak(db: DBSession, state: Optional[UserStreak], today: date) -> int:
+    """Consecutive practice days ending today (0 if today has no practice)."""
+    if state is None or state.current_end is None:
+        return 0
+    if state.current_start <= today <= state.current_end:
+        return (today - state.current_start).days + 1
+    if state.current_end < today:
+        return 0
+    # latest run is future-dated; today's run (if any) is an older one
+    run = _run_containing(db, state.user_id, today)
+    return (today - run.start_date).days + 1 if run else 0
+
+
+def rebuild_streaks(db: DBSession, user_id: Optional[int] = None) -> None:
+    """Full recompute of runs and summaries from the daily rollup."""
+    clear_runs = delete(PracticeRun)
+    clear_state = delete(UserStreak)
+    days_q = select(UserDailyTotal.user_id, UserDailyTotal.practice_date)
+    if user_id is not None:
+        clear_runs = clear_runs.where(PracticeRun.user_id == user_id)
+        clear_state = clear_state.where(UserStreak.user_id == user_id)
+        days_q = days_q.where(UserDailyTotal.user_id == user_id)
+    db.exec(clear_runs)
+    db.exec(clear_state)
+
+    runs: list[dict] = []
+    for uid, d in db.exec(days_q.order_by(UserDailyTotal.user_id, UserDailyTotal.practice_date)):
+        last = runs[-1] if runs else None
+        if last and last["user_id"] == uid and last["end_date"] == d - ONE_DAY:
+            last["end_date"] = d
+            last["length_days"] += 1
+        else:
+            runs.append({"user_id": uid, "start_date": d, "end_date": d, "length_days": 1})
+
+    summaries: dict[int, dict] = {}
+    for r in runs:
+        s = summaries.setdefault(r["user_id"], {"user_id": r["user_id"], "longest_days": 0})
+        s["current_start"], s["current_end"] = r["start_date"], r["end_date"]
+        s["longest_days"] = max(s["longest_days"], r["length_days"])
+
+    if runs:
+        db.exec(insert(PracticeRun), params=runs)
+        db.exec(insert(UserStreak), params=list(summaries.values()))
@@ -0,0 +1,144 @@
+"""
+A minimal OpenID Connect provider for local development and the login bench.
+
+Implements just what /login and /auth/callback use: discovery, JWKS, an
+authorization endpoint that approves immediately (email from ?login_hint=,
+default fake@example.com) and a token endpoint that issues an RS256 ID token
+carrying the nonce and at_hash. `hits` counts requests per path, and
+`rotate()` switches to a new signing key. `algorithms` is what discovery
+advertises (tests use it to offer algorithms the app must still refuse).
+
+In-process (no sockets), as bench/login.py does:
+
+    fake = FakeOIDC("http://fake-oidc")
+    oidc.provider.transport = httpx.ASGITransport(app=fake.app)
+
+Standalone, to log in without Google:
+
+    cd backend
+    python -m bench.fake_oidc --port 9000
+    OIDC_ISSUER=http://127.0.0.1:9000 uvicorn app.main:app
+"""
+
+from __future__ import annotations
+import argparse
+import base64
+import hashlib
+import secrets
+import time
+from collections import Counter
+from urllib.parse import parse_qsl, urlencode
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, RedirectResponse
+from starlette.routing import Route
+
+
+def _b64(n: int) -> str:
+    raw = n.to_bytes((n.bit_length() + 7) // 8, "big")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _at_hash(access_token: str) -> str:
+    digest = hashlib.sha256(access_token.encode()).digest()
+    return base64.urlsafe_b64encode(digest[:16]).rstrip(b"=").decode()
+
+
+class FakeOIDC:
+    def __init__(self, issuer: str, max_age: int = 3600, algorithms: tuple[str, ...] = ("RS256",)):
+        self.issuer = issuer.rstrip("/")
+        self.max_age = max_age
+        self.algorithms = list(algorithms)
+        self.hits: Counter[str] = Counter()
+        self._codes: dict[str, dict] = {}
+        self.rotate()
+        self.app = Starlette(routes=[
+            Route("/.well-known/openid-configuration", self.discovery),
+            Route("/jwks", self.jwks),
+            Route("/authorize", self.authorize_endpoint),
+            Route("/token", self.token, methods=["POST"]),
+        ])
+
+    def rotate(self) -> None:
+        """Sign from now on with a fresh key (new kid); JWKS serves only the new one."""
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.kid = secrets.token_hex(8)
+        self._key = jwk.construct(key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        ), "RS256")   # parsed once; re-reading the PEM per token costs ~60 ms
+        pub = key.public_key().public_numbers()
+        self._jwk = {"kty": "RSA", "use": "sig", "alg": "RS256", "kid": self.kid,
+                     "n": _b64(pub.n), "e": _b64(pub.e)}
+
+    def _cached(self, body: dict) -> JSONResponse:
+        return JSONResponse(body, headers={"Cache-Control": f"public, max-age={self.max_age}"})
+
+    async def discovery(self, request: Request) -> JSONResponse:
+        self.hits["discovery"] += 1
+        return self._cached({
+            "issuer": self.issuer,
+            "authorization_endpoint": f"{self.issuer}/authorize",
+            "token_endpoint": f"{self.issuer}/token",
+            "jwks_uri": f"{self.issuer}/jwks",
+            "response_types_supported": ["code"],
+            "subject_types_supported": ["public"],
+            "id_token_signing_alg_values_supported": self.algorithms,
+        })
+
+    async def jwks(self, request: Request) -> JSONResponse:
+        self.hits["jwks"] += 1
+        return self._cached({"keys": [self._jwk]})
+
+    def authorize(self, params: dict) -> str:
+        """Approve an authorization request; returns the callback URL with code and state."""
+        self.hits["authorize"] += 1
+        code = secrets.token_urlsafe(16)
+        self._codes[code] = {
+            "client_id": params["client_id"],
+            "nonce": params.get("nonce"),
+            "email": params.get("login_hint") or "fake@example.com",
+        }
+        return params["redirect_uri"] + "?" + urlencode({"code": code, "state": params["state"]})
+
+    async def authorize_endpoint(self, request: Request) -> RedirectResponse:
+        return RedirectResponse(self.authorize(dict(request.query_params)), status_code=302)
+
+    async def token(self, request: Request) -> JSONResponse:
+        self.hits["token"] += 1
+        # the client posts application/x-www-form-urlencoded
+        form = dict(parse_qsl((await request.body()).decode()))
+        grant = self._codes.pop(form.get("code"), None)
+        if grant is None:
+            return JSONResponse({"error": "invalid_grant"}, status_code=400)
+        access_token = secrets.token_urlsafe(24)
+        now = int(time.time())
+        email = grant["email"]
+        claims = {
+            "iss": self.issuer, "aud": grant["client_id"], "sub": email,
+            "iat": now, "exp": now + 3600, "email": email, "email_verified": True,
+            "name": email.split("@")[0].title(), "picture": None,
+            "at_hash": _at_hash(access_token),
+        }
+        if grant["nonce"]:
+            claims["nonce"] = grant["nonce"]
+        id_token = jwt.encode(claims, self._key, algorithm="RS256", headers={"kid": self.kid})
+        return JSONResponse({"access_token": access_token, "token_type": "Bearer",
+                             "expires_in": 3600, "id_token": id_token})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a fake OpenID Connect provider.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    args = parser.parse_args()
+    import uvicorn
+    fake = FakeOIDC(f"http://{args.host}:{args.port}")
+    uvicorn.run(fake.app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Cost of /api/stats/insights on a long practice history.
+
+Seeds one user with --years of daily practice (1-3 pieces a day, pieces
+rotating over time) in a temporary SQLite database, then compares:
+
+  * columnar: app.analytics -- the period's (piece, day, minutes) rows in
+              array('i') columns plus per-piece totals aggregated in SQL,
+              C-level passes (prefix sums, strided slices, map/sum)
+  * naive:    every row as tuples, the same results computed with per-row
+              Python loops and dict lookups
+
+Both are checked to return the same result. Times are the best of --repeat
+runs (process CPU), split into the SQL load and the computation. Memory is
+what the load keeps allocated, and the tracemalloc peak while computing.
+
+    cd backend
+    python -m bench.insights --years 12
+"""
+
+from __future__ import annotations
+import argparse
+import math
+import random
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import date, timedelta
+from statistics import fmean, pstdev
+from typing import Callable
+
+from sqlalchemy import insert
+from sqlmodel import Session, SQLModel, create_engine, select, func
+
+from app import analytics
+from app.models import Piece, PracticeSession, User
+
+
+def seed(engine, years: int, rng: random.Random) -> int:
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as db:
+        user = User(email="insights@bench.example"); db.add(user); db.commit(); db.refresh(user)
+        pieces = []
+        for i in range(40):
+            p = Piece(owner_id=user.id, title=f"Piece {i}"); db.add(p); db.commit(); db.refresh(p)
+            pieces.append(p.id)
+        today = date.today()
+        rows = []
+        for back in range(years * 366):
+            d = today - timedelta(days=back)
+            if rng.random() < 0.15:
+                continue   # a day off
+            active = pieces[(back // 90) % 37:(back // 90) % 37 + 4]   # repertoire changes each quarter
+            for piece_id in rng.sample(active, rng.randint(1, 3)):
+                rows.append({"user_id": user.id, "piece_id": piece_id, "practice_date": d,
+                             "minutes": rng.randint(5, 60)})
+        db.exec(insert(PracticeSession), params=rows)
+        db.commit()
+        return user.id
+
+
+def naive_insights(rows: list, titles: dict, today: date, days: int, goal_minutes: int) -> dict:
+    """Reference implementation over row tuples; must match analytics.insights()."""
+    start = today - timedelta(days=days - 1)
+    per_day: dict[date, int] = defaultdict(int)
+    for _piece_id, d, m in rows:
+        per_day[d] += m
+
+    def window_avg(end: date, w: int) -> float:
+        return round(sum(per_day.get(end - timedelta(days=k), 0) for k in range(w)) / w, 2)
+
+    dates = [start + timedelta(days=i) for i in range(days)]
+    avg_7 = [window_avg(d, 7) for d in dates]
+    avg_30 = [window_avg(d, 30) for d in dates]
+    daily = [per_day.get(d, 0) for d in dates]
+    total = sum(daily)
+
+    wd_minutes, wd_active = [0] * 7, [0] * 7
+    for d, m in zip(dates, daily):
+        wd_minutes[d.weekday()] += m
+        wd_active[d.weekday()] += 1 if m else 0
+    wd_total = sum(wd_minutes)
+
+    offset = days % 7
+    weekly = [sum(daily[i:i + 7]) for i in range(offset, days - 6, 7)]
+    mean = fmean(weekly) if weekly else 0.0
+    cv = pstdev(weekly, mean) / mean if mean else None
+    active = sum(1 for m in daily if m)
+    longest, gap = 0, 0
+    for m in daily:
+        gap = 0 if m else gap + 1
+        longest = max(longest, gap)
+
+    by_piece: dict[int, list] = defaultdict(list)
+    for piece_id, d, m in rows:
+        by_piece[piece_id].append((d, m))
+    n = days
+    xs = range(n)
+    mx = fmean(xs)
+    pieces = []
+    for piece_id, entries in by_piece.items():
+        series = [0] * n
+        recent = 0
+        for d, m in entries:
+            if start <= d <= today:
+                series[(d - start).days] += m
+            if today - timedelta(days=29) <= d <= today:
+                recent += m
+        my = fmean(series)
+        sxx = sum((x - mx) ** 2 for x in xs)
+        slope = sum((x - mx) * (y - my) for x, y in zip(xs, series)) / sxx if sxx else 0.0
+        piece_total = sum(m for _, m in entries)
+        rate = recent / 30
+        remaining = max(goal_minutes - piece_total, 0)
+        days_left = 0 if remaining == 0 else (math.ceil(remaining / rate) if rate > 0 else None)
+        pieces.append({
+            "piece_id": piece_id, "title": titles.get(piece_id),
+            "minutes": sum(series), "active_days": sum(1 for y in series if y),
+            "trend_minutes_per_week": round(slope * 49, 2),
+            "total_minutes": piece_total,
+            "last_practiced": max(d for d, _ in entries).isoformat(),
+            "recent_daily_average": round(rate, 2),
+            "goal": {"minutes": goal_minutes, "remaining_minutes": remaining, "days_to_goal": days_left,
+                     "projected_date": (today + timedelta(days=days_left)).isoformat()
+                     if days_left is not None else None},
+        })
+    pieces.sort(key=lambda p: (-p["minutes"], -p["total_minutes"], p["piece_id"]))
+    return {
+        "start": start.isoformat(), "end": today.isoformat(), "days": days, "total_minutes": total,
+        "averages": {"last_7_days": avg_7[-1], "last_30_days": avg_30[-1], "period": round(total / days, 2)},
+        "rolling": {"dates": [d.isoformat() for d in dates], "avg_7": avg_7, "avg_30": avg_30},
+        "weekday": {"labels": list(analytics.WEEKDAYS), "minutes": wd_minutes, "active_days": wd_active,
+                    "share": [round(m / wd_total, 4) if wd_total else 0.0 for m in wd_minutes]},
+        "consistency": {"active_days": active, "active_ratio": round(active / n, 4),
+                        "weekly_cv": round(cv, 4) if cv is not None else None,
+                        "longest_break_days": longest,
+                        "score": round(100 * (active / n) * (1 / (1 + cv) if cv is not None else 0.0))},
+        "pieces": pieces,
+    }
+
+
+def best(fn: Callable, repeat: int):
+    out, t_best = None, float("inf")
+    for _ in range(repeat):
+        t = time.process_time()
+        out = fn()
+        t_best = min(t_best, time.process_time() - t)
+    return out, t_best
+
+
+def peak(fn: Callable) -> int:
+    tracemalloc.start()
+    fn()
+    _, p = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return p
+
+
+def retained(fn: Callable) -> int:
+    """Bytes still allocated after fn() returns, i.e. the size of what it loaded."""
+    tracemalloc.start()
+    out = fn()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del out
+    return size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the insights computation on a long history.")
+    parser.add_argument("--years", type=int, default=12)
+    parser.add_argument("--days", type=int, nargs="+", default=[90, 365, 3660])
+    parser.add_argument("--goal", type=int, default=6000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    today = date.today()
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/insights.db")
+        user_id = seed(engine, args.years, random.Random(1))
+        with Session(engine) as db:
+            sessions = db.exec(select(func.count()).select_from(PracticeSession)).one()
+            print(f"{args.years} years, {sessions} sessions")
+            print(f"{'days':>6} {'path':9} {'load ms':>8} {'load KiB':>9} {'calc ms':>8} {'calc peak KiB':>14}")
+            for days in args.days:
+                since = analytics.period_start(today, days)
+                load_fast = lambda: (analytics.load_practice(db, user_id, since), analytics.load_pieces(db, user_id))
+                load_slow = lambda: (db.exec(
+                    select(PracticeSession.piece_id, PracticeSession.practice_date, func.sum(PracticeSession.minutes))
+                    .where(PracticeSession.user_id == user_id)
+                    .group_by(PracticeSession.piece_id, PracticeSession.practice_date)
+                ).all(), dict(db.exec(select(Piece.id, Piece.title).where(Piece.owner_id == user_id)).all()))
+                (cols, pieces), t_load_fast = best(load_fast, args.repeat)
+                (rows, titles), t_load_slow = best(load_slow, args.repeat)
+                fast = lambda: analytics.insights(cols, pieces, today, days, args.goal)
+                slow = lambda: naive_insights(rows, titles, today, days, args.goal)
+                a, t_fast = best(fast, args.repeat)
+                b, t_slow = best(slow, args.repeat)
+                if a != b:
+                    raise SystemExit(f"days={days}: columnar and naive results differ")
+                print(f"{days:6} {'columnar':9} {t_load_fast * 1000:8.2f} {retained(load_fast) / 1024:9.0f} "
+                      f"{t_fast * 1000:8.2f} {peak(fast) / 1024:14.0f}")
+                print(f"{days:6} {'naive':9} {t_load_slow * 1000:8.2f} {retained(load_slow) / 1024:9.0f} "
+                      f"{t_slow * 1000:8.2f} {peak(slow) / 1024:14.0f}")
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+The /login -> /auth/callback round trip against an in-process fake provider.
+
+Runs N logins for a handful of users through the real app (httpx ASGI
+transports, no sockets, temporary SQLite database) and reports what each
+login cost: requests made to the provider (discovery, JWKS, token) and SQL
+statements over /login + /auth/callback, and the callback's latency. The fake
+rotates its signing key halfway through, so the run also shows the single
+JWKS refetch that a rotation costs.
+
+    cd backend
+    python -m bench.login --logins 200
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+from urllib.parse import parse_qsl, urlsplit
+
+ISSUER = "http://fake-oidc"
+CLIENT_ID = "bench-client"
+
+
+async def run(logins: int, users: int) -> None:
+    import httpx
+    from sqlalchemy import event
+    from bench.fake_oidc import FakeOIDC
+    from app import oidc
+    from app.main import app
+    from app.db import engine, async_engine
+
+    fake = FakeOIDC(ISSUER)
+    oidc.provider.transport = httpx.ASGITransport(app=fake.app)
+
+    statements = 0
+    def count(*_):
+        nonlocal statements
+        statements += 1
+    for e in filter(None, [engine, async_engine and async_engine.sync_engine]):
+        event.listen(e, "before_cursor_execute", count)
+
+    rows = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await app.router.startup()
+        for i in range(logins):
+            if i == logins // 2:
+                fake.rotate()
+            client.cookies.clear()
+            before_hits, before_stmts = Counter(fake.hits), statements
+            resp = await client.get("/login")
+            params = dict(parse_qsl(urlsplit(resp.headers["location"]).query))
+            params["login_hint"] = f"user{i % users}@bench.example"
+            callback = urlsplit(fake.authorize(params))
+
+            t = time.perf_counter()
+            resp = await client.get(f"{callback.path}?{callback.query}")
+            elapsed = time.perf_counter() - t
+            if resp.status_code != 303:
+                raise SystemExit(f"login {i}: {resp.status_code} {resp.text}")
+            hits = fake.hits - before_hits
+            rows.append((elapsed, hits["discovery"], hits["jwks"], hits["token"], statements - before_stmts))
+        await app.router.shutdown()
+
+    def summary(label: str, part: list) -> None:
+        if not part:
+            return
+        ms = sorted(r[0] * 1000 for r in part)
+        print(f"{label:10} {len(part):6} {sum(r[1] for r in part):9} {sum(r[2] for r in part):6} "
+              f"{sum(r[3] for r in part):6} {statistics.mean(r[4] for r in part):8.1f} "
+              f"{statistics.median(ms):8.2f} {ms[int(len(ms) * 0.95) - 1 if len(ms) > 1 else 0]:8.2f}")
+
+    print(f"{logins} logins, {users} users, DB_ASYNC={os.getenv('DB_ASYNC', '0')}")
+    print(f"{'logins':10} {'n':>6} {'discovery':>9} {'jwks':>6} {'token':>6} {'sql/req':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    summary("first", rows[:1])
+    summary("rest", rows[1:])
+    print(f"(signing key rotated before login {logins // 2 + 1})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure the OAuth callback against a fake OIDC provider.")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--users", type=int, default=20)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ.setdefault("DB_URL", f"sqlite:///{tmp}/login.db")
+    os.environ.setdefault("SECRET_KEY", "bench")
+    os.environ["OIDC_ISSUER"] = ISSUER
+    os.environ["GOOGLE_CLIENT_ID"] = CLIENT_ID
+    os.environ["GOOGLE_CLIENT_SECRET"] = "bench-secret"
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    asyncio.run(run(args.logins, args.users))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Drive the real FastAPI app in-process against a seeded database and report
+per-endpoint throughput and latency percentiles.
+
+Requests go through httpx's ASGI transport (no sockets), authenticated with
+session cookies minted by auth.create_session_jwt for the users bench.seed created.
+Results are written as JSON; --compare flags endpoints whose p95 regressed.
+
+    cd backend
+    DB_URL=sqlite:///./bench.db python -m bench.run --requests 500 --concurrency 32
+    DB_URL=sqlite:///./bench.db python -m bench.run --mode async --compare bench/results/baseline.json
+
+Round trips per request are SQL statements plus, when DB_POOL_PRE_PING=1, one
+ping per pool checkout; run once with each setting to see what pre-ping costs.
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Optional
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# (method, path, body factory) -- body factories get (rng, piece_ids) and
+# return the JSON payload for a POST
+Scenario = tuple[str, str, Optional[Callable[[random.Random, list[int]], dict]]]
+
+SCENARIOS: list[Scenario] = [
+    ("GET", "/api/me", None),
+    ("GET", "/api/stats/overview", None),
+    ("GET", "/api/stats/by-day?days=30", None),
+    ("GET", "/api/stats/series?bucket=day&by_piece=true", None),
+    ("GET", "/api/stats/insights?days=365", None),
+    ("GET", "/api/sessions?limit=50", None),
+    ("GET", "/api/sessions", None),
+    ("GET", "/api/pieces", None),
+    ("GET", "/api/pieces/summary", None),
+    ("GET", "/api/search?q=sc", None),
+    ("POST", "/api/pieces", lambda rng, _: {"title": f"Bench piece {rng.randrange(10**6)}"}),
+    ("POST", "/api/sessions", lambda rng, pieces: {
+        "piece_id": rng.choice(pieces),
+        "practice_date": (date.today() - timedelta(days=rng.randrange(30))).isoformat(),
+        "minutes": rng.randint(5, 60),
+    }),
+    # an offline client replaying a new piece and 20 sessions in one transaction
+    ("POST", "/api/batch", lambda rng, _: {"operations": [
+        {"op": "create_piece", "temp_id": "p", "data": {"title": f"Bench piece {rng.randrange(10**6)}"}},
+    ] + [
+        {"op": "create_session", "data": {
+            "piece_id": "p", "minutes": rng.randint(5, 60),
+            "practice_date": (date.today() - timedelta(days=rng.randrange(30))).isoformat(),
+        }} for _ in range(20)
+    ]}),
+]
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * q
+    lo, hi = int(k), min(int(k) + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def _git_rev() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_scenario(client, method: str, path: str, body_fn, users: list[dict],
+                       requests: int, concurrency: int, rng: random.Random) -> dict:
+    from app import metrics
+    from app.db import DB_POOL_PRE_PING as pre_ping
+
+    sem = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    errors = 0
+
+    async def one() -> None:
+        nonlocal errors
+        user = rng.choice(users)
+        kwargs = {"headers": user["headers"]}
+        if body_fn is not None:
+            kwargs["json"] = body_fn(rng, user["pieces"])
+        async with sem:
+            t0 = time.perf_counter()
+            resp = await client.request(method, path, **kwargs)
+            await resp.aread()
+            latencies.append(time.perf_counter() - t0)
+        if resp.status_code >= 400:
+            errors += 1
+
+    statements_before = metrics.statements_total.value
+    checkouts_before = metrics.checkouts_total.value
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    wall = time.perf_counter() - t0
+
+    latencies.sort()
+    ms = lambda v: round(v * 1000, 3)
+    statements = (metrics.statements_total.value - statements_before) / requests
+    checkouts = (metrics.checkouts_total.value - checkouts_before) / requests
+    return {
+        "requests": requests,
+        "errors": errors,
+        "rps": round(requests / wall, 1),
+        "mean_ms": ms(sum(latencies) / len(latencies)),
+        "p50_ms": ms(percentile(latencies, 0.50)),
+        "p95_ms": ms(percentile(latencies, 0.95)),
+        "p99_ms": ms(percentile(latencies, 0.99)),
+        "sql_per_request": round(statements, 2),
+        "checkouts_per_request": round(checkouts, 2),
+        # pre-ping costs one extra round trip per checkout
+        "round_trips_per_request": round(statements + (checkouts if pre_ping else 0), 2),
+    }
+
+
+async def run(args) -> dict:
+    import httpx
+    from sqlmodel import Session, select
+
+    from app.auth import COOKIE_NAME, create_session_jwt
+    from app.db import DB_ASYNC, DB_POOL_PRE_PING, DB_POOL_SIZE, async_engine, engine, init_db
+    from app.main import app
+    from app.models import Piece, User
+    from bench.seed import EMAIL_DOMAIN
+
+    init_db()
+    with Session(engine) as db:
+        rows = db.exec(select(User.id, User.email).where(User.email.like(f"%@{EMAIL_DOMAIN}"))
+                       .order_by(User.id).limit(args.users)).all()
+        if not rows:
+            raise SystemExit("no bench users found; run `python -m bench.seed` first")
+        pieces: dict[int, list[int]] = {}
+        for pid, owner in db.exec(select(Piece.id, Piece.owner_id)
+                                  .where(Piece.owner_id.in_([uid for uid, _ in rows]))):
+            pieces.setdefault(owner, []).append(pid)
+
+    users = [{"headers": {"Cookie": f"{COOKIE_NAME}={create_session_jwt(email, uid=uid)}"}, "pieces": pieces[uid]}
+             for uid, email in rows if uid in pieces]
+    rng = random.Random(args.seed)
+    selected = [s for s in SCENARIOS if not args.only or any(o in f"{s[0]} {s[1]}" for o in args.only)]
+
+    results: dict[str, dict] = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for method, path, body_fn in selected:
+            name = f"{method} {path}"
+            # warm caches / connection pool before measuring
+            await run_scenario(client, method, path, body_fn, users, min(args.warmup, args.requests),
+                               args.concurrency, rng)
+            results[name] = await run_scenario(client, method, path, body_fn, users, args.requests,
+                                               args.concurrency, rng)
+            r = results[name]
+            print(f"{name:55} {r['rps']:>8} req/s  p50 {r['p50_ms']:>8} ms  p95 {r['p95_ms']:>8} ms  "
+                  f"p99 {r['p99_ms']:>8} ms  sql/req {r['sql_per_request']:>5}  "
+                  f"trips/req {r['round_trips_per_request']:>5}  errors {r['errors']}")
+
+    # ASGITransport doesn't send lifespan events, so close async connections
+    # here (aiosqlite's worker threads would otherwise keep the process alive)
+    if async_engine is not None:
+        await async_engine.dispose()
+
+    return {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "git_rev": _git_rev(),
+            "db_backend": engine.url.get_backend_name(),
+            "db_mode": "async" if DB_ASYNC else "sync",
+            "pool_size": DB_POOL_SIZE,
+            "pool_pre_ping": DB_POOL_PRE_PING,
+            "python": platform.python_version(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "users": len(users),
+        },
+        "endpoints": results,
+    }
+
+
+def compare(current: dict, previous: dict, threshold: float) -> list[str]:
+    """Endpoints whose p95 grew by more than `threshold` (0.2 == 20%)."""
+    regressions = []
+    for name, now in current["endpoints"].items():
+        before = previous.get("endpoints", {}).get(name)
+        if not before or not before.get("p95_ms"):
+            continue
+        ratio = now["p95_ms"] / before["p95_ms"]
+        if ratio > 1 + threshold:
+            regressions.append(f"{name}: p95 {before['p95_ms']} ms -> {now['p95_ms']} ms ({ratio:.2f}x)")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="In-process load test of the API.")
+    parser.add_argument("--requests", type=int, default=300, help="measured requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=30)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--users", type=int, default=1000, help="how many seeded users to spread load over")
+    parser.add_argument("--mode", choices=["sync", "async"], default=None,
+                        help="force DB_ASYNC for this run (default: environment)")
+    parser.add_argument("--only", nargs="*", help="substring filter on 'METHOD /path'")
+    parser.add_argument("--out", type=Path, default=None, help="result file (default: bench/results/<stamp>.json)")
+    parser.add_argument("--compare", type=Path, default=None, help="previous result to check against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed p95 growth before flagging")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    # must be decided before app.db is imported
+    if args.mode:
+        os.environ["DB_ASYNC"] = "1" if args.mode == "async" else "0"
+    os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+    result = asyncio.run(run(args))
+
+    out = args.out or RESULTS_DIR / f"{datetime.utcnow():%Y%m%dT%H%M%S}-{result['meta']['db_mode']}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(result, indent=2) + "\n")
+    print(f"results written to {out}")
+
+    if args.compare:
+        regressions = compare(result, json.loads(args.compare.read_text()), args.threshold)
+        for line in regressions:
+            print("REGRESSION", line)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
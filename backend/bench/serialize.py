@@ -0,0 +1,120 @@
+"""
+Per-row cost of turning a large session list into a JSON response body.
+
+Compares, on the same N sessions in a temporary SQLite database:
+
+  * model:  what list_sessions used to do -- load PracticeSession entities,
+            copy each into a SessionOut, then the response_model pass FastAPI
+            runs (validate + dump to JSON-able python) and json.dumps
+  * fast:   select the columns as tuples, zip into dicts, app.fastjson.dumps
+            (orjson when installed)
+  * fast-stdlib: the fast path with orjson disabled (stdlib json fallback)
+
+Time is the best of --repeat runs (process CPU time); allocations are the
+tracemalloc peak during one run. Both are also given per row.
+
+    cd backend
+    python -m bench.serialize --rows 50000
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+from typing import Callable, List
+
+from pydantic import TypeAdapter
+from sqlalchemy import insert
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app import fastjson
+from app.models import Piece, PracticeSession, User
+from app.routes.sessions import SESSION_COLUMNS, SessionOut
+
+FOCUS = [None, "scales", "sight-reading", "left hand", "tempo", "dynamics"]
+
+
+def seed(engine, rows: int, rng: random.Random) -> int:
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as db:
+        user = User(email="serialize@bench.example"); db.add(user); db.commit(); db.refresh(user)
+        piece = Piece(owner_id=user.id, title="Bench piece"); db.add(piece); db.commit(); db.refresh(piece)
+        start = date.today() - timedelta(days=rows)
+        db.exec(insert(PracticeSession), params=[
+            {"user_id": user.id, "piece_id": piece.id, "practice_date": start + timedelta(days=i),
+             "minutes": rng.randint(5, 90), "focus": rng.choice(FOCUS),
+             "notes": "steady tempo, watch the left hand" if i % 3 == 0 else None}
+            for i in range(rows)
+        ])
+        db.commit()
+        return user.id
+
+
+def model_path(engine, user_id: int) -> bytes:
+    adapter = TypeAdapter(List[SessionOut])
+    with Session(engine) as db:
+        entities = db.exec(select(PracticeSession).where(PracticeSession.user_id == user_id)).all()
+        out = [SessionOut(id=r.id, piece_id=r.piece_id, practice_date=r.practice_date,
+                          minutes=r.minutes, focus=r.focus, notes=r.notes) for r in entities]
+    # FastAPI's response_model handling, then JSONResponse.render
+    content = adapter.dump_python(adapter.validate_python(out), mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+def fast_path(engine, user_id: int) -> bytes:
+    with Session(engine) as db:
+        result = db.exec(select(
+            PracticeSession.id, PracticeSession.piece_id, PracticeSession.practice_date,
+            PracticeSession.minutes, PracticeSession.focus, PracticeSession.notes,
+        ).where(PracticeSession.user_id == user_id))
+        return fastjson.dumps(fastjson.row_dicts(SESSION_COLUMNS, result))
+
+
+def measure(fn: Callable[[], bytes], repeat: int) -> dict:
+    fn()   # warm up (statement cache, imports)
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.process_time()
+        body = fn()
+        best = min(best, time.process_time() - t)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"cpu_s": best, "peak_bytes": peak, "body_bytes": len(body)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare JSON serialization paths for large lists.")
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/serialize.db")
+        user_id = seed(engine, args.rows, random.Random(1))
+
+        orjson = fastjson.orjson
+        results = {
+            "model": measure(lambda: model_path(engine, user_id), args.repeat),
+            "fast": measure(lambda: fast_path(engine, user_id), args.repeat),
+        }
+        fastjson.orjson = None
+        results["fast-stdlib"] = measure(lambda: fast_path(engine, user_id), args.repeat)
+        fastjson.orjson = orjson
+        engine.dispose()
+
+    n = args.rows
+    print(f"{n} rows, orjson {'installed' if orjson is not None else 'not installed'}")
+    print(f"{'path':12} {'cpu ms':>9} {'us/row':>8} {'peak MB':>9} {'B/row':>7} {'body MB':>8}")
+    for name, r in results.items():
+        print(f"{name:12} {r['cpu_s'] * 1000:9.1f} {r['cpu_s'] / n * 1e6:8.2f} "
+              f"{r['peak_bytes'] / 2**20:9.1f} {r['peak_bytes'] / n:7.0f} {r['body_bytes'] / 2**20:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
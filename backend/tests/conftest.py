@@ -0,0 +1,103 @@
+"""
+Shared fixtures.
+
+The app reads its settings when app.* is imported, so the environment is set
+here first: a throwaway SQLite database, a fixed SECRET_KEY, no replica and
+sync DB access.
+
+    cd backend
+    python -m pytest -q
+"""
+
+import itertools
+import os
+import sys
+import tempfile
+
+import pytest
+
+_tmp = tempfile.mkdtemp(prefix="piano-tests-")
+os.environ["DB_URL"] = f"sqlite:///{_tmp}/test.db"
+os.environ["DB_READ_URL"] = ""
+os.environ["DB_ASYNC"] = "0"
+os.environ["SECRET_KEY"] = "test-secret"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_emails = itertools.count(1)
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def user(client):
+    """A fresh user, logged in on `client` for the duration of the test."""
+    from sqlmodel import Session
+    from app.auth import create_session_jwt
+    from app.db import engine
+    from app.models import User
+    from app.security import COOKIE_NAME
+
+    with Session(engine, expire_on_commit=False) as db:
+        u = User(email=f"user{next(_emails)}@test.example")
+        db.add(u)
+        db.commit()
+    client.cookies.set(COOKIE_NAME, create_session_jwt(u.email, uid=u.id))
+    yield u
+    client.cookies.clear()
+
+
+@pytest.fixture
+def statements():
+    """(sql, parameters) of every statement run on the primary engine during the test."""
+    from sqlalchemy import event
+    from app.db import engine
+
+    seen: list[tuple[str, tuple]] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        seen.append((" ".join(statement.split()), parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield seen
+    event.remove(engine, "before_cursor_execute", record)
+
+
+# The schema as the first release created it, before any migration existed.
+BASELINE_SCHEMA = (
+    "CREATE TABLE users (id INTEGER NOT NULL, email VARCHAR NOT NULL, display_name VARCHAR,"
+    " picture_url VARCHAR, created_at DATETIME NOT NULL, PRIMARY KEY (id))",
+    "CREATE UNIQUE INDEX ix_users_email ON users (email)",
+    "CREATE TABLE pieces (id INTEGER NOT NULL, owner_id INTEGER NOT NULL, title VARCHAR NOT NULL,"
+    " composer VARCHAR, difficulty VARCHAR, notes VARCHAR, created_at DATETIME NOT NULL,"
+    " PRIMARY KEY (id), FOREIGN KEY(owner_id) REFERENCES users (id))",
+    "CREATE TABLE practice_sessions (id INTEGER NOT NULL, user_id INTEGER NOT NULL,"
+    " piece_id INTEGER NOT NULL, practice_date DATE NOT NULL, minutes INTEGER NOT NULL,"
+    " focus VARCHAR, notes VARCHAR, created_at DATETIME NOT NULL, PRIMARY KEY (id),"
+    " FOREIGN KEY(user_id) REFERENCES users (id), FOREIGN KEY(piece_id) REFERENCES pieces (id))",
+)
+
+
+@pytest.fixture
+def baseline_engine(tmp_path):
+    """An engine on a baseline-schema SQLite database holding one user's practice."""
+    from sqlalchemy import create_engine
+
+    eng = create_engine(f"sqlite:///{tmp_path}/baseline.db")
+    with eng.begin() as conn:
+        for ddl in BASELINE_SCHEMA:
+            conn.exec_driver_sql(ddl)
+        conn.exec_driver_sql("INSERT INTO users VALUES (1, 'old@test.example', NULL, NULL, '2024-01-01 00:00:00')")
+        conn.exec_driver_sql("INSERT INTO pieces VALUES (1, 1, 'Clair de lune', 'Debussy', NULL, NULL,"
+                             " '2024-01-01 00:00:00')")
+        conn.exec_driver_sql("INSERT INTO practice_sessions VALUES"
+                             " (1, 1, 1, '2024-01-02', 20, NULL, NULL, '2024-01-02 18:00:00'),"
+                             " (2, 1, 1, '2024-01-03', 25, NULL, NULL, '2024-01-03 18:00:00')")
+    yield eng
+    eng.dispose()
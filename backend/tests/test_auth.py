@@ -0,0 +1,33 @@
+"""The login upsert: created once, data_version bumped only when the profile changed."""
+
+import pytest
+from sqlmodel import Session
+
+from app.auth import _upsert_user
+from app.db import engine
+from app.models import User
+
+
+def _version(user_id: int) -> int:
+    with Session(engine) as db:
+        return db.get(User, user_id).data_version
+
+
+@pytest.mark.parametrize("profiles, versions", [
+    # (name, picture) at each login -> data_version after it
+    ([("Ada", None), ("Ada", None)], [0, 0]),
+    ([(None, None), (None, None)], [0, 0]),
+    ([("Ada", None), ("Ada L.", None)], [0, 1]),
+    ([(None, None), ("Ada", None)], [0, 1]),
+    ([("Ada", "http://pic/1"), ("Ada", None)], [0, 1]),
+    ([("Ada", None), ("Ada", "http://pic/1"), ("Ada", "http://pic/1")], [0, 1, 1]),
+])
+def test_upsert_user(client, profiles, versions, request):   # client: schema is in place
+    email = f"{request.node.callspec.id}@upsert.example"
+    seen, ids = [], set()
+    for name, picture in profiles:
+        with Session(engine) as db:
+            ids.add(_upsert_user(db, email, name, picture))
+        seen.append(_version(next(iter(ids))))
+    assert len(ids) == 1
+    assert seen == versions
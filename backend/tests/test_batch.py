@@ -0,0 +1,126 @@
+"""POST /api/batch: temp_id references, in-batch deletes, rejection and rollback."""
+
+import pytest
+from sqlmodel import Session, select
+
+from app.auth import create_session_jwt
+from app.db import engine
+from app.models import User
+from app.routes import batch as batch_route
+from app.security import COOKIE_NAME
+
+
+def run(client, *operations, atomic: bool = True) -> dict:
+    resp = client.post("/api/batch", params={"atomic": str(atomic).lower()}, json={"operations": list(operations)})
+    assert resp.status_code == 200, resp.text
+    return resp.json()
+
+
+def piece(title: str, temp_id: str | None = None) -> dict:
+    return {"op": "create_piece", "temp_id": temp_id, "data": {"title": title}}
+
+
+def session(piece_ref, temp_id: str | None = None, day: str = "2026-10-01", minutes: int = 10) -> dict:
+    return {"op": "create_session", "temp_id": temp_id,
+            "data": {"piece_id": piece_ref, "practice_date": day, "minutes": minutes}}
+
+
+def data_version(user_id: int) -> int:
+    with Session(engine) as db:
+        return db.exec(select(User.data_version).where(User.id == user_id)).one()
+
+
+def test_sessions_reference_pieces_created_in_the_batch(client, user):
+    out = run(client,
+              piece("Prelude", "p1"), session("p1", "s1"),
+              piece("Fugue", "p2"), session("p2"), session("p1", day="2026-10-02"))
+
+    assert out["applied"] and all(r["ok"] for r in out["results"])
+    ids = out["ids"]
+    assert set(ids) == {"p1", "p2", "s1"}
+    assert [r["id"] for r in out["results"]][:2] == [ids["p1"], ids["s1"]]
+    sessions = client.get("/api/sessions").json()
+    assert sorted(s["piece_id"] for s in sessions) == sorted([ids["p1"], ids["p2"], ids["p1"]])
+    assert {p["id"] for p in client.get("/api/pieces").json()} == {ids["p1"], ids["p2"]}
+
+
+def test_create_then_delete_in_one_batch(client, user):
+    out = run(client,
+              piece("Sketch", "p1"), session("p1", "s1"), session("p1", "s2", minutes=5),
+              {"op": "delete_session", "id": "s1"},
+              piece("Keeper", "p2"), session("p2", minutes=7),
+              {"op": "delete_piece", "id": "p1"})
+
+    assert out["applied"] and all(r["ok"] for r in out["results"])
+    assert [p["title"] for p in client.get("/api/pieces").json()] == ["Keeper"]
+    assert [s["minutes"] for s in client.get("/api/sessions").json()] == [7]
+    me = client.get("/api/me").json()   # the rollup only counts what survived
+    assert (me["total_sessions"], me["total_minutes"]) == (1, 7)
+
+
+@pytest.mark.parametrize("operations, error", [
+    ([session("nope")], "Piece not found or not owned by user"),
+    ([piece("A", "x"), session("x", "s"), session("s")], "Piece not found or not owned by user"),
+    ([piece("A", "x"), {"op": "delete_session", "id": "x"}], "Session not found or not owned by user"),
+    ([piece("A", "x"), {"op": "delete_piece", "id": "x"}, session("x")], "Piece not found or not owned by user"),
+    ([piece("A", "x"), piece("B", "x")], "Duplicate temp_id 'x'"),
+])
+def test_unknown_or_stale_temp_id_is_rejected(client, user, operations, error):
+    version = data_version(user.id)
+    out = run(client, *operations)
+
+    assert not out["applied"] and out["ids"] == {}
+    failed = [r for r in out["results"] if not r["ok"]]
+    assert [r["error"] for r in failed] == [error]
+    assert client.get("/api/pieces").json() == []
+    assert data_version(user.id) == version
+
+
+def test_someone_elses_piece_is_rejected(client, user):
+    other = run(client, piece("Mine", "p"))["ids"]["p"]
+    client.cookies.clear()
+    with Session(engine) as db:
+        intruder = User(email=f"intruder-{other}@test.example")
+        db.add(intruder)
+        db.commit()
+        db.refresh(intruder)
+    client.cookies.set(COOKIE_NAME, create_session_jwt(intruder.email, uid=intruder.id))
+
+    out = run(client, session(other), {"op": "delete_piece", "id": other})
+    assert not out["applied"]
+    assert [r["ok"] for r in out["results"]] == [False, False]
+
+
+def test_one_failed_operation_applies_nothing(client, user):
+    run(client, piece("Existing"))
+    version = data_version(user.id)
+
+    out = run(client, piece("New", "p"), session("p"), session(999_999))
+    assert not out["applied"]
+    assert [r["ok"] for r in out["results"]] == [True, True, False]
+    assert [p["title"] for p in client.get("/api/pieces").json()] == ["Existing"]
+    assert client.get("/api/sessions").json() == []
+    assert data_version(user.id) == version
+
+
+def test_failure_while_writing_rolls_back_the_batch(client, user, monkeypatch):
+    version = data_version(user.id)
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("rollup write failed")
+    monkeypatch.setattr(batch_route, "record_sessions", fail)
+
+    # pieces are already inserted when the session rollup fails
+    with pytest.raises(RuntimeError):
+        client.post("/api/batch", json={"operations": [piece("P", "p"), session("p")]})
+    assert client.get("/api/pieces").json() == []
+    assert data_version(user.id) == version
+
+
+def test_non_atomic_applies_the_valid_operations(client, user):
+    out = run(client, piece("Kept", "p"), session("missing"), session("p"), atomic=False)
+
+    assert out["applied"]
+    assert [r["ok"] for r in out["results"]] == [True, False, True]
+    assert [p["title"] for p in client.get("/api/pieces").json()] == ["Kept"]
+    assert len(client.get("/api/sessions").json()) == 1
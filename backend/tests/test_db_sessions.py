@@ -0,0 +1,47 @@
+"""Pooled connections per request: a write shares one session with its auth lookup."""
+
+import pytest
+from sqlalchemy import event
+
+from app.db import engine
+from app.security import user_cache
+
+
+@pytest.fixture
+def checkouts():
+    """{"open": connections checked out now, "peak": most held at once} on the primary pool."""
+    held = {"open": 0, "peak": 0}
+
+    def checkout(dbapi_conn, record, proxy):
+        held["open"] += 1
+        held["peak"] = max(held["peak"], held["open"])
+
+    def checkin(dbapi_conn, record):
+        held["open"] -= 1
+
+    event.listen(engine, "checkout", checkout)
+    event.listen(engine, "checkin", checkin)
+    yield held
+    event.remove(engine, "checkout", checkout)
+    event.remove(engine, "checkin", checkin)
+
+
+@pytest.mark.parametrize("warm_auth", [False, True])
+def test_write_uses_one_connection(client, user, checkouts, statements, warm_auth):
+    if warm_auth:
+        client.get("/api/pieces")
+    else:
+        user_cache.clear()
+    checkouts["peak"] = 0
+    statements.clear()
+
+    assert client.post("/api/pieces", json={"title": "Pavane"}).status_code == 200
+    assert checkouts["peak"] == 1
+    looked_up = any(sql.startswith("SELECT users.id") for sql, _ in statements)
+    assert looked_up is not warm_auth
+
+
+def test_read_after_write_sees_the_user(client, user):
+    user_cache.clear()
+    piece = client.post("/api/pieces", json={"title": "Pavane"}).json()
+    assert client.get("/api/pieces").json()[0]["id"] == piece["id"]
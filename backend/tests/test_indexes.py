@@ -0,0 +1,64 @@
+"""
+The hot-path queries use the indexes from migrations 2 and 3.
+
+Each test runs the real route, takes the SQL it sent and asks SQLite for the
+plan (EXPLAIN QUERY PLAN): on the test database, which create_all built, and
+on a first-release database brought up to date by init_db().
+"""
+
+from datetime import date, timedelta
+
+import pytest
+
+from app.db import engine, init_db
+
+
+def _plan(eng, sql: str, params) -> str:
+    with eng.connect() as conn:
+        return "\n".join(row[3] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql, params))
+
+
+def _captured(statements, *fragments: str) -> tuple[str, tuple]:
+    matches = [(sql, params) for sql, params in statements if all(f in sql for f in fragments)]
+    assert len(matches) == 1, matches
+    return matches[0]
+
+
+@pytest.fixture(params=["created", "upgraded"])
+def explain_on(request):
+    if request.param == "created":
+        return engine
+    eng = request.getfixturevalue("baseline_engine")
+    init_db(eng)
+    return eng
+
+
+def _practice(client, days: int = 10) -> None:
+    piece_id = client.post("/api/pieces", json={"title": "Gymnopédie No. 1"}).json()["id"]
+    client.post("/api/pieces", json={"title": "Arabesque No. 1"})
+    for back in range(days):
+        client.post("/api/sessions", json={
+            "piece_id": piece_id, "practice_date": str(date.today() - timedelta(days=back)), "minutes": 15,
+        })
+
+
+def test_list_pieces_uses_owner_index(client, user, statements, explain_on):
+    _practice(client)
+    statements.clear()
+    assert client.get("/api/pieces").status_code == 200
+
+    sql, params = _captured(statements, "FROM pieces WHERE pieces.owner_id")
+    plan = _plan(explain_on, sql, params)
+    assert "INDEX ix_pieces_owner_" in plan, plan
+    assert "SCAN pieces" not in plan, plan
+
+
+def test_stats_date_range_sum_uses_session_index(client, user, statements, explain_on):
+    _practice(client)
+    statements.clear()
+    assert client.get("/api/stats/overview").status_code == 200
+
+    sql, params = _captured(statements, "sum(practice_sessions.minutes)", "practice_sessions.practice_date >=")
+    plan = _plan(explain_on, sql, params)
+    assert "INDEX ix_practice_sessions_" in plan, plan
+    assert "SCAN practice_sessions" not in plan, plan
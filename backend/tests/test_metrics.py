@@ -0,0 +1,18 @@
+"""/metrics is closed unless METRICS_TOKEN is configured."""
+
+from app import main
+
+
+def test_metrics_off_without_token(client, monkeypatch):
+    monkeypatch.setattr(main, "METRICS_TOKEN", None)
+    assert client.get("/metrics").status_code == 404
+
+
+def test_metrics_requires_the_token(client, monkeypatch):
+    monkeypatch.setattr(main, "METRICS_TOKEN", "scrape-me")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+
+    resp = client.get("/metrics", headers={"Authorization": "Bearer scrape-me"})
+    assert resp.status_code == 200
+    assert "db_statements_total" in resp.text
@@ -0,0 +1,29 @@
+"""Upgrading a database created by the first release."""
+
+from sqlalchemy import inspect, text
+
+from app.db import init_db
+from app.migrations import MIGRATIONS
+
+
+def test_upgrade_from_baseline(baseline_engine):
+    ran = init_db(baseline_engine)
+    assert [m.version for m in ran] == [m.version for m in MIGRATIONS]
+
+    insp = inspect(baseline_engine)
+    for table in ("pieces", "practice_sessions"):
+        assert {"updated_at", "change_seq"} <= {c["name"] for c in insp.get_columns(table)}
+    indexes = {i["name"] for t in ("pieces", "practice_sessions") for i in insp.get_indexes(t)}
+    assert {
+        "ix_pieces_owner_created", "ix_pieces_owner_seq",
+        "ix_practice_sessions_user_date_minutes", "ix_practice_sessions_user_piece_date",
+        "ix_practice_sessions_piece", "ix_practice_sessions_user_date_id", "ix_practice_sessions_user_seq",
+    } <= indexes
+
+    with baseline_engine.connect() as conn:
+        # the backfills reached the existing rows
+        assert conn.execute(text("SELECT SUM(minutes) FROM user_daily_totals WHERE user_id = 1")).scalar() == 45
+        assert conn.execute(text("SELECT COUNT(*) FROM practice_sessions WHERE updated_at IS NULL")).scalar() == 0
+
+    # a second run has nothing left to do
+    assert init_db(baseline_engine) == []
@@ -0,0 +1,54 @@
+"""ID-token verification against the in-process fake provider (bench/fake_oidc.py)."""
+
+import asyncio
+import base64
+import json
+import time
+
+import httpx
+import pytest
+from jose import jwt
+
+from app.oidc import OIDCError, OIDCProvider
+from bench.fake_oidc import FakeOIDC
+
+ISSUER = "http://fake-oidc"
+AUDIENCE = "test-client"
+
+
+@pytest.fixture
+def fake():
+    # advertises algorithms the app must refuse anyway
+    return FakeOIDC(ISSUER, algorithms=("RS256", "HS256", "none"))
+
+
+def _verify(fake: FakeOIDC, token: str) -> dict:
+    provider = OIDCProvider(ISSUER, transport=httpx.ASGITransport(app=fake.app))
+    return asyncio.run(provider.verify_id_token(token, AUDIENCE))
+
+
+def _claims() -> dict:
+    now = int(time.time())
+    return {"iss": ISSUER, "aud": AUDIENCE, "sub": "a@test.example", "email": "a@test.example",
+            "iat": now, "exp": now + 600}
+
+
+def _b64(obj: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(obj).encode()).rstrip(b"=").decode()
+
+
+def test_accepts_rs256(fake):
+    token = jwt.encode(_claims(), fake._key, algorithm="RS256", headers={"kid": fake.kid})
+    assert _verify(fake, token)["email"] == "a@test.example"
+
+
+def test_rejects_unsigned(fake):
+    token = f"{_b64({'alg': 'none', 'kid': fake.kid})}.{_b64(_claims())}."
+    with pytest.raises(OIDCError, match="not allowed"):
+        _verify(fake, token)
+
+
+def test_rejects_hmac_keyed_with_the_public_key(fake):
+    token = jwt.encode(_claims(), json.dumps(fake._jwk), algorithm="HS256", headers={"kid": fake.kid})
+    with pytest.raises(OIDCError, match="not allowed"):
+        _verify(fake, token)
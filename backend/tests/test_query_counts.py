@@ -0,0 +1,86 @@
+"""
+SQL statements per request. Each GET first reads users.data_version (the
+ETag); /api/me is one aggregate on top, plus the auth lookup only when the
+user isn't cached. The list and stats endpoints must not grow with the data.
+"""
+
+from datetime import date, timedelta
+
+import pytest
+
+from app.security import user_cache
+
+
+def _log(client) -> None:
+    # a write bumps data_version, so the next GET recomputes instead of hitting the stats cache
+    piece_id = client.post("/api/pieces", json={"title": "Für Elise"}).json()["id"]
+    client.post("/api/sessions", json={"piece_id": piece_id, "practice_date": str(date.today()), "minutes": 20})
+
+
+def _reads(statements) -> list[str]:
+    return [sql for sql, _ in statements if sql.startswith("SELECT")]
+
+
+def test_me_warm_auth_cache(client, user, statements):
+    client.get("/api/me")   # caches the user
+    _log(client)
+    statements.clear()
+
+    resp = client.get("/api/me")
+    assert resp.status_code == 200 and resp.json()["total_minutes"] == 20
+    version, aggregate = _reads(statements)
+    assert version.startswith("SELECT users.data_version FROM users")
+    assert "FROM user_daily_totals" in aggregate and "FROM pieces" in aggregate
+    assert len(statements) == 2
+
+
+def test_me_cold_auth_cache(client, user, statements):
+    _log(client)
+    user_cache.clear()
+    statements.clear()
+
+    assert client.get("/api/me").status_code == 200
+    lookup, version, aggregate = _reads(statements)
+    assert lookup.startswith("SELECT users.id") and "WHERE users.id = ?" in lookup
+    assert version.startswith("SELECT users.data_version FROM users")
+    assert "FROM user_daily_totals" in aggregate
+    assert len(statements) == 3
+
+
+def test_me_unchanged_reads_only_the_version(client, user, statements):
+    client.get("/api/me")
+    statements.clear()
+
+    resp = client.get("/api/me")
+    assert resp.status_code == 200
+    assert _reads(statements) == ["SELECT users.data_version FROM users WHERE users.id = ?"]
+    assert client.get("/api/me", headers={"If-None-Match": resp.headers["etag"]}).status_code == 304
+
+
+def _seed(client, pieces: int, sessions: int) -> None:
+    ids = [client.post("/api/pieces", json={"title": f"Invention {i + 1}"}).json()["id"] for i in range(pieces)]
+    for i in range(sessions):
+        client.post("/api/sessions", json={"piece_id": ids[i % pieces], "minutes": 10,
+                                           "practice_date": str(date.today() - timedelta(days=i))})
+
+
+# endpoint -> statements on a stats-cache miss, the data_version read included
+ENDPOINT_STATEMENTS = {
+    "/api/stats/overview": 4,    # 7-day rollup sum, top piece, streak summary
+    "/api/stats/by-day": 2,      # one rollup range read
+    "/api/pieces": 2,            # one SELECT of the list
+    "/api/sessions": 2,          # one SELECT of the list
+    "/api/sessions?limit=5": 2,  # one keyset page
+}
+
+
+@pytest.mark.parametrize("pieces, sessions", [(1, 1), (6, 40)])
+@pytest.mark.parametrize("path", list(ENDPOINT_STATEMENTS))
+def test_endpoint_statement_counts(client, user, statements, path, pieces, sessions):
+    _seed(client, pieces, sessions)   # the writes also invalidate the stats cache
+    client.get("/api/me")             # and this caches the user
+    statements.clear()
+
+    assert client.get(path).status_code == 200
+    assert len(statements) == ENDPOINT_STATEMENTS[path], [sql for sql, _ in statements]
+    assert statements[0][0].startswith("SELECT users.data_version")
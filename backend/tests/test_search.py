@@ -0,0 +1,54 @@
+"""
+Search on both backends. SQLite runs for real; the Postgres statements are
+compiled for Postgres and then prepared on SQLite against the real schema,
+which resolves every column reference (an ambiguous bare column fails there
+just as it does on Postgres).
+"""
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+from app import search
+from app.db import engine
+
+_PG_ONLY_FUNCTIONS = {"to_tsvector": 2, "setweight": 2, "f_unaccent": 1, "ts_rank": 2, "to_tsquery": 2}
+
+
+def _prepare_on_sqlite(sql: str, params: dict) -> None:
+    # to_tsquery(..) q is a function in FROM on Postgres; @@ is its match operator
+    sql = sql.replace(f"{search._PG_QUERY} q", f"(SELECT {search._PG_QUERY} AS q) q").replace(" @@ ", " = ")
+    with engine.connect() as conn:
+        dbapi = conn.connection.driver_connection
+        for name, nargs in _PG_ONLY_FUNCTIONS.items():
+            dbapi.create_function(name, nargs, lambda *args: args[-1])
+        conn.execute(text("EXPLAIN " + sql), params)
+
+
+@pytest.mark.parametrize("sql, binds", [
+    (search._PG_PIECES_SQL, {"q", "uid", "limit", "offset"}),
+    (search._pg_sessions_sql(""), {"q", "uid", "limit", "offset"}),
+    (search._pg_sessions_sql("AND s.piece_id = :piece_id"), {"q", "uid", "limit", "offset", "piece_id"}),
+])
+def test_postgres_statements_resolve(client, sql, binds):   # client: schema is in place
+    compiled = text(sql).compile(dialect=postgresql.dialect())
+    assert set(compiled.params) == binds
+    _prepare_on_sqlite(sql, dict.fromkeys(binds, 1))
+
+
+def test_postgres_sessions_match_uses_the_indexed_expression():
+    # the planner only uses ix_practice_sessions_search for the identical expression
+    assert f"{search._PG_SESSION_VECTOR} @@ q" in search._pg_sessions_sql("")
+    assert f"{search._PG_PIECE_VECTOR} @@ q" in search._PG_PIECES_SQL
+
+
+def test_search_sessions_and_pieces(client, user):
+    piece = client.post("/api/pieces", json={"title": "Humoresque", "composer": "Dvořák",
+                                              "notes": "slow practice"}).json()
+    client.post("/api/sessions", json={"piece_id": piece["id"], "practice_date": "2026-10-01",
+                                       "minutes": 10, "focus": "voicing", "notes": "slow hands"})
+
+    found = client.get("/api/search", params={"q": "slow"}).json()
+    assert [p["id"] for p in found["pieces"]] == [piece["id"]]
+    assert [s["piece_title"] for s in found["sessions"]] == ["Humoresque"]
+    assert client.get("/api/search", params={"q": "dvorak", "type": "pieces"}).json()["pieces"]
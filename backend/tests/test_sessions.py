@@ -0,0 +1,55 @@
+"""GET /api/sessions: keyset pages and conditional GET, as JSON and as NDJSON."""
+
+import json
+from datetime import date, timedelta
+
+import pytest
+
+
+@pytest.fixture
+def session_ids(client, user) -> list[int]:
+    """Seven sessions over five days (two days have two), newest first."""
+    piece_id = client.post("/api/pieces", json={"title": "Rondo"}).json()["id"]
+    days = [0, 0, 1, 2, 2, 3, 4]
+    created = [
+        client.post("/api/sessions", json={"piece_id": piece_id, "minutes": 5,
+                                           "practice_date": str(date.today() - timedelta(days=d))}).json()
+        for d in days
+    ]
+    created.sort(key=lambda s: (s["practice_date"], s["id"]), reverse=True)
+    return [s["id"] for s in created]
+
+
+def pages(client, fmt: str, limit: int) -> tuple[list[list[int]], list]:
+    out, responses, cursor = [], [], None
+    while True:
+        params = {"format": fmt, "limit": limit, **({"cursor": cursor} if cursor else {})}
+        resp = client.get("/api/sessions", params=params)
+        assert resp.status_code == 200
+        rows = resp.json() if fmt == "json" else [json.loads(line) for line in resp.text.splitlines()]
+        out.append([r["id"] for r in rows])
+        responses.append(resp)
+        cursor = resp.headers.get("x-next-cursor")
+        if not cursor:
+            return out, responses
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 7, 10])
+def test_ndjson_pages_like_json(client, session_ids, limit):
+    json_pages, _ = pages(client, "json", limit)
+    ndjson_pages, responses = pages(client, "ndjson", limit)
+
+    assert ndjson_pages == json_pages
+    assert [i for page in ndjson_pages for i in page] == session_ids
+    assert all(len(p) == limit for p in ndjson_pages[:-1])
+    assert responses[0].headers["content-type"] == "application/x-ndjson"
+
+
+@pytest.mark.parametrize("fmt", ["json", "ndjson"])
+def test_conditional_get_headers(client, session_ids, fmt):
+    resp = client.get("/api/sessions", params={"format": fmt})
+    assert resp.headers["etag"] and resp.headers["cache-control"] == "private, no-cache"
+    assert "x-next-cursor" not in resp.headers
+
+    again = client.get("/api/sessions", params={"format": fmt}, headers={"If-None-Match": resp.headers["etag"]})
+    assert again.status_code == 304
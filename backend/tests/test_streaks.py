@@ -0,0 +1,111 @@
+"""
+Incremental streak maintenance (app/streaks.py) through the API: after each
+write, practice_runs and user_streaks must equal what rebuild_streaks()
+derives from the daily rollup.
+"""
+
+from datetime import date, timedelta
+
+import pytest
+from sqlmodel import Session, select
+
+from app.db import engine
+from app.models import PracticeRun, UserStreak
+from app.streaks import rebuild_streaks
+
+TODAY = date.today()
+
+
+def day(offset: int) -> date:
+    return TODAY + timedelta(days=offset)
+
+
+@pytest.fixture
+def piece_id(client, user) -> int:
+    return client.post("/api/pieces", json={"title": "Etude Op. 10 No. 1"}).json()["id"]
+
+
+def log(client, piece_id: int, *offsets: int) -> list[int]:
+    return [
+        client.post("/api/sessions", json={"piece_id": piece_id, "practice_date": str(day(o)),
+                                           "minutes": 10}).json()["id"]
+        for o in offsets
+    ]
+
+
+def delete(client, *session_ids: int) -> None:
+    resp = client.post("/api/batch", json={"operations": [
+        {"op": "delete_session", "id": sid} for sid in session_ids
+    ]})
+    assert resp.status_code == 200 and resp.json()["applied"], resp.text
+
+
+def _state(db: Session, user_id: int) -> tuple[list, tuple]:
+    runs = sorted(
+        (r.start_date, r.end_date, r.length_days)
+        for r in db.exec(select(PracticeRun).where(PracticeRun.user_id == user_id))
+    )
+    s = db.get(UserStreak, user_id)
+    return runs, (s.current_start, s.current_end, s.longest_days) if s else (None, None, 0)
+
+
+def streaks(user_id: int) -> tuple[list, tuple]:
+    """The incrementally maintained (runs, summary), checked against a full rebuild."""
+    with Session(engine) as db:
+        incremental = _state(db, user_id)
+        rebuild_streaks(db, user_id)
+        db.expire_all()
+        rebuilt = _state(db, user_id)
+        db.rollback()
+    assert incremental == rebuilt
+    return incremental
+
+
+def test_back_dated_day_bridges_two_runs(client, user, piece_id):
+    log(client, piece_id, -5, -4, -2, -1)
+    assert streaks(user.id)[0] == [(day(-5), day(-4), 2), (day(-2), day(-1), 2)]
+
+    log(client, piece_id, -3)
+    assert streaks(user.id) == ([(day(-5), day(-1), 5)], (day(-5), day(-1), 5))
+
+
+def test_deleting_a_day_splits_its_run(client, user, piece_id):
+    ids = log(client, piece_id, -4, -3, -2, -1, 0)
+
+    delete(client, ids[2])
+    assert streaks(user.id) == ([(day(-4), day(-3), 2), (day(-1), day(0), 2)], (day(-1), day(0), 2))
+    assert client.get("/api/me").json()["current_streak_days"] == 2
+
+
+def test_day_ends_only_with_its_last_session(client, user, piece_id):
+    log(client, piece_id, -1)
+    first, second = log(client, piece_id, 0, 0)
+    before = streaks(user.id)
+    assert before == ([(day(-1), day(0), 2)], (day(-1), day(0), 2))
+
+    delete(client, first)   # today still has a session
+    assert streaks(user.id) == before
+    assert client.get("/api/me").json()["current_streak_days"] == 2
+
+    delete(client, second)
+    assert streaks(user.id) == ([(day(-1), day(-1), 1)], (day(-1), day(-1), 1))
+    assert client.get("/api/me").json()["current_streak_days"] == 0
+
+
+def test_current_streak_with_a_future_dated_run(client, user, piece_id):
+    log(client, piece_id, -2, -1, 0, 3)
+    # the summary follows the latest run, which is in the future...
+    assert streaks(user.id) == ([(day(-2), day(0), 3), (day(3), day(3), 1)], (day(3), day(3), 3))
+    # ...but the current streak is the run containing today
+    assert client.get("/api/me").json()["current_streak_days"] == 3
+    assert client.get("/api/stats/overview").json()["current_streak_days"] == 3
+
+    delete(client, *log(client, piece_id, 1))   # a day added and removed between them
+    assert client.get("/api/me").json()["current_streak_days"] == 3
+    streaks(user.id)
+
+
+def test_no_current_streak_when_only_a_future_run_is_live(client, user, piece_id):
+    log(client, piece_id, -2, 2)
+    assert streaks(user.id)[1] == (day(2), day(2), 1)
+    assert client.get("/api/me").json()["current_streak_days"] == 0
@@ -0,0 +1,98 @@
+"""GET /api/sync across creates, an update and deletes; token expiry and tombstone pruning."""
+
+import base64
+import time
+from datetime import datetime, timedelta
+
+from sqlmodel import Session, select
+
+from app.changes import TOKEN_MAX_AGE, TOMBSTONE_RETENTION, prune_tombstones
+from app.db import engine
+from app.etag import bump_data_version
+from app.models import Piece, Tombstone
+from app.routes.sync import decode_token, encode_token
+
+
+def sync(client, token: str | None = None, status: int = 200) -> dict:
+    resp = client.get("/api/sync", params={"since": token} if token else None)
+    assert resp.status_code == status, resp.text
+    return resp.json()
+
+
+def ids(rows: list[dict]) -> list[int]:
+    return sorted(r["id"] for r in rows)
+
+
+def update_piece(user_id: int, piece_id: int, title: str) -> None:
+    # no update endpoint yet; write the way app/changes.py tells writers to
+    with Session(engine) as db:
+        seq = bump_data_version(db, user_id)
+        piece = db.get(Piece, piece_id)
+        piece.title, piece.change_seq, piece.updated_at = title, seq, datetime.utcnow()
+        db.add(piece)
+        db.commit()
+
+
+def test_deltas_across_create_update_delete(client, user):
+    a = client.post("/api/pieces", json={"title": "Ballade"}).json()["id"]
+    s1 = client.post("/api/sessions", json={"piece_id": a, "practice_date": "2026-10-01", "minutes": 10}).json()["id"]
+
+    full = sync(client)
+    assert full["full"] and ids(full["pieces"]) == [a] and ids(full["sessions"]) == [s1]
+    t0 = full["token"]
+
+    # nothing changed: empty delta, same sequence
+    same = sync(client, t0)
+    assert not same["full"]
+    assert (same["pieces"], same["sessions"], same["deleted"]) == ([], [], {"pieces": [], "sessions": []})
+    assert decode_token(same["token"])[1] == decode_token(t0)[1]
+
+    b = client.post("/api/pieces", json={"title": "Scherzo"}).json()["id"]
+    created = sync(client, t0)
+    assert ids(created["pieces"]) == [b] and created["sessions"] == []
+    t1 = created["token"]
+
+    update_piece(user.id, a, "Ballade No. 1")
+    updated = sync(client, t1)
+    assert [(p["id"], p["title"]) for p in updated["pieces"]] == [(a, "Ballade No. 1")]
+    t2 = updated["token"]
+
+    assert client.delete(f"/api/pieces/{a}").status_code in (200, 204)
+    deleted = sync(client, t2)
+    assert deleted["pieces"] == [] and deleted["sessions"] == []
+    assert deleted["deleted"] == {"pieces": [a], "sessions": [s1]}
+
+    # an older token gets everything since, and the delete wins over the create
+    catch_up = sync(client, t0)
+    assert ids(catch_up["pieces"]) == [b] and catch_up["deleted"] == {"pieces": [a], "sessions": [s1]}
+
+    # and the newest token is empty again
+    assert sync(client, deleted["token"])["deleted"] == {"pieces": [], "sessions": []}
+
+
+def test_unusable_tokens_force_a_resync(client, user):
+    version = decode_token(sync(client)["token"])[1]
+    now = int(time.time())
+
+    expired = encode_token(user.id, version, issued=now - int(TOKEN_MAX_AGE.total_seconds()) - 60)
+    assert "expired" in sync(client, expired, status=410)["detail"]
+    # tokens handed out before they carried an issue time
+    legacy = base64.urlsafe_b64encode(f"{user.id}:{version}".encode()).decode().rstrip("=")
+    sync(client, legacy, status=410)
+    sync(client, encode_token(user.id + 1000, version), status=410)   # another account
+    sync(client, encode_token(user.id, version + 5), status=410)      # ahead of the server
+    sync(client, "not a token!", status=400)
+
+
+def test_prune_keeps_tombstones_a_valid_token_may_need(client, user):
+    assert TOKEN_MAX_AGE < TOMBSTONE_RETENTION
+    old = datetime.utcnow() - TOMBSTONE_RETENTION - timedelta(days=1)
+    recent = datetime.utcnow() - TOKEN_MAX_AGE
+    with Session(engine) as db:
+        db.add(Tombstone(user_id=user.id, entity="piece", entity_id=1, change_seq=1, deleted_at=old))
+        db.add(Tombstone(user_id=user.id, entity="piece", entity_id=2, change_seq=2, deleted_at=recent))
+        db.commit()
+        assert prune_tombstones(db) >= 1
+        db.commit()
+        left = db.exec(select(Tombstone.entity_id).where(Tombstone.user_id == user.id)).all()
+    assert left == [2]
@@ -0,0 +1,5 @@
+#!/bin/bash
+# Runs once, on first init of the primary's volume: allow streaming
+# replication connections for the optional db-replica service.
+set -e
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"
@@ -1,5 +1,5 @@
-import { useEffect, useState } from "react";
-import { api } from "./api";
+import { useEffect, useRef, useState } from "react";
+import { api, cachedPieces, syncData } from "./api";
 import StatsPanel from "./components/StatsPanel";
 import LogSessionForm from "./components/LogSessionForm";
 import { Page, Card, Grid, TwoCol, Button, LogOutButton } from "./ui";
@@ -28,6 +28,9 @@ export default function App() {
     const [composer, setComposer] = useState("");
     const [status, setStatus] = useState("");
     const [refreshTick, setRefreshTick] = useState(0);
+    // bumped on every local add/delete, so a background sync that started
+    // earlier doesn't overwrite them with its older list
+    const localEdits = useRef(0);
     async function handleDeletePiece(id: number) {
         console.log("Deleting piece", id);
         const ok = window.confirm(
@@ -38,20 +41,35 @@ export default function App() {
         await api(`/api/pieces/${id}`, { method: "DELETE" });
 
         // Update UI immediately
+        localEdits.current++;
         setPieces((prev) => prev.filter((p) => p.id !== id));
     }
 
     async function load() {
         try {
-            const m = await api<Me>("/api/me");
-            const p = await api<Piece[]>("/api/pieces");
+            // first paint: the cached copy, or just the piece list on a fresh
+            // client (its first sync is the whole history)
+            const cached = cachedPieces();
+            const [m, p] = await Promise.all([
+                api<Me>("/api/me"),
+                cached ?? api<Piece[]>("/api/pieces"),
+            ]);
             setMe(m);
             setPieces(p);
             setStatus("");
         } catch (e: any) {
             setMe(null);
             setStatus(e.message || "Failed to load");
+            return;
         }
+        const edits = localEdits.current;
+        syncData()
+            .then(({ pieces: p }) => {
+                if (localEdits.current === edits) setPieces(p);
+            })
+            .catch(() => {
+                // keep what's on screen; the next load syncs again
+            });
     }
 
     useEffect(() => {
@@ -71,6 +89,7 @@ export default function App() {
         setTitle("");
         setComposer("");
         setStatus("Piece added");
+        localEdits.current++;
         setPieces((prev) => [newPiece, ...prev]); // 🔥 keep local state in sync
         bumpRefresh();
     }
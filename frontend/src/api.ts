@@ -12,3 +12,107 @@ export async function api<T>(path: string, init: RequestInit = {}): Promise<T> {
     if (!res.ok) throw new Error(`${res.status} ${await res.text()}`);
     return res.json() as Promise<T>;
 }
+
+// ---------- Delta sync ----------
+// Pieces and sessions are cached in localStorage; GET /api/sync?since=<token>
+// returns only what changed since the last call, so a page load usually
+// downloads a few bytes instead of the whole history. The first sync of a
+// fresh client is the whole history, so the UI paints from /api/pieces (or
+// the cached copy) and syncs in the background.
+
+export type SyncedPiece = {
+    id: number;
+    title: string;
+    composer?: string | null;
+    difficulty?: string | null;
+    notes?: string | null;
+    created_at: string;
+    updated_at: string;
+};
+
+export type SyncedSession = {
+    id: number;
+    piece_id: number;
+    practice_date: string;
+    minutes: number;
+    focus?: string | null;
+    notes?: string | null;
+    updated_at: string;
+};
+
+type SyncResponse = {
+    token: string;
+    full: boolean;
+    pieces: SyncedPiece[];
+    sessions: SyncedSession[];
+    deleted: { pieces: number[]; sessions: number[] };
+};
+
+type SyncState = {
+    token: string | null;
+    pieces: Record<number, SyncedPiece>;
+    sessions: Record<number, SyncedSession>;
+};
+
+const SYNC_KEY = "pt_sync_v1";
+const emptyState = (): SyncState => ({ token: null, pieces: {}, sessions: {} });
+
+function loadSyncState(): SyncState {
+    try {
+        const raw = localStorage.getItem(SYNC_KEY);
+        if (raw) return JSON.parse(raw) as SyncState;
+    } catch {
+        // unreadable cache: fall back to a full sync
+    }
+    return emptyState();
+}
+
+const byNewest = (a: SyncedPiece, b: SyncedPiece) => b.created_at.localeCompare(a.created_at);
+
+/** Pieces from the last sync, or null if this client has never synced. */
+export function cachedPieces(): SyncedPiece[] | null {
+    const state = loadSyncState();
+    return state.token ? Object.values(state.pieces).sort(byNewest) : null;
+}
+
+export async function syncData(): Promise<{ pieces: SyncedPiece[]; sessions: SyncedSession[] }> {
+    let state = loadSyncState();
+    let res: SyncResponse;
+    try {
+        res = await api<SyncResponse>(
+            state.token ? `/api/sync?since=${encodeURIComponent(state.token)}` : "/api/sync"
+        );
+    } catch (e) {
+        // 410: token from another account or a reset server -> start over
+        if (!(e instanceof Error) || !e.message.startsWith("410")) throw e;
+        state = emptyState();
+        res = await api<SyncResponse>("/api/sync");
+    }
+
+    if (res.full) state = emptyState();
+    // deletes first: a returned row is always newer than any tombstone for its id
+    for (const id of res.deleted.pieces) delete state.pieces[id];
+    for (const id of res.deleted.sessions) delete state.sessions[id];
+    for (const p of res.pieces) state.pieces[p.id] = p;
+    for (const s of res.sessions) state.sessions[s.id] = s;
+    for (const s of Object.values(state.sessions)) {
+        if (!(s.piece_id in state.pieces)) delete state.sessions[s.id];
+    }
+    state.token = res.token;
+
+    try {
+        localStorage.setItem(SYNC_KEY, JSON.stringify(state));
+    } catch {
+        // quota exceeded: the next load just does a full sync
+    }
+    return {
+        pieces: Object.values(state.pieces).sort(byNewest),
+        sessions: Object.values(state.sessions).sort(
+            (a, b) => b.practice_date.localeCompare(a.practice_date) || b.id - a.id
+        ),
+    };
+}
+
+export function clearSyncCache() {
+    localStorage.removeItem(SYNC_KEY);
+}
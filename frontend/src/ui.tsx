@@ -1,5 +1,6 @@
 // src/ui.tsx
 import React from "react";
+import { clearSyncCache } from "./api";
 
 // ui.tsx
 const BASE = import.meta.env.VITE_API_BASE_URL || "";
@@ -122,6 +123,7 @@ export const Button: React.FC<React.ButtonHTMLAttributes<HTMLButtonElement>> = (
 export const LogOutButton = () => (
     <button
         onClick={() => {
+            clearSyncCache();
             window.location.href = `${BASE}/logout`;
         }}
         style={{